@@ -9,138 +9,1021 @@ Integrantes:
 - Marina Tamagnini Magalhães - RM561786
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import pandas as pd
-import pickle
-import json
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+import numpy as np
+import hmac
 import logging
+import os
+import time
 from datetime import datetime
 
+_inicio_importacao = time.perf_counter()
+
+import codec_json
+from base_colunar import TabelaColunar
+from cache_recomendacoes import BackendSqlite, CacheRecomendacoes, chave_perfil
+from catalogo import Catalogo, validar_ids
+from memo_previsoes import PROB, SCORE_BASE
+from metricas import AmostradorPilhas, Metricas, faixa_catalogo
+import pontuacao
+# Mapas e regras escalares também ficam acessíveis como app.* (teste_paridade.py)
+from pontuacao.mapas import CARREIRAS_CURSOS, ESCOLARIDADE_MAP, NIVEL_CURSO_MAP, NIVEL_EXP_MAP
+from pontuacao.regras import aplicar_regras_negocio, criar_features, gerar_motivo
+from pontuacao.vetorizado import (INDICE_CARREIRAS, colunas_cursos, flags_motivo_lote, matriz_features,
+                                  texto_motivo)
+from pontuacao.modelos import entrada_modelo
+from pontuacao.motor_arvores import faixa_limiares, soma_arvores
+from recursos import memoria_processo, resumo_memoria
+from registro_modelos import EstadoRegistro, RegistroModelos, carregar_versao, nome_versao
+from sessoes import Sessao, SessoesIncrementais
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class ProvedorJson(JSONProvider):
+    """jsonify e request.get_json pelo codec_json (orjson quando instalado)."""
+    
+    def dumps(self, obj, **kwargs):
+        return codec_json.dumps_texto(obj)
+    
+    def loads(self, s, **kwargs):
+        return codec_json.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Bytes do codec direto no corpo, sem str intermediária
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(codec_json.dumps(obj) + b'\n', mimetype='application/json')
+
 app = Flask(__name__)
+app.json = ProvedorJson(app)
 CORS(app)
 
+# Métricas do processo, expostas em /metrics
+metricas = Metricas()
+metricas.descrever('etapa_segundos', 'Duração de cada etapa da recomendação')
+metricas.descrever('requisicao_segundos', 'Duração das requisições por rota')
+metricas.descrever('requisicoes_total', 'Requisições por rota e status')
+metricas.descrever('recomendacoes_total', 'Requisições de /recomendar por formato e tamanho do catálogo')
+metricas.descrever('modelo_segundos', 'Duração do ranking por versão dos modelos')
+
 # Carregar modelos
+# Se existirem modelos compilados (python -m pontuacao.motor_arvores), a API
+# serve com o motor NumPy e não importa o scikit-learn; senão usa os .pkl
+# diretamente.
+# Os arrays compilados são memory-mapped e somente leitura, então com o
+# gunicorn em preload (gunicorn.conf.py) os workers compartilham uma única cópia.
+# Novas versões entram sem reiniciar pelo registro (/admin/modelos), que todos
+# os workers seguem pelo arquivo de estado em SKILLBRIDGE_MODELOS_RAIZ.
+MEMO_ITENS = int(os.environ.get('SKILLBRIDGE_MEMO_ITENS', 100000))
+_diretorio_modelos = os.environ.get('SKILLBRIDGE_MODELOS_DIR', '.')
 try:
-    with open('modelo_classificacao.pkl', 'rb') as f:
-        modelo_classificacao = pickle.load(f)
-    with open('modelo_regressao.pkl', 'rb') as f:
-        modelo_regressao = pickle.load(f)
-    with open('features.json', 'r') as f:
-        features_config = json.load(f)
-    logger.info("✓ Modelos carregados")
+    # Versão: SKILLBRIDGE_VERSAO_MODELO, a de metricas_modelos.json (treinar_modelos.py) ou '2.0'
+    registro = RegistroModelos(
+        carregar_versao(_diretorio_modelos,
+                        os.environ.get('SKILLBRIDGE_VERSAO_MODELO') or nome_versao(_diretorio_modelos, '2.0'),
+                        max_itens_memo=MEMO_ITENS),
+        max_itens_memo=MEMO_ITENS,
+        # Versões carregadas pelo /admin só com modelos compilados, salvo SKILLBRIDGE_MODELOS_PICKLE=1
+        permitir_pickle=os.environ.get('SKILLBRIDGE_MODELOS_PICKLE') == '1')
+    # Versão carregada na inicialização (teste_paridade.py e benchmark.py)
+    modelo_regressao = registro.ativa.regressao
+    modelo_classificacao = registro.ativa.classificacao
+    features_config = registro.ativa.features
+    logger.info(f"✓ Modelos {registro.ativa.nome} carregados ({type(modelo_regressao).__name__})")
 except Exception as e:
     logger.error(f"Erro: {e}")
     raise
 
-# Mapeamentos
-NIVEL_EXP_MAP = {'Junior': 1, 'Intermediário': 2, 'Senior': 3}
-ESCOLARIDADE_MAP = {'Ensino Fundamental': 1, 'Ensino Médio': 2, 'Técnico': 3,
-                    'Superior Incompleto': 4, 'Superior Completo': 5,
-                    'Pós-graduação': 6, 'Mestrado': 7, 'Doutorado': 8}
-NIVEL_CURSO_MAP = {'BASICO': 1, 'INTERMEDIARIO': 2, 'AVANCADO': 3}
-
-# Cursos com ID >= 10000 por carreira
-CARREIRAS_CURSOS = {
-    'Desenvolvedor Full Stack': [10034, 10035, 10036, 10037, 10038, 10039, 10040, 10041, 10042, 10043],
-    'Desenvolvedor Frontend': [10034, 10035, 10036, 10044, 10045, 10046, 10047, 10048, 10049, 10050, 10051, 10052, 10053],
-    'Desenvolvedor Backend': [10037, 10038, 10054, 10055, 10056, 10057, 10058, 10059, 10060, 10061, 10062, 10063],
-    'Desenvolvedor Mobile': [10064, 10065, 10066, 10067, 10068, 10069, 10070, 10071, 10072, 10073],
-    'Cientista de Dados': [10074, 10075, 10076, 10077, 10078, 10079, 10080, 10081, 10082, 10083],
-    'Engenheiro de Dados': [10084, 10085, 10086, 10087, 10088, 10089, 10090, 10091, 10092, 10093],
-    'Analista de Dados': [10094, 10095, 10096, 10097, 10098, 10099, 10100, 10101, 10102, 10103],
-    'DevOps Engineer': [10104, 10105, 10106, 10107, 10108, 10109, 10110, 10111, 10112, 10113],
-    'Designer UX/UI': [10114, 10115, 10116, 10117, 10118, 10119, 10120, 10121, 10122, 10123],
-    'Product Manager': [10124, 10125, 10126, 10127, 10128, 10129, 10130, 10131, 10132, 10133],
-    'Arquiteto de Software': [10134, 10135, 10136, 10137, 10138, 10139, 10140, 10141, 10142, 10143],
-    'Engenheiro de Machine Learning': [10144, 10145, 10146, 10147, 10148, 10149, 10150, 10151, 10152, 10153],
-    'Especialista em Cloud': [10154, 10155, 10156, 10157, 10158, 10159, 10160, 10161, 10162, 10163],
-    'Analista de Segurança': [10164, 10165, 10166, 10167, 10168, 10169, 10170, 10171, 10172, 10173],
-    'QA/Tester': [10174, 10175, 10176, 10177, 10178, 10179, 10180, 10181, 10182, 10183]
-}
-
-def criar_features(perfil, curso):
-    nivel_exp = NIVEL_EXP_MAP.get(perfil.get('nivel_experiencia', 'Junior'), 1)
-    nivel_curso = NIVEL_CURSO_MAP.get(curso.get('nivel', 'BASICO'), 1)
-    escolaridade = ESCOLARIDADE_MAP.get(perfil.get('escolaridade', 'Superior Completo'), 5)
-    
-    match_nivel = 1 if nivel_exp >= nivel_curso - 1 else 0
-    tempo_semanal = perfil.get('tempo_disponivel_semanal', 5.0)
-    carga_semanal = curso.get('carga_horaria', 10.0) / 4
-    match_tempo = 1 if tempo_semanal >= carga_semanal else 0
-    
-    carreira = perfil.get('carreira_desejada', '')
-    cursos_carreira = CARREIRAS_CURSOS.get(carreira, [])
-    match_carreira = 1 if curso.get('id_curso') in cursos_carreira else 0
+# ====== VERSÕES VETORIZADAS (um curso por linha) ======
+
+def normalizar_perfil_java(perfil_java):
+    """Converte o perfil enviado pelo Java para o formato interno."""
+    return {
+        'carreira_desejada': perfil_java.get('objetivo_carreira', ''),
+        'nivel_experiencia': perfil_java.get('nivel_experiencia', 'Junior'),
+        'idade': perfil_java.get('idade', 25),
+        'anos_experiencia': perfil_java.get('anos_experiencia_total', 0),
+        'escolaridade': 'Superior Completo',  # Padrão
+        'tempo_disponivel_semanal': float(perfil_java.get('tempo_disponivel_semanal', 5.0))
+    }
+
+def normalizar_curso_java(c):
+    """Converte um curso do formato Java (camelCase) para o formato interno."""
+    return {
+        'id_curso': c.get('id') or c.get('id_curso'),
+        'nome': c.get('nome'),
+        'descricao': c.get('descricao'),
+        'nivel': c.get('nivel'),
+        'carga_horaria': float(c.get('cargaHoraria') or c.get('carga_horaria') or 10),
+        'avaliacao_media': float(c.get('avaliacaoMedia') or c.get('avaliacao_media') or 4.0),
+        'taxa_conclusao_media': float(c.get('taxaConclusaoMedia') or c.get('taxa_conclusao_media') or 80),
+        'popularidade_score': float(c.get('popularidadeScore') or c.get('popularidade_score') or 50)
+    }
+
+# Campos numéricos do curso: (coluna interna, chave no formato Java, padrão)
+CAMPOS_CURSO = [('carga_horaria', 'cargaHoraria', 10.0),
+                ('avaliacao_media', 'avaliacaoMedia', 4.0),
+                ('taxa_conclusao_media', 'taxaConclusaoMedia', 80.0),
+                ('popularidade_score', 'popularidadeScore', 50.0)]
+
+class CursosRecebidos:
+    """
+    Cursos válidos de uma requisição, sem normalizar: cada curso só vira o
+    dict interno quando é acessado, o que na prática acontece apenas com os
+    do top. Funciona como lista somente leitura para ranquear_top/ranquear_lote.
+    """
+    __slots__ = ('_brutos', '_indices', '_normalizar')
+    
+    def __init__(self, brutos, indices, normalizar):
+        self._brutos = brutos
+        self._indices = indices
+        self._normalizar = normalizar
+    
+    def __len__(self):
+        return len(self._indices)
+    
+    def __getitem__(self, i):
+        curso = self._brutos[self._indices[i]]
+        return curso if self._normalizar is None else self._normalizar(curso)
+
+def decodificar_cursos(brutos, formato):
+    """
+    Monta as colunas de colunas_cursos direto da lista recebida, uma coluna por
+    vez, sem criar um dict normalizado por curso. Segue as mesmas regras de
+    antes: no formato Java (e no 'base', que segue o Java) vale o primeiro valor não vazio entre a chave
+    camelCase e a snake_case (normalizar_curso_java); no Frontend, a chave
+    snake_case ou o padrão (colunas_cursos).
     
+    Retorna (cursos, colunas) só dos cursos com ID >= 10000, na ordem recebida.
+    """
+    if formato in ('java', 'base'):
+        ids = [c.get('id') or c.get('id_curso') or 0 for c in brutos]
+        niveis = [c.get('nivel') for c in brutos]
+        valores = {coluna: [c.get(chave) or c.get(coluna) or padrao for c in brutos]
+                   for coluna, chave, padrao in CAMPOS_CURSO}
+        normalizar = normalizar_curso_java
+    else:
+        ids = [c.get('id_curso', 0) for c in brutos]
+        niveis = [c.get('nivel', 'BASICO') for c in brutos]
+        valores = {coluna: [c.get(coluna, padrao) for c in brutos] for coluna, _, padrao in CAMPOS_CURSO}
+        normalizar = None
+    
+    colunas = {
+        'id_curso': np.array(ids),
+        'mascara_carreiras': INDICE_CARREIRAS.mascaras_cursos(ids),
+        'nivel_curso_num': np.array([NIVEL_CURSO_MAP.get(n, 1) for n in niveis], dtype=np.int64)
+    }
+    for coluna, lista in valores.items():
+        colunas[coluna] = np.array(lista, dtype=np.float64)
+    
+    # ====== FILTRAR APENAS CURSOS COM ID >= 10000 ======
+    validos = np.flatnonzero(colunas['id_curso'] >= 10000)
+    if len(validos) < len(brutos):
+        colunas = {k: v[validos] for k, v in colunas.items()}
+    return CursosRecebidos(brutos, validos.tolist(), normalizar), colunas
+
+def criar_features_lote(perfil, cursos, colunas=None):
+    """
+    Equivalente a criar_features para todos os cursos de uma vez.
+    Retorna um dict feature -> array NumPy com uma posição por curso.
+    `colunas` permite reaproveitar as colunas de curso já calculadas pelo catálogo.
+    """
+    if colunas is None:
+        colunas = colunas_cursos(cursos)
+    return criar_features_perfis([perfil], colunas)
+
+# Features e regras vêm de pontuacao.vetorizado; aqui só ganham o cronômetro por etapa
+criar_features_perfis = metricas.cronometrar('features')(pontuacao.criar_features_perfis)
+aplicar_regras_negocio_lote = metricas.cronometrar('regras_negocio')(pontuacao.aplicar_regras_negocio_lote)
+
+# ====== MEMÓRIA DE PREVISÕES (vetor de features -> score_base, prob) ======
+# Cada versão dos modelos tem a sua (VersaoModelo.memo)
+
+def prever_scores_base(modelo, features):
+    """Saída do modelo de regressão, já limitada a [0, 10], para cada linha de `features`."""
+    X = matriz_features(features, modelo.colunas_memo)
+    colunas = modelo.features['regressao']
+
+    def prever(linhas):
+        X_reg = entrada_modelo(modelo.regressao, X[np.ix_(linhas, modelo.posicoes_memo['regressao'])], colunas)
+        with metricas.etapa('regressao'):
+            return np.clip(modelo.regressao.predict(X_reg), 0, 10)
+    return modelo.memo.consultar(X, SCORE_BASE, prever)
+
+def prever_probs(modelo, features):
+    """Probabilidade de conclusão (classe 1) para cada linha de `features`."""
+    X = matriz_features(features, modelo.colunas_memo)
+    colunas = modelo.features['classificacao']
+
+    def prever(linhas):
+        X_class = entrada_modelo(modelo.classificacao, X[np.ix_(linhas, modelo.posicoes_memo['classificacao'])],
+                                 colunas)
+        with metricas.etapa('classificacao'):
+            return modelo.classificacao.predict_proba(X_class)[:, 1]
+    return modelo.memo.consultar(X, PROB, prever)
+
+def pontuar_lote(modelo, features, indices=None):
+    """Score final (já arredondado) das linhas em `indices` (todas se None), com uma chamada ao modelo."""
+    sub = features if indices is None else {k: v[indices] for k, v in features.items()}
+    return scores_finais(prever_scores_base(modelo, sub), sub)
+
+def scores_finais(scores_base, sub):
+    """Aplica as regras de negócio e arredonda: o score final de cada linha de `sub`."""
+    return [round(max(0, min(10, s)), 2)
+            for s in aplicar_regras_negocio_lote(scores_base, sub).tolist()]
+
+def pontuar_candidatos(modelo, features, quantidade, n_perfis=1):
+    """
+    Pontua as linhas de `n_perfis` perfis (n_cursos linhas cada, como em
+    criar_features_perfis) podando o que não tem como entrar no top.
+
+    Para cada perfil cujos cursos alinhados com a carreira já preenchem o top
+    `quantidade`, esses cursos são pontuados primeiro; os demais cursos desse
+    perfil cujo melhor score possível (teto_score_base da versão com as regras de
+    negócio aplicadas) fica abaixo do k-ésimo score são descartados sem chamar
+    o modelo.
+
+    Retorna (scores, chave): `scores` é a lista com o score arredondado de cada
+    linha (None nas podadas) e `chave` o mesmo em float64, com -inf nas
+    podadas, pronta para ordenar.
+    """
+    n = len(features['match_carreira'])
+    n_cursos = n // n_perfis if n_perfis else 0
+    scores = [None] * n
+
+    alinhado = features['match_carreira'] == 1
+    elegiveis = np.zeros(n_perfis, dtype=bool)
+    if isinstance(quantidade, int) and 0 < quantidade < n_cursos:
+        elegiveis = alinhado.reshape(n_perfis, n_cursos).sum(axis=1) >= quantidade
+
+    if not elegiveis.any():
+        scores = pontuar_lote(modelo, features)
+        return scores, np.array(scores, dtype=np.float64)
+
+    # 1) cursos alinhados dos perfis elegíveis
+    primeira = alinhado & np.repeat(elegiveis, n_cursos)
+    linhas1 = np.flatnonzero(primeira)
+    scores1 = pontuar_lote(modelo, features, linhas1)
+
+    # k-ésimo maior score de cada perfil elegível (os demais ficam com -inf)
+    perfil1 = linhas1 // n_cursos
+    ordem = np.lexsort((-np.array(scores1, dtype=np.float64), perfil1))
+    inicio_perfil = np.searchsorted(perfil1[ordem], np.flatnonzero(elegiveis))
+    kesimo = np.full(n_perfis, -np.inf)
+    kesimo[elegiveis] = np.array(scores1, dtype=np.float64)[ordem[inicio_perfil + quantidade - 1]]
+
+    # 2) demais linhas, descartando as que não alcançam o k-ésimo do seu perfil.
+    #    O arredondamento para 2 casas sobe no máximo 0.005, então comparar o teto
+    #    sem arredondar contra (k-ésimo - 0.01) nunca descarta um empate.
+    linhas2 = np.flatnonzero(~primeira)
+    sub = {k: v[linhas2] for k, v in features.items()}
+    tetos = aplicar_regras_negocio_lote(np.full(len(linhas2), modelo.teto_score_base), sub)
+    linhas2 = linhas2[tetos >= kesimo[linhas2 // n_cursos] - 0.01]
+
+    for i, s in zip(linhas1.tolist(), scores1):
+        scores[i] = s
+    if len(linhas2):
+        for i, s in zip(linhas2.tolist(), pontuar_lote(modelo, features, linhas2)):
+            scores[i] = s
+    return scores, np.array([-np.inf if s is None else s for s in scores], dtype=np.float64)
+
+# ====== RANKING APROXIMADO (árvores avaliadas em estágios) ======
+
+# Árvores avaliadas antes de cada poda e folga padrão do modo aproximado
+ESTAGIOS_APROXIMADO = [int(t) for t in os.environ.get('SKILLBRIDGE_APROX_ESTAGIOS', '10,25,50').split(',')]
+FOLGA_APROXIMADO = float(os.environ.get('SKILLBRIDGE_APROX_FOLGA', 0.5))
+# Com menos candidatos que isso, avaliar todas as árvores direto sai mais barato que outro estágio
+MIN_CANDIDATOS_ESTAGIO = 500
+
+def pontuar_aproximado(modelo, features, quantidade, folga):
+    """
+    Como pontuar_candidatos (um perfil), mas avaliando a floresta de regressão
+    em estágios de ESTAGIOS_APROXIMADO árvores.
+
+    Os cursos alinhados com a carreira, quando preenchem o top, são pontuados
+    primeiro e os demais podados pelo teto, como em pontuar_candidatos; os
+    vetores que já estão na memória de previsões entram com o score exato sem
+    passar pelas árvores. Para os demais, após cada estágio o score final fica num intervalo: soma parcial
+    mais a menor/maior soma possível das árvores restantes, estreitado para
+    média parcial ± `folga`, com as regras de negócio aplicadas e o teto de
+    10. Cursos cujo limite superior não alcança o k-ésimo maior limite
+    inferior (contando os scores já exatos) são descartados sem passar pelas
+    árvores restantes. Os que sobram continuam a soma parcial só com as
+    árvores que faltam, na mesma ordem de predict, então os scores do top são
+    exatos; só pode faltar no top um curso descartado por engano. Com
+    folga=inf a poda usa só os limites garantidos e o resultado é o exato.
+    """
+    n = len(features['match_carreira'])
+    if not isinstance(quantidade, int) or not 0 < quantidade < n:
+        return pontuar_candidatos(modelo, features, quantidade)
+
+    alinhado = features['match_carreira'] == 1
+    if alinhado.sum() >= quantidade:
+        linhas1 = np.flatnonzero(alinhado)
+        scores1 = pontuar_lote(modelo, features, linhas1)
+        vivos = np.flatnonzero(~alinhado)
+    else:
+        linhas1, scores1 = np.zeros(0, dtype=np.intp), []
+        vivos = np.arange(n)
+
+    exatos = np.array(scores1, dtype=np.float64)
+    if len(exatos) >= quantidade:
+        # Estágio 0, sem árvores: o teto de cada curso contra o k-ésimo dos alinhados
+        sub = {k: v[vivos] for k, v in features.items()}
+        tetos = aplicar_regras_negocio_lote(np.full(len(vivos), modelo.teto_score_base), sub)
+        vivos = vivos[tetos >= np.partition(exatos, len(exatos) - quantidade)[len(exatos) - quantidade] - 0.01]
+
+    # Vetores já previstos não precisam de estágios
+    X = matriz_features({k: v[vivos] for k, v in features.items()}, modelo.colunas_memo)
+    guardados = modelo.memo.guardados(X, SCORE_BASE)
+    conhecidos = ~np.isnan(guardados)
+    if conhecidos.any():
+        linhas_memo = vivos[conhecidos]
+        scores_memo = scores_finais(guardados[conhecidos], {k: v[linhas_memo] for k, v in features.items()})
+        linhas1 = np.concatenate([linhas1, linhas_memo])
+        scores1 = scores1 + scores_memo
+        vivos, X = vivos[~conhecidos], X[~conhecidos]
+    exatos = np.array(scores1, dtype=np.float64)
+    X_reg = X[:, modelo.posicoes_memo['regressao']]
+
+    soma = np.zeros(len(vivos))
+    feitas = 0
+    for fim in ESTAGIOS_APROXIMADO:
+        if fim >= modelo.n_arvores or len(vivos) < MIN_CANDIDATOS_ESTAGIO or len(vivos) + len(exatos) <= quantidade:
+            break
+        if fim <= feitas:
+            continue
+        with metricas.etapa('regressao_parcial'):
+            soma = soma_arvores(modelo.regressao, X_reg, feitas, fim, soma)
+        feitas = fim
+        alto = np.minimum((soma + modelo.resto_maximo[fim]) / modelo.n_arvores, soma / feitas + folga)
+        baixo = np.maximum((soma + modelo.resto_minimo[fim]) / modelo.n_arvores, soma / feitas - folga)
+        # A média parcial pode cair abaixo do limite garantido: sem isso o
+        # intervalo inverte e a poda pode deixar menos de `quantidade` cursos
+        baixo = np.minimum(baixo, alto)
+        sub = {k: v[vivos] for k, v in features.items()}
+        alto = np.minimum(aplicar_regras_negocio_lote(np.clip(alto, 0, 10), sub), 10)
+        baixo = np.minimum(aplicar_regras_negocio_lote(np.clip(baixo, 0, 10), sub), 10)
+        limites = np.concatenate([exatos, baixo])
+        kesimo = np.partition(limites, len(limites) - quantidade)[len(limites) - quantidade]
+        # Mesma margem de arredondamento de pontuar_candidatos. Como baixo <= alto
+        # e as regras preservam a ordem, as `quantidade` linhas que definem o
+        # k-ésimo continuam vivas (ou já são exatas).
+        manter = alto >= kesimo - 0.01
+        vivos, soma, X, X_reg = vivos[manter], soma[manter], X[manter], X_reg[manter]
+
+    scores = [None] * n
+    for i, s in zip(linhas1.tolist(), scores1):
+        scores[i] = s
+    if len(vivos):
+        # Os sobreviventes continuam a soma parcial com as árvores restantes
+        def prever(linhas):
+            with metricas.etapa('regressao'):
+                total = soma_arvores(modelo.regressao, X_reg[linhas], feitas, modelo.n_arvores, soma[linhas])
+            return np.clip(total / modelo.n_arvores, 0, 10)
+        sub = {k: v[vivos] for k, v in features.items()}
+        for i, s in zip(vivos.tolist(), scores_finais(modelo.memo.consultar(X, SCORE_BASE, prever), sub)):
+            scores[i] = s
+    return scores, np.array([-np.inf if s is None else s for s in scores], dtype=np.float64)
+
+def pontuar(modelo, features, quantidade, folga=None):
+    """pontuar_candidatos, ou pontuar_aproximado quando há uma folga."""
+    if folga is None:
+        return pontuar_candidatos(modelo, features, quantidade)
+    return pontuar_aproximado(modelo, features, quantidade, folga)
+
+@metricas.cronometrar('ordenacao')
+def selecionar_top(chave, quantidade):
+    """
+    Índices dos `quantidade` maiores valores de `chave` em ordem decrescente,
+    com empates pela menor posição: o mesmo que argsort estável + [:quantidade],
+    mas em O(n + k log k) com np.partition em vez de ordenar tudo.
+    """
+    n = len(chave)
+    if not isinstance(quantidade, int) or not 0 < quantidade < n:
+        return np.argsort(-chave, kind='stable')[:quantidade]
+    limite = np.partition(chave, n - quantidade)[n - quantidade]
+    acima = np.flatnonzero(chave > limite)
+    empates = np.flatnonzero(chave == limite)[:quantidade - len(acima)]
+    selecionados = np.sort(np.concatenate([acima, empates]))
+    return selecionados[np.argsort(-chave[selecionados], kind='stable')]
+
+BLOCO_CURSOS = int(os.environ.get('SKILLBRIDGE_BLOCO_CURSOS', 50000))
+
+def ranquear_top(usuario, cursos, quantidade, colunas=None, folga=None, modelo=None):
+    """
+    Seleciona o top sem montar nada por curso. Retorna (ordem, scores): os
+    índices dos cursos do top em ordem de rank e o score de cada um.
+    Com `folga` usa o ranking aproximado (pontuar_aproximado). `modelo` é a
+    VersaoModelo que pontua (padrão: a ativa do registro).
+
+    Catálogos maiores que BLOCO_CURSOS são pontuados em blocos, mantendo só o
+    top parcial entre um bloco e outro, então a memória de features fica
+    limitada ao bloco. A poda por bloco é válida: um curso descartado tem
+    `quantidade` cursos melhores no próprio bloco.
+    """
+    if colunas is None:
+        colunas = colunas_cursos(cursos)
+    if modelo is None:
+        modelo = registro.ativa
+    n = len(cursos)
+    if not isinstance(quantidade, int) or quantidade <= 0 or n <= BLOCO_CURSOS:
+        features = criar_features_perfis([usuario], colunas)
+        scores, chave = pontuar(modelo, features, quantidade, folga)
+        ordem = selecionar_top(chave, quantidade)
+        return ordem, [scores[i] for i in ordem.tolist()]
+
+    melhores = np.zeros(0, dtype=np.intp)
+    melhores_scores = []
+    for inicio in range(0, n, BLOCO_CURSOS):
+        bloco = {k: v[inicio:inicio + BLOCO_CURSOS] for k, v in colunas.items()}
+        scores, chave = pontuar(modelo, criar_features_perfis([usuario], bloco), quantidade, folga)
+        top_bloco = selecionar_top(chave, quantidade)
+
+        # Junta com o top anterior (índices menores vêm antes, mantendo o desempate)
+        indices = np.concatenate([melhores, top_bloco + inicio])
+        todos = melhores_scores + [scores[i] for i in top_bloco.tolist()]
+        escolha = selecionar_top(np.array(todos, dtype=np.float64), quantidade)
+        melhores = indices[escolha]
+        melhores_scores = [todos[i] for i in escolha.tolist()]
+    return melhores, melhores_scores
+
+def gerar_recomendacoes(usuario, cursos, quantidade, colunas=None, folga=None, modelo=None):
+    """
+    Pontua e seleciona o top na hora (erros aparecem aqui) e retorna um
+    gerador que monta as recomendações, já com rank, uma por vez.
+    A probabilidade de conclusão só é calculada para os cursos do top.
+    """
+    if colunas is None:
+        colunas = colunas_cursos(cursos)
+    if modelo is None:
+        modelo = registro.ativa
+    ordem, scores = ranquear_top(usuario, cursos, quantidade, colunas, folga, modelo)
+
+    top_features = criar_features_perfis([usuario], {k: v[ordem] for k, v in colunas.items()})
+    probs = prever_probs(modelo, top_features)
+    flags = flags_motivo_lote(top_features, probs)
+
+    return (montar_recomendacao(cursos[i], scores[j], float(probs[j]),
+                                texto_motivo(flags[j], top_features['avaliacao_media'][j]), j + 1, modelo.nome)
+            for j, i in enumerate(ordem.tolist()))
+
+def ranquear_cursos(usuario, cursos, quantidade, colunas=None, folga=None, modelo=None):
+    """Lista com as `quantidade` melhores recomendações (ver gerar_recomendacoes)."""
+    return list(gerar_recomendacoes(usuario, cursos, quantidade, colunas, folga, modelo))
+
+def montar_recomendacao(curso, score, prob, motivo, rank, versao_modelo):
     return {
-        'nivel_experiencia_num': nivel_exp, 'tempo_disponivel_semanal': tempo_semanal,
-        'idade': perfil.get('idade', 25), 'anos_experiencia': perfil.get('anos_experiencia', 0),
-        'escolaridade_num': escolaridade, 'nivel_curso_num': nivel_curso,
-        'carga_horaria': curso.get('carga_horaria', 10.0),
-        'avaliacao_media': curso.get('avaliacao_media', 4.0),
-        'taxa_conclusao_media': curso.get('taxa_conclusao_media', 80.0),
-        'popularidade_score': curso.get('popularidade_score', 50.0),
-        'match_nivel': match_nivel, 'match_tempo': match_tempo,
-        'match_carreira': match_carreira, 'progresso': 0.0
+        'curso': {
+            'id_curso': curso.get('id_curso') or curso.get('id'),
+            'nome': curso.get('nome'),
+            'descricao': curso.get('descricao', ''),
+            'area': curso.get('area', 'Tecnologia'),
+            'nivel': curso.get('nivel'),
+            'carga_horaria': curso.get('carga_horaria'),
+            'avaliacao_media': curso.get('avaliacao_media'),
+            'taxa_conclusao_media': curso.get('taxa_conclusao_media', 80.0),
+            'popularidade_score': curso.get('popularidade_score', 50.0)
+        },
+        'score_relevancia': score,
+        'probabilidade_conclusao': round(prob, 2),
+        'motivo': motivo,
+        'modelo_ia': 'RandomForest + Business Rules',
+        'versao_modelo': versao_modelo,
+        'rank': rank
     }
 
-def aplicar_regras_negocio(score_base, features, perfil, curso):
+# ====== RECOMENDAÇÃO EM LOTE (vários perfis) ======
+
+LINHAS_POR_BLOCO = int(os.environ.get('SKILLBRIDGE_LINHAS_POR_BLOCO', 200000))
+
+def ranquear_lote(perfis, cursos, quantidade, colunas=None, linhas_por_bloco=LINHAS_POR_BLOCO, modelo=None):
     """
-    Camada de regras de negócio para ajustar score do modelo.
-    Garante que recomendações façam sentido do ponto de vista de UX.
+    Gera (indice_do_perfil, top) para cada perfil, na ordem recebida.
+
+    Os perfis são processados em blocos de até `linhas_por_bloco` pares
+    (perfil, curso): uma matriz de features, uma chamada ao modelo de
+    regressão e uma ao de classificação (só para as linhas do top) por bloco,
+    o que limita a memória independentemente do número de perfis. A poda de
+    pontuar_candidatos é feita por perfil, como em ranquear_cursos.
     """
-    score = score_base
-    nivel_usuario = NIVEL_EXP_MAP.get(perfil.get('nivel_experiencia', 'Junior'), 1)
-    nivel_curso = NIVEL_CURSO_MAP.get(curso.get('nivel', 'BASICO'), 1)
+    if colunas is None:
+        colunas = colunas_cursos(cursos)
+    if modelo is None:
+        modelo = registro.ativa
+    n_cursos = len(cursos)
+    perfis_por_bloco = max(1, linhas_por_bloco // max(1, n_cursos))
+
+    for inicio in range(0, len(perfis), perfis_por_bloco):
+        bloco = perfis[inicio:inicio + perfis_por_bloco]
+        features = criar_features_perfis(bloco, colunas)
+        lista_scores, chave = pontuar_candidatos(modelo, features, quantidade, len(bloco))
+
+        # Ordenação estável por perfil, igual a ranquear_cursos
+        ordens = [selecionar_top(linha, quantidade) for linha in chave.reshape(len(bloco), n_cursos)]
+        linhas = np.concatenate([u * n_cursos + o for u, o in enumerate(ordens)]).astype(np.intp)
+
+        top_features = {k: v[linhas] for k, v in features.items()}
+        probs = prever_probs(modelo, top_features)
+        flags = flags_motivo_lote(top_features, probs)
+
+        j = 0
+        for u, ordem in enumerate(ordens):
+            top = []
+            for rank, c in enumerate(ordem.tolist(), 1):
+                top.append(montar_recomendacao(cursos[c], lista_scores[u * n_cursos + c], float(probs[j]),
+                                               texto_motivo(flags[j], top_features['avaliacao_media'][j]), rank,
+                                               modelo.nome))
+                j += 1
+            yield inicio + u, top
+
+# ====== REAVALIAÇÃO INCREMENTAL (sessão por usuario_id) ======
+
+sessoes = SessoesIncrementais(
+    max_bytes=int(float(os.environ.get('SKILLBRIDGE_SESSOES_MB', 64)) * 2 ** 20),
+    ttl=float(os.environ.get('SKILLBRIDGE_SESSOES_TTL', 900)))
+
+def linhas_alteradas(antigas, novas, colunas, limiares):
+    """
+    Máscara das linhas em que alguma feature de `colunas` mudou de intervalo
+    entre thresholds do modelo. Só as colunas com valores diferentes (as
+    afetadas pela mudança de perfil ou de curso) são comparadas por faixa.
+    """
+    mudou = np.zeros(len(antigas[colunas[0]]), dtype=bool)
+    for j, coluna in enumerate(colunas):
+        diferentes = np.flatnonzero(antigas[coluna] != novas[coluna])
+        if len(diferentes):
+            mudou[diferentes] |= (faixa_limiares(antigas[coluna][diferentes], limiares[j])
+                                  != faixa_limiares(novas[coluna][diferentes], limiares[j]))
+    return mudou
+
+def ranquear_incremental(usuario_id, usuario, cursos, quantidade, colunas, modelo=None):
+    """
+    Mesmo resultado de ranquear_cursos, reaproveitando a sessão do usuário:
+    cursos já vistos (mesmo id) cujas features não mudaram de intervalo para
+    o modelo mantêm o score_base e a probabilidade anteriores; só as outras
+    linhas passam pela floresta. A primeira chamada pontua todos os cursos
+    (sem a poda de pontuar_candidatos), para a sessão ter todas as linhas.
+    A previsão de uma linha só muda se algum valor cruzar um threshold da
+    floresta (VersaoModelo.limiares_*).
+    """
+    if modelo is None:
+        modelo = registro.ativa
+    colunas_reg = modelo.features['regressao']
+    colunas_class = modelo.features['classificacao']
+    # Compara as features dos dois modelos (não há garantia de que uma lista contenha a outra)
+    colunas_modelos = colunas_class + [c for c in colunas_reg if c not in colunas_class]
+    features = criar_features_perfis([usuario], colunas)
+    n = len(cursos)
+    
+    scores_base = np.empty(n)
+    probs = np.full(n, np.nan)
+    prever = np.ones(n, dtype=bool)
+    sessao = sessoes.retirar(usuario_id)
+    if sessao is not None:
+        anteriores = np.array([sessao.posicoes.get(i, -1) for i in colunas['id_curso'].tolist()], dtype=np.intp)
+        atuais = np.flatnonzero(anteriores >= 0)
+        anteriores = anteriores[atuais]
+        if len(atuais):
+            f_antigas = {k: sessao.features[k][anteriores] for k in colunas_modelos}
+            f_novas = {k: features[k][atuais] for k in colunas_modelos}
+            prever[atuais] = linhas_alteradas(f_antigas, f_novas, colunas_reg, modelo.limiares_regressao)
+            scores_base[atuais] = sessao.scores_base[anteriores]
+            probs[atuais] = np.where(linhas_alteradas(f_antigas, f_novas, colunas_class, modelo.limiares_classificacao),
+                                     np.nan, sessao.probs[anteriores])
+    
+    linhas = np.flatnonzero(prever)
+    if len(linhas):
+        scores_base[linhas] = prever_scores_base(modelo, {k: v[linhas] for k, v in features.items()})
     
-    # PENALIZAÇÕES POR MISMATCH DE NÍVEL
-    diff_nivel = nivel_curso - nivel_usuario
+    scores = [round(max(0, min(10, s)), 2)
+              for s in aplicar_regras_negocio_lote(scores_base, features).tolist()]
+    ordem = selecionar_top(np.array(scores, dtype=np.float64), quantidade)
     
-    if diff_nivel >= 2:  # Curso muito avançado (ex: Junior tentando Avançado)
-        score *= 0.3
-    elif diff_nivel == 1 and nivel_usuario == 1:  # Junior tentando Intermediário
-        score *= 0.7
-    elif diff_nivel <= -2:  # Curso muito básico (ex: Senior fazendo Básico)
-        score *= 0.4
-    elif diff_nivel == -1 and nivel_usuario == 3:  # Senior fazendo Intermediário
-        score *= 0.7
+    # Probabilidade só para os cursos do top que ainda não têm uma válida
+    faltam = ordem[np.isnan(probs[ordem])]
+    if len(faltam):
+        probs[faltam] = prever_probs(modelo, {k: v[faltam] for k, v in features.items()})
     
-    # BOOST PARA MATCH DE CARREIRA
-    if features['match_carreira'] == 1:
-        score *= 1.4  # +40% se alinhado com carreira
+    top_features = {k: v[ordem] for k, v in features.items()}
+    flags = flags_motivo_lote(top_features, probs[ordem])
+    top = [montar_recomendacao(cursos[i], scores[i], float(probs[i]),
+                               texto_motivo(flags[j], top_features['avaliacao_media'][j]), j + 1, modelo.nome)
+           for j, i in enumerate(ordem.tolist())]
+    
+    sessoes.guardar(usuario_id, Sessao(colunas['id_curso'].tolist(), features, scores_base, probs),
+                    len(linhas), n - len(linhas))
+    return top
+
+# ====== CATÁLOGO NO SERVIDOR ======
+
+catalogo = Catalogo(os.environ.get('SKILLBRIDGE_CATALOGO', 'catalogo_cursos.json'),
+                    normalizar_curso_java, colunas_cursos)
+catalogo.carregar()
+
+ADMIN_TOKEN = os.environ.get('SKILLBRIDGE_ADMIN_TOKEN') or None
+# Sem token os endpoints /admin ficam fechados; =1 os libera (só para desenvolvimento local)
+ADMIN_SEM_TOKEN = os.environ.get('SKILLBRIDGE_ADMIN_SEM_TOKEN') == '1'
+# Único diretório de onde /admin/modelos/carregar aceita versões (saída de treinar_modelos.py)
+RAIZ_MODELOS = os.path.realpath(os.environ.get('SKILLBRIDGE_MODELOS_RAIZ', 'modelos'))
+
+class RequisicaoInvalida(ValueError):
+    """Campo da requisição com valor inválido (responde 400)."""
+
+def corpo_json():
+    """
+    Body da requisição como dict. JSON malformado (inclusive NaN/Infinity,
+    que o orjson recusa), content-type errado ou um body que não é objeto
+    viram RequisicaoInvalida.
+    """
+    try:
+        data = request.get_json()
+    except UnsupportedMediaType:
+        raise RequisicaoInvalida('Content-Type deve ser application/json') from None
+    except BadRequest:
+        raise RequisicaoInvalida('Body não é um JSON válido') from None
+    if not isinstance(data, dict):
+        raise RequisicaoInvalida('O body deve ser um objeto JSON')
+    return data
+
+# ====== BASE DE USUÁRIOS (colunar, memory-mapped) ======
+
+# Gerada por `python base_colunar.py`; sem ela o body precisa trazer o perfil
+_base_usuarios_dir = os.environ.get('SKILLBRIDGE_BASE_USUARIOS', 'base_colunar/usuarios')
+base_usuarios = None
+if os.path.isfile(os.path.join(_base_usuarios_dir, 'meta.json')):
+    base_usuarios = TabelaColunar(_base_usuarios_dir)
+    if 'id_usuario' not in base_usuarios.meta['indices']:
+        logger.warning("Base de usuários %s sem índice de id_usuario, ignorada", _base_usuarios_dir)
+        base_usuarios = None
     else:
-        score *= 0.6  # -40% se não alinhado
+        logger.info("✓ Base de usuários: %d perfis (%s)", len(base_usuarios), _base_usuarios_dir)
+
+# Colunas de usuarios.csv que formam o perfil interno
+COLUNAS_PERFIL = ('carreira_desejada', 'nivel_experiencia', 'escolaridade',
+                  'tempo_disponivel_semanal', 'idade', 'anos_experiencia')
+
+class UsuarioNaoEncontrado(LookupError):
+    """usuario_id sem perfil no body e fora da base de usuários (resposta 404)."""
+
+def perfil_armazenado(usuario_id):
+    """Perfil interno do usuário na base colunar (busca pelo índice, sem ler o arquivo), ou None."""
+    if base_usuarios is None:
+        return None
+    return base_usuarios.primeiro('id_usuario', usuario_id, COLUNAS_PERFIL)
+
+# ====== CACHE DE RECOMENDAÇÕES POR PERFIL ======
+
+_max_itens_cache = int(os.environ.get('SKILLBRIDGE_CACHE_ITENS', 10000))
+_sqlite_cache = os.environ.get('SKILLBRIDGE_CACHE_SQLITE')
+cache = CacheRecomendacoes(
+    max_itens=_max_itens_cache,
+    ttl=float(os.environ.get('SKILLBRIDGE_CACHE_TTL', 300)),
+    backend=BackendSqlite(_sqlite_cache, _max_itens_cache) if _sqlite_cache else None)
+
+def _modelos_trocados():
+    """Cache e sessões guardam scores de uma versão: descartados a cada troca no registro."""
+    cache.invalidar()
+    sessoes.invalidar()
+
+registro.ao_trocar = _modelos_trocados
+
+# Estado do registro compartilhado pelos workers: /admin/modelos grava, cada
+# worker confere antes das requisições (no máximo uma vez por intervalo) e
+# troca de versão sozinho. Um estado já gravado vale desde a inicialização.
+registro.estado = EstadoRegistro(
+    os.environ.get('SKILLBRIDGE_REGISTRO_ESTADO') or os.path.join(RAIZ_MODELOS, 'registro.json'))
+registro.intervalo = float(os.environ.get('SKILLBRIDGE_REGISTRO_INTERVALO', 1.0))
+registro.verificar(forcar=True, esperar=True)
+
+def registrar_versao(modelo, inicio, recomendacoes):
+    """Latência do ranking e scores servidos por `modelo` (por versão, em /metrics e /admin/modelos)."""
+    segundos = time.perf_counter() - inicio
+    metricas.observar('modelo_segundos', segundos, versao=modelo.nome)
+    registro.registrar(modelo.nome, segundos, [r['score_relevancia'] for r in recomendacoes])
+
+def registrar_stream(modelo, inicio, recomendacoes):
+    """registrar_versao para um gerador: conta cada recomendação conforme é enviada."""
+    enviadas = []
+    for rec in recomendacoes:
+        enviadas.append(rec)
+        yield rec
+    registrar_versao(modelo, inicio, enviadas)
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return valor
+
+def perfil_normalizado(perfil):
+    """Perfil reduzido ao que criar_features realmente usa."""
+    return [
+        NIVEL_EXP_MAP.get(perfil.get('nivel_experiencia', 'Junior'), 1),
+        ESCOLARIDADE_MAP.get(perfil.get('escolaridade', 'Superior Completo'), 5),
+        _numero(perfil.get('tempo_disponivel_semanal', 5.0)),
+        _numero(perfil.get('idade', 25)),
+        _numero(perfil.get('anos_experiencia', 0)),
+        perfil.get('carreira_desejada', '')
+    ]
+
+def interpretar_requisicao(data):
+    """
+    Detecta o formato do body de /recomendar e retorna
+    (formato, usuario, cursos, quantidade), com formato 'java', 'base' ou
+    'frontend' e o perfil já no formato interno. Os cursos voltam como
+    recebidos, para decodificar_cursos.
     
-    # BOOST PARA MATCH DE TEMPO
-    if features['match_tempo'] == 1:
-        score *= 1.1  # +10% se tem tempo disponível
+    Com "perfil_armazenado": true, o perfil é o do usuario_id na base de
+    usuários: formato 'base', com os campos do Java (top_n);
+    UsuarioNaoEncontrado se o id não estiver lá. Sem a opção, um body só
+    com usuario_id continua no formato Frontend (perfil padrão).
+    """
+    armazenado = data.get('perfil_armazenado', False)
+    if not isinstance(armazenado, bool):
+        raise RequisicaoInvalida('perfil_armazenado deve ser true ou false')
+    if armazenado:
+        # PERFIL DA BASE DE USUÁRIOS
+        if base_usuarios is None:
+            raise RequisicaoInvalida('perfil_armazenado requer a base de usuários (python base_colunar.py)')
+        usuario = perfil_armazenado(data.get('usuario_id'))
+        if usuario is None:
+            raise UsuarioNaoEncontrado(f"Usuário {data.get('usuario_id')} não encontrado na base")
+        return 'base', usuario, data.get('cursos', []), data.get('top_n', 10)
     
-    # BOOST PARA CURSOS BEM AVALIADOS
-    if features['avaliacao_media'] >= 4.7:
-        score *= 1.1  # +10% para cursos excelentes
+    if 'perfil' in data and 'usuario_id' in data:
+        # FORMATO JAVA
+        logger.debug("🔵 Requisição do Java detectada")
+        
+        perfil_java = data.get('perfil', {})
+        cursos = data.get('cursos', [])
+        quantidade = data.get('top_n', 10)
+        
+        # Mapear perfil Java para formato interno
+        usuario = normalizar_perfil_java(perfil_java)
+        
+    else:
+        # FORMATO FRONTEND
+        logger.debug("🟢 Requisição do Frontend detectada")
+        usuario = data.get('usuario', {})
+        cursos = data.get('cursos', [])
+        quantidade = data.get('quantidade', 10)
+        return 'frontend', usuario, cursos, quantidade
     
-    return max(0, min(10, score))
+    return 'java', usuario, cursos, quantidade
+
+def folga_requisicao(data):
+    """
+    Folga do ranking aproximado pedida no body: "aproximado": true usa
+    FOLGA_APROXIMADO, um número usa esse valor; ausente ou false é o exato (None).
+    Outros valores (texto, nan, infinito) levantam RequisicaoInvalida.
+    """
+    aproximado = data.get('aproximado')
+    if aproximado is None or aproximado is False:
+        return None
+    if aproximado is True:
+        return FOLGA_APROXIMADO
+    try:
+        folga = float(aproximado)
+    except (TypeError, ValueError):
+        folga = float('nan')
+    if not np.isfinite(folga):
+        raise RequisicaoInvalida('aproximado deve ser true, false ou um número finito')
+    return max(0.0, folga)
+
+def admin_autorizado(exigir_token=False):
+    """
+    Header X-Admin-Token igual a SKILLBRIDGE_ADMIN_TOKEN (comparação em tempo
+    constante). Sem token configurado, só com SKILLBRIDGE_ADMIN_SEM_TOKEN=1 e
+    sem `exigir_token`.
+    """
+    if ADMIN_TOKEN is None:
+        return ADMIN_SEM_TOKEN and not exigir_token
+    recebido = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(recebido.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+# ====== MÉTRICAS E PROFILER ======
+
+# Profiler por amostragem opcional: SKILLBRIDGE_PROFILER_HZ=100 amostra as pilhas 100x/s
+_profiler_hz = float(os.environ.get('SKILLBRIDGE_PROFILER_HZ', 0))
+amostrador = AmostradorPilhas(_profiler_hz) if _profiler_hz > 0 else None
+
+@app.before_request
+def iniciar_medicao():
+    g.inicio = time.perf_counter()
+    registro.verificar()
+    if amostrador is not None:
+        amostrador.garantir()
+
+@app.after_request
+def registrar_medicao(resposta):
+    rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+    metricas.observar('requisicao_segundos', time.perf_counter() - g.inicio, rota=rota)
+    metricas.incrementar('requisicoes_total', rota=rota, status=resposta.status_code)
+    if 'formato' in g:
+        metricas.incrementar('recomendacoes_total', formato=g.formato, catalogo=g.get('faixa_catalogo', 'nenhum'))
+    return resposta
+
+def medidores_processo():
+    """Gauges calculados na hora da coleta do /metrics."""
+    estatisticas = cache.estatisticas()
+    estatisticas_memo = registro.ativa.memo.estatisticas()
+    memoria = memoria_processo()
+    return {
+        'catalogo_cursos': len(catalogo),
+        'catalogo_versao': catalogo.versao,
+        'cache_itens': estatisticas['itens'],
+        'cache_hits': estatisticas['hits'],
+        'cache_misses': estatisticas['misses'],
+        'sessoes_memoria_mb': round(sessoes.bytes / 2 ** 20, 2),
+        'memo_itens': estatisticas_memo['itens'],
+        'memo_economia': estatisticas_memo['economia_total'],
+        'memoria_rss_mb': memoria['rss_mb'],
+        'memoria_pss_mb': memoria['pss_mb']
+    }
 
-def gerar_motivo(features, prob):
-    m = []
-    if features['match_carreira'] == 1: m.append("Alinhado com sua carreira")
-    if features['match_nivel'] == 1: m.append("Nível adequado")
-    if features['match_tempo'] == 1: m.append("Carga horária compatível")
-    if features['avaliacao_media'] >= 4.5: m.append(f"Bem avaliado ({features['avaliacao_media']:.1f}/5)")
-    if prob >= 0.7: m.append("Alta chance de conclusão")
-    return ". ".join(m) + "." if m else "Recomendado para você"
+TEMPO_INICIALIZACAO_MS = round((time.perf_counter() - _inicio_importacao) * 1000, 1)
+logger.info(f"✓ API pronta em {TEMPO_INICIALIZACAO_MS} ms ({resumo_memoria()})")
 
 @app.route('/', methods=['GET'])
 def home():
     return jsonify({'api': 'SkillBridge', 'versao': '2.0', 'status': 'online'})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas do processo no formato texto do Prometheus."""
+    return Response(metricas.formato_prometheus(medidores_processo()),
+                    mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiler', methods=['GET'])
+def profiler():
+    """
+    Pilhas amostradas no formato collapsed (flamegraph.pl / speedscope).
+    Só existe com SKILLBRIDGE_PROFILER_HZ; ?limpar=1 zera as amostras depois de ler.
+    """
+    if not admin_autorizado():
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+    if amostrador is None:
+        return jsonify({'sucesso': False, 'erro': 'Profiler desativado (SKILLBRIDGE_PROFILER_HZ)'}), 404
+    texto = amostrador.collapsed()
+    if request.args.get('limpar'):
+        amostrador.limpar()
+    return Response(texto, mimetype='text/plain')
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy', 'modelos': True})
+    return jsonify({'status': 'healthy', 'modelos': True,
+                    'catalogo': {'versao': catalogo.versao, 'cursos': len(catalogo)},
+                    'cache': cache.estatisticas(),
+                    'sessoes': sessoes.estatisticas(),
+                    'memo_previsoes': registro.ativa.memo.estatisticas(),
+                    'base_usuarios': len(base_usuarios) if base_usuarios is not None else None,
+                    'registro_modelos': {'ativa': registro.ativa.nome,
+                                         'candidata': registro.candidata.nome if registro.candidata else None,
+                                         'fracao_candidata': registro.fracao},
+                    'processo': dict(memoria_processo(), pid=os.getpid())})
+
+@app.route('/admin/catalogo/recarregar', methods=['POST'])
+def recarregar_catalogo():
+    """Relê o arquivo do catálogo (SKILLBRIDGE_CATALOGO)."""
+    if not admin_autorizado():
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+    try:
+        total = catalogo.carregar()
+        cache.invalidar()
+    except Exception as e:
+        logger.error(f"Erro ao recarregar catálogo: {e}")
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+    return jsonify({'sucesso': True, 'versao': catalogo.versao, 'cursos': total})
+
+@app.route('/admin/catalogo', methods=['PUT'])
+def upsert_catalogo():
+    """
+    Insere ou atualiza cursos no catálogo (apenas em memória).
+    Body: {"cursos": [{...}]} no formato Java ou snake_case.
+    """
+    if not admin_autorizado():
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+    cursos = (request.get_json(silent=True) or {}).get('cursos') or []
+    if not isinstance(cursos, list):
+        return jsonify({'sucesso': False, 'erro': '"cursos" deve ser uma lista'}), 400
+    if not cursos:
+        return jsonify({'sucesso': False, 'erro': 'Lista de cursos vazia'}), 400
+    try:
+        inseridos, atualizados = catalogo.upsert(cursos)
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 400
+    cache.invalidar()
+    return jsonify({'sucesso': True, 'versao': catalogo.versao,
+                    'inseridos': inseridos, 'atualizados': atualizados})
+
+@app.route('/admin/modelos', methods=['GET'])
+def modelos_em_servico():
+    """Versões em serviço, estado da última carga e latência/scores por versão."""
+    if not admin_autorizado():
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+    return jsonify(registro.estatisticas())
+
+class SemCandidata(LookupError):
+    """Mudança na candidata sem haver candidata no estado do registro (responde 404)."""
+
+def publicar_registro(mudar):
+    """Grava a mudança no estado compartilhado; cada worker a aplica na próxima verificação."""
+    estado = registro.publicar(mudar)
+    return {'sucesso': True, 'estado': estado, 'carga': registro.carga}
+
+@app.route('/admin/modelos/carregar', methods=['POST'])
+def carregar_modelos_versao():
+    """
+    Carrega uma versão em segundo plano (aquecida antes de entrar em serviço).
+    Body: {"diretorio": "modelos/<versao>", "versao": "...", "candidata": true, "fracao": 0.1}
+    Sem "candidata" a versão substitui a ativa; "versao" é opcional
+    (padrão: a de metricas_modelos.json). O andamento aparece em GET /admin/modelos.
+    A mudança vai para o estado compartilhado e vale para todos os workers.
+    
+    Exige o token mesmo com SKILLBRIDGE_ADMIN_SEM_TOKEN, e o diretório precisa
+    estar dentro de SKILLBRIDGE_MODELOS_RAIZ (padrão modelos/).
+    """
+    if not admin_autorizado(exigir_token=True):
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+    data = request.get_json(silent=True) or {}
+    diretorio = data.get('diretorio')
+    if not isinstance(diretorio, str) or not diretorio:
+        return jsonify({'sucesso': False, 'erro': 'diretorio é obrigatório'}), 400
+    # Caminho real (sem .. nem links simbólicos) precisa ficar abaixo da raiz das versões
+    real = os.path.realpath(diretorio)
+    if os.path.commonpath([real, RAIZ_MODELOS]) != RAIZ_MODELOS or real == RAIZ_MODELOS:
+        return jsonify({'sucesso': False, 'erro': f'Diretório fora de {RAIZ_MODELOS}: {diretorio}'}), 400
+    if not os.path.isdir(real):
+        return jsonify({'sucesso': False, 'erro': f'Diretório não encontrado: {diretorio}'}), 400
+    try:
+        fracao = min(1.0, max(0.0, float(data.get('fracao', 0.0))))
+    except (TypeError, ValueError):
+        return jsonify({'sucesso': False, 'erro': 'fracao deve ser um número entre 0 e 1'}), 400
+    versao = data.get('versao')
+    if versao is not None and not isinstance(versao, str):
+        return jsonify({'sucesso': False, 'erro': 'versao deve ser texto'}), 400
+    nova = {'diretorio': real, 'versao': versao}
+
+    def mudar(estado):
+        if data.get('candidata'):
+            if estado['ativa']['diretorio'] == real:
+                raise ValueError(f'A versão de {diretorio} já é a ativa')
+            return dict(estado, candidata=nova, fracao=fracao)
+        # A candidata continua, a não ser que seja a própria versão que virou ativa
+        candidata = estado.get('candidata')
+        if candidata is not None and candidata['diretorio'] == real:
+            return dict(estado, ativa=nova, candidata=None, fracao=0.0)
+        return dict(estado, ativa=nova)
+
+    try:
+        return jsonify(publicar_registro(mudar)), 202
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 400
+
+@app.route('/admin/modelos/promover', methods=['POST'])
+def promover_candidata():
+    """A versão candidata passa a atender todo o tráfego (em todos os workers)."""
+    if not admin_autorizado():
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+
+    def mudar(estado):
+        if not estado.get('candidata'):
+            raise SemCandidata()
+        return dict(estado, ativa=estado['candidata'], candidata=None, fracao=0.0)
+
+    try:
+        return jsonify(publicar_registro(mudar))
+    except SemCandidata:
+        return jsonify({'sucesso': False, 'erro': 'Nenhuma versão candidata'}), 404
+
+@app.route('/admin/modelos/candidata', methods=['PUT', 'DELETE'])
+def ajustar_candidata():
+    """PUT {"fracao": 0.2} muda a fração do tráfego da candidata; DELETE a tira de serviço."""
+    if not admin_autorizado():
+        return jsonify({'sucesso': False, 'erro': 'Não autorizado'}), 403
+    if request.method == 'DELETE':
+        fracao = 0.0
+    else:
+        try:
+            fracao = min(1.0, max(0.0, float((request.get_json(silent=True) or {})['fracao'])))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'sucesso': False, 'erro': 'fracao deve ser um número entre 0 e 1'}), 400
+
+    def mudar(estado):
+        if not estado.get('candidata'):
+            raise SemCandidata()
+        if request.method == 'DELETE':
+            return dict(estado, candidata=None, fracao=0.0)
+        return dict(estado, fracao=fracao)
+
+    try:
+        return jsonify(publicar_registro(mudar))
+    except SemCandidata:
+        return jsonify({'sucesso': False, 'erro': 'Nenhuma versão candidata'}), 404
 
 @app.route('/recomendar', methods=['POST'])
 def recomendar():
@@ -167,121 +1050,288 @@ def recomendar():
         "cursos": [{...}],
         "quantidade": 10
     }
+    
+    PERFIL DA BASE DE USUÁRIOS (com base_colunar/usuarios gerada):
+    {
+        "usuario_id": 1,
+        "perfil_armazenado": true,
+        "top_n": 10
+    }
+    O perfil vem da base pelo índice de id_usuario; 404 se o id não existir.
+    Sem "perfil_armazenado", um body só com usuario_id usa o perfil padrão.
+    
+    Em todos os formatos "cursos" pode ser omitido: nesse caso os cursos vêm
+    do catálogo do servidor, opcionalmente filtrados por "cursos_ids": [...].
+    
+    Com ?stream=json a mesma resposta é enviada aos poucos, uma recomendação
+    por vez; com ?stream=ndjson cada recomendação é uma linha e a última linha
+    traz usuario_id, timestamp e total_recomendacoes.
+    
+    Com "incremental": true (e usuario_id), a chamada reaproveita a sessão do
+    usuário: só os cursos cujas features mudaram são pontuados de novo (ver
+    ranquear_incremental).
+    
+    Com "aproximado": true (ou a folga, ex.: 0.3) o top é escolhido avaliando
+    as árvores em estágios e descartando cedo os cursos sem chance (ver
+    pontuar_aproximado). O modo incremental tem precedência.
+    
+    O campo versao_modelo de cada recomendação é a versão dos modelos que a
+    pontuou: a ativa do registro ou, no teste A/B, a candidata.
     """
     try:
-        data = request.get_json()
+        with metricas.etapa('json'):
+            data = corpo_json()
+        with metricas.etapa('normalizacao'):
+            g.formato, usuario, cursos, quantidade = interpretar_requisicao(data)
+        usuario_id = data.get('usuario_id')
+        incremental = bool(data.get('incremental')) and usuario_id is not None and sessoes.ativo
+        folga = folga_requisicao(data)
+        # Versão que atende (a candidata do A/B para parte dos usuários), fixa até o fim da requisição
+        modelo = registro.escolher(usuario_id)
+        # Resultados aproximados não se misturam com os exatos no cache
+        versao_cache = modelo.nome if folga is None or incremental else f'{modelo.nome}~{folga}'
         
-        # DETECTAR FORMATO (Java ou Frontend)
-        if 'perfil' in data and 'usuario_id' in data:
-            # FORMATO JAVA
-            logger.info("🔵 Requisição do Java detectada")
+        if not cursos and len(catalogo):
+            # ====== CURSOS DO CATÁLOGO (colunas já pré-calculadas) ======
+            try:
+                cursos_ids = validar_ids(data.get('cursos_ids'))
+            except ValueError as e:
+                raise RequisicaoInvalida(str(e)) from None
+            g.faixa_catalogo = faixa_catalogo(len(cursos_ids) if cursos_ids is not None else len(catalogo))
+            perfil_chave = perfil_normalizado(usuario)
+            chave = chave_perfil(perfil_chave, catalogo.assinatura, versao_cache, cursos_ids, quantidade)
+            top = cache.obter(chave)
             
-            perfil_java = data.get('perfil', {})
-            cursos = data.get('cursos', [])
-            quantidade = data.get('top_n', 10)
+            if top is None:
+                cursos_validos, colunas, assinatura = catalogo.selecionar(cursos_ids)
+                logger.debug("Cursos do catálogo (versão %s): %d", catalogo.versao, len(cursos_validos))
+                
+                if not cursos_validos:
+                    return jsonify({'sucesso': False, 'erro': 'Nenhum curso do catálogo encontrado'}), 400
+                
+                inicio = time.perf_counter()
+                if incremental:
+                    top = ranquear_incremental(usuario_id, usuario, cursos_validos, quantidade, colunas, modelo)
+                else:
+                    top = ranquear_cursos(usuario, cursos_validos, quantidade, colunas, folga, modelo)
+                registrar_versao(modelo, inicio, top)
+                # Chave pela assinatura do snapshot usado (o catálogo pode ter mudado no meio)
+                cache.guardar(chave_perfil(perfil_chave, assinatura, versao_cache, cursos_ids, quantidade), top)
+        else:
+            if not cursos:
+                return jsonify({'sucesso': False, 'erro': 'Lista de cursos vazia'}), 400
             
-            # Mapear perfil Java para formato interno
-            usuario = {
-                'carreira_desejada': perfil_java.get('objetivo_carreira', ''),
-                'nivel_experiencia': perfil_java.get('nivel_experiencia', 'Junior'),
-                'idade': perfil_java.get('idade', 25),
-                'anos_experiencia': perfil_java.get('anos_experiencia_total', 0),
-                'escolaridade': 'Superior Completo',  # Padrão
-                'tempo_disponivel_semanal': float(perfil_java.get('tempo_disponivel_semanal', 5.0))
-            }
+            # Colunas direto dos cursos recebidos (só cursos com ID >= 10000)
+            with metricas.etapa('decodificacao_cursos'):
+                cursos_validos, colunas = decodificar_cursos(cursos, g.formato)
+            g.faixa_catalogo = faixa_catalogo(len(cursos_validos))
             
-            # Mapear cursos Java (camelCase) para snake_case
-            cursos_normalizados = []
-            for c in cursos:
-                curso_norm = {
-                    'id_curso': c.get('id') or c.get('id_curso'),
-                    'nome': c.get('nome'),
-                    'descricao': c.get('descricao'),
-                    'nivel': c.get('nivel'),
-                    'carga_horaria': float(c.get('cargaHoraria') or c.get('carga_horaria') or 10),
-                    'avaliacao_media': float(c.get('avaliacaoMedia') or c.get('avaliacao_media') or 4.0),
-                    'taxa_conclusao_media': float(c.get('taxaConclusaoMedia') or c.get('taxa_conclusao_media') or 80),
-                    'popularidade_score': float(c.get('popularidadeScore') or c.get('popularidade_score') or 50)
-                }
-                cursos_normalizados.append(curso_norm)
+            logger.debug("Total de cursos recebidos: %d", len(cursos))
+            logger.debug("Cursos com ID >= 10000: %d", len(cursos_validos))
             
-            cursos = cursos_normalizados
+            if not cursos_validos:
+                return jsonify({
+                    'sucesso': False, 
+                    'erro': 'Nenhum curso com ID >= 10000 encontrado'
+                }), 400
             
-        else:
-            # FORMATO FRONTEND
-            logger.info("🟢 Requisição do Frontend detectada")
-            usuario = data.get('usuario', {})
-            cursos = data.get('cursos', [])
-            quantidade = data.get('quantidade', 10)
+            inicio = time.perf_counter()
+            if incremental:
+                top = ranquear_incremental(usuario_id, usuario, cursos_validos, quantidade, colunas, modelo)
+            elif request.args.get('stream') in ('json', 'ndjson'):
+                recomendacoes = gerar_recomendacoes(usuario, cursos_validos, quantidade, colunas, folga, modelo)
+                return responder_stream(request.args['stream'], usuario_id,
+                                        registrar_stream(modelo, inicio, recomendacoes))
+            else:
+                top = ranquear_cursos(usuario, cursos_validos, quantidade, colunas, folga, modelo)
+            registrar_versao(modelo, inicio, top)
         
-        if not cursos:
-            return jsonify({'sucesso': False, 'erro': 'Lista de cursos vazia'}), 400
+        if request.args.get('stream') in ('json', 'ndjson'):
+            return responder_stream(request.args['stream'], usuario_id, top)
         
-        # ====== FILTRAR APENAS CURSOS COM ID >= 10000 ======
-        cursos_validos = [c for c in cursos if c.get('id_curso', 0) >= 10000]
+        logger.debug("✓ %d cursos recomendados", len(top))
         
-        logger.info(f"Total de cursos recebidos: {len(cursos)}")
-        logger.info(f"Cursos com ID >= 10000: {len(cursos_validos)}")
-        
-        if not cursos_validos:
+        with metricas.etapa('serializacao'):
             return jsonify({
-                'sucesso': False, 
-                'erro': 'Nenhum curso com ID >= 10000 encontrado'
-            }), 400
-        
-        recomendacoes = []
-        for curso in cursos_validos:
-            features = criar_features(usuario, curso)
-            X_reg = pd.DataFrame([{k: features[k] for k in features_config['regressao']}])
-            X_class = pd.DataFrame([{k: features[k] for k in features_config['classificacao']}])
-            
-            score_base = float(modelo_regressao.predict(X_reg)[0])
-            score_base = max(0, min(10, score_base))
-            
-            # APLICAR REGRAS DE NEGÓCIO
-            score_final = aplicar_regras_negocio(score_base, features, usuario, curso)
-            
-            prob = float(modelo_classificacao.predict_proba(X_class)[0][1])
-            
-            recomendacoes.append({
-                'curso': {
-                    'id_curso': curso.get('id_curso') or curso.get('id'),
-                    'nome': curso.get('nome'),
-                    'descricao': curso.get('descricao', ''),
-                    'area': curso.get('area', 'Tecnologia'),
-                    'nivel': curso.get('nivel'),
-                    'carga_horaria': curso.get('carga_horaria'),
-                    'avaliacao_media': curso.get('avaliacao_media'),
-                    'taxa_conclusao_media': curso.get('taxa_conclusao_media', 80.0),
-                    'popularidade_score': curso.get('popularidade_score', 50.0)
-                },
-                'score_relevancia': round(score_final, 2),
-                'probabilidade_conclusao': round(prob, 2),
-                'motivo': gerar_motivo(features, prob),
-                'modelo_ia': 'RandomForest + Business Rules',
-                'versao_modelo': '2.0'
+                'usuario_id': usuario_id,
+                'timestamp': datetime.now().isoformat(),
+                'total_recomendacoes': len(top),
+                'recomendacoes': top
             })
         
-        recomendacoes.sort(key=lambda x: x['score_relevancia'], reverse=True)
-        top = recomendacoes[:quantidade]
-        
-        # Adicionar rank
-        for i, rec in enumerate(top, 1):
-            rec['rank'] = i
-        
-        logger.info(f"✓ {len(top)} cursos recomendados")
-        
-        return jsonify({
-            'usuario_id': data.get('usuario_id'),
-            'timestamp': datetime.now().isoformat(),
-            'total_recomendacoes': len(top),
-            'recomendacoes': top
-        })
-        
+    except RequisicaoInvalida as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 400
+    except UsuarioNaoEncontrado as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 404
     except Exception as e:
         logger.error(f"Erro: {e}")
         return jsonify({'sucesso': False, 'erro': str(e)}), 500
 
+def responder_stream(formato, usuario_id, recomendacoes):
+    """
+    Envia as recomendações conforme são montadas, sem guardar a lista inteira
+    nem a string JSON completa da resposta.
+    """
+    mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+    return Response(stream_with_context(partes_stream(formato, usuario_id, recomendacoes)), mimetype=mimetype)
+
+def partes_stream(formato, usuario_id, recomendacoes):
+    """Pedaços (bytes UTF-8) da resposta em stream ('json' ou 'ndjson')."""
+    timestamp = datetime.now().isoformat()
+    dumps = codec_json.dumps
+    
+    total = 0
+    if formato == 'ndjson':
+        for rec in recomendacoes:
+            yield dumps(rec) + b'\n'
+            total += 1
+        yield dumps({'usuario_id': usuario_id, 'timestamp': timestamp, 'total_recomendacoes': total}) + b'\n'
+        return
+    
+    yield b'{"recomendacoes":['
+    for rec in recomendacoes:
+        yield (b',' if total else b'') + dumps(rec)
+        total += 1
+    yield b'],' + dumps({'timestamp': timestamp, 'total_recomendacoes': total,
+                         'usuario_id': usuario_id})[1:]
+
+CAMPOS_NUMERICOS_PERFIL = ('tempo_disponivel_semanal', 'idade', 'anos_experiencia')
+CAMPOS_TEXTO_PERFIL = ('carreira_desejada', 'nivel_experiencia', 'escolaridade')
+
+def erro_perfil(perfil):
+    """Motivo pelo qual o perfil (formato interno) não pode ser pontuado, ou None."""
+    if not isinstance(perfil, dict):
+        return 'perfil deve ser um objeto'
+    for campo in CAMPOS_NUMERICOS_PERFIL:
+        valor = perfil.get(campo, 0)
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not np.isfinite(valor):
+            return f'{campo} deve ser um número'
+    for campo in CAMPOS_TEXTO_PERFIL:
+        if not isinstance(perfil.get(campo, ''), str):
+            return f'{campo} deve ser texto'
+    return None
+
+def perfil_item_lote(item):
+    """
+    Perfil interno de um item de /recomendar/lote. Levanta ValueError se o
+    item for inválido e UsuarioNaoEncontrado se pedir o perfil armazenado de
+    um usuario_id que não está na base.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('item deve ser um objeto')
+    armazenado = item.get('perfil_armazenado', False)
+    if not isinstance(armazenado, bool):
+        raise ValueError('perfil_armazenado deve ser true ou false')
+    if armazenado:
+        if base_usuarios is None:
+            raise ValueError('perfil_armazenado requer a base de usuários (python base_colunar.py)')
+        perfil = perfil_armazenado(item.get('usuario_id'))
+        if perfil is None:
+            raise UsuarioNaoEncontrado(f"Usuário {item.get('usuario_id')} não encontrado na base")
+    elif 'perfil' in item:
+        if not isinstance(item['perfil'], dict):
+            raise ValueError('perfil deve ser um objeto')
+        try:
+            perfil = normalizar_perfil_java(item['perfil'])
+        except (TypeError, ValueError):
+            raise ValueError('tempo_disponivel_semanal deve ser um número')
+    else:
+        perfil = item.get('usuario', item)
+    erro = erro_perfil(perfil)
+    if erro:
+        raise ValueError(erro)
+    return perfil
+
+@app.route('/recomendar/lote', methods=['POST'])
+def recomendar_lote():
+    """
+    Recomendação para vários usuários em uma única requisição.
+    
+    {
+        "usuarios": [
+            {"usuario_id": 1, "perfil": {...}},            (perfil no formato Java)
+            {"usuario_id": 2, "usuario": {...}}            (perfil no formato Frontend)
+            {"usuario_id": 3, "perfil_armazenado": true}   (perfil da base de usuários)
+        ],
+        "cursos": [{...}],                                 (opcional: sem cursos usa o catálogo)
+        "cursos_ids": [...],                               (opcional, só com o catálogo)
+        "formato": "java" | "frontend",                    (opcional: formato dos cursos)
+        "top_n": 10
+    }
+    
+    Os cursos seguem o formato Java (camelCase) ou o Frontend (snake_case),
+    como em /recomendar. Sem "formato", são Java se algum item trouxer
+    "perfil" ou o body trouxer "top_n"; senão, Frontend.
+    
+    Todos os itens são validados antes da resposta começar: um item inválido
+    responde 400 com o índice do item. A resposta é NDJSON (uma linha JSON
+    por usuário), enviada conforme cada bloco de usuários é pontuado; um erro
+    no meio do envio vira uma última linha {"sucesso": false, "erro": ...}.
+    """
+    data = request.get_json(silent=True) or {}
+    itens = data.get('usuarios') or []
+    if not itens or not isinstance(itens, list):
+        return jsonify({'sucesso': False, 'erro': 'Lista de usuários vazia'}), 400
+    quantidade = data.get('top_n', data.get('quantidade', 10))
+    if isinstance(quantidade, bool) or not isinstance(quantidade, int) or quantidade < 0:
+        return jsonify({'sucesso': False, 'erro': 'top_n deve ser um inteiro >= 0'}), 400
+    
+    perfis = []
+    for i, item in enumerate(itens):
+        try:
+            perfis.append(perfil_item_lote(item))
+        except ValueError as e:
+            return jsonify({'sucesso': False, 'erro': f'usuarios[{i}]: {e}'}), 400
+        except UsuarioNaoEncontrado as e:
+            return jsonify({'sucesso': False, 'erro': f'usuarios[{i}]: {e}'}), 404
+    
+    formato = data.get('formato')
+    if formato is None:
+        formato = 'java' if 'top_n' in data or any('perfil' in item for item in itens) else 'frontend'
+    elif formato not in ('java', 'frontend'):
+        return jsonify({'sucesso': False, 'erro': 'formato deve ser "java" ou "frontend"'}), 400
+    
+    cursos = data.get('cursos') or []
+    if cursos:
+        if not isinstance(cursos, list) or not all(isinstance(c, dict) for c in cursos):
+            return jsonify({'sucesso': False, 'erro': '"cursos" deve ser uma lista de objetos'}), 400
+        try:
+            cursos_validos, colunas = decodificar_cursos(cursos, formato)
+        except (TypeError, ValueError) as e:
+            return jsonify({'sucesso': False, 'erro': f'cursos: {e}'}), 400
+    else:
+        try:
+            cursos_validos, colunas, _ = catalogo.selecionar(data.get('cursos_ids'))
+        except ValueError as e:
+            return jsonify({'sucesso': False, 'erro': str(e)}), 400
+    
+    if not cursos_validos:
+        return jsonify({'sucesso': False, 'erro': 'Nenhum curso com ID >= 10000 encontrado'}), 400
+    
+    logger.debug("📦 Lote: %d usuários x %d cursos", len(perfis), len(cursos_validos))
+    
+    modelo = registro.escolher()
+    
+    def gerar():
+        inicio = time.perf_counter()
+        servidas = []
+        try:
+            for i, top in ranquear_lote(perfis, cursos_validos, quantidade, colunas, modelo=modelo):
+                servidas.extend(top)
+                yield codec_json.dumps({
+                    'usuario_id': itens[i].get('usuario_id'),
+                    'total_recomendacoes': len(top),
+                    'recomendacoes': top
+                }) + b'\n'
+        except Exception as e:
+            # O status 200 já foi enviado: o erro vai como última linha
+            logger.error(f"Erro no lote: {e}")
+            yield codec_json.dumps({'sucesso': False, 'erro': str(e)}) + b'\n'
+            return
+        registrar_versao(modelo, inicio, servidas)
+    
+    return Response(stream_with_context(gerar()), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     print("=" * 70)
     print("🚀 SkillBridge API - Recomendação de Cursos")
@@ -0,0 +1,437 @@
+"""
+SkillBridge - API ASGI com Micro-Lotes
+======================================
+Variante assíncrona de `/`, `/health`, `/metrics` e `/recomendar`, com o
+mesmo formato de entrada e saída de app.py (inclusive ?stream=json|ndjson).
+
+A inferência roda em um pool limitado de threads, fora do event loop, então
+uma requisição com catálogo grande não bloqueia as que chegam depois dela.
+
+Requisições que chegam dentro de uma janela de poucos milissegundos formam
+um micro-lote. As que usam o catálogo do servidor com os mesmos
+`cursos_ids` viram uma única chamada a app.ranquear_lote, ou seja, uma
+avaliação das florestas para todos os perfis do lote. As que enviam a
+própria lista de cursos, ou que pedem "incremental" (sessão por usuário) ou
+"aproximado" (árvores em estágios), são pontuadas uma a uma, na mesma thread.
+
+Com todas as threads ocupadas os pedidos esperam na fila (e os lotes
+seguintes ficam maiores); quando a fila passa de SKILLBRIDGE_ASGI_FILA
+pedidos, os novos recebem 503 com Retry-After.
+
+Uso:
+    $ uvicorn app_asgi:app --port 7860
+    $ gunicorn -k uvicorn.workers.UvicornWorker -c gunicorn.conf.py app_asgi:app
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import app as api
+import codec_json
+from cache_recomendacoes import chave_perfil
+from catalogo import validar_ids
+from metricas import faixa_catalogo
+from recursos import memoria_processo
+
+logger = logging.getLogger(__name__)
+
+JANELA_MS = float(os.environ.get('SKILLBRIDGE_ASGI_JANELA_MS', 3))
+MAX_LOTE = int(os.environ.get('SKILLBRIDGE_ASGI_MAX_LOTE', 64))
+TAMANHO_FILA = int(os.environ.get('SKILLBRIDGE_ASGI_FILA', 256))
+THREADS = int(os.environ.get('SKILLBRIDGE_ASGI_THREADS', os.cpu_count() or 1))
+# Bodies maiores que isso (listas de cursos grandes) são decodificados fora do event loop
+LIMITE_JSON_NO_LOOP = 64 * 1024
+
+
+class ErroRequisicao(ValueError):
+    """Erro do pedido (resposta 400), não do servidor."""
+
+
+class FilaCheia(Exception):
+    pass
+
+
+class Pedido:
+    __slots__ = ('usuario', 'cursos', 'colunas', 'quantidade', 'cursos_ids', 'sessao', 'folga', 'modelo', 'futuro')
+
+    def __init__(self, usuario, cursos, quantidade, cursos_ids=None, colunas=None, sessao=None, folga=None,
+                 modelo=None):
+        self.usuario = usuario
+        # None = cursos do catálogo do servidor
+        self.cursos = cursos
+        self.colunas = colunas
+        self.quantidade = quantidade
+        self.cursos_ids = cursos_ids
+        # usuario_id da sessão incremental ("incremental": true), ou None
+        self.sessao = sessao
+        # folga do ranking aproximado ("aproximado"), ou None para o exato
+        self.folga = folga
+        # Versão dos modelos escolhida pelo registro (A/B) ao montar o pedido
+        self.modelo = modelo if modelo is not None else api.registro.ativa
+        self.futuro = None
+
+
+def processar_lote(pedidos):
+    """
+    Pontua um micro-lote (roda em uma thread do pool). Retorna, para cada
+    pedido, a lista de recomendações ou a exceção que ele gerou.
+
+    Pedidos do catálogo com os mesmos cursos_ids (e a mesma versão dos
+    modelos) são pontuados juntos com o maior top_n do grupo e cada um recebe
+    o seu prefixo: o top k é sempre o começo do top K (ordenação estável), e
+    a poda para K também vale para k. Pedidos incrementais usam a sessão do
+    seu usuário e são pontuados um a um por app.ranquear_incremental, e os
+    aproximados um a um com a sua folga, como em app.recomendar.
+    """
+    resultados = [None] * len(pedidos)
+    grupos = {}
+    for i, p in enumerate(pedidos):
+        try:
+            if p.cursos is not None:
+                inicio = time.perf_counter()
+                if p.sessao is not None:
+                    resultados[i] = api.ranquear_incremental(p.sessao, p.usuario, p.cursos, p.quantidade,
+                                                             p.colunas, p.modelo)
+                else:
+                    resultados[i] = api.ranquear_cursos(p.usuario, p.cursos, p.quantidade, p.colunas, p.folga,
+                                                        p.modelo)
+                api.registrar_versao(p.modelo, inicio, resultados[i])
+                continue
+            # Resultados aproximados não se misturam com os exatos no cache
+            versao = p.modelo.nome if p.folga is None else f'{p.modelo.nome}~{p.folga}'
+            top = api.cache.obter(chave_perfil(api.perfil_normalizado(p.usuario), api.catalogo.assinatura,
+                                               versao, p.cursos_ids, p.quantidade))
+            if top is not None:
+                resultados[i] = top
+                continue
+            if p.sessao is not None or p.folga is not None:
+                inicio = time.perf_counter()
+                cursos, colunas, assinatura = api.catalogo.selecionar(p.cursos_ids)
+                if not cursos:
+                    raise ErroRequisicao('Nenhum curso do catálogo encontrado')
+                if p.sessao is not None:
+                    top = api.ranquear_incremental(p.sessao, p.usuario, cursos, p.quantidade, colunas, p.modelo)
+                else:
+                    top = api.ranquear_cursos(p.usuario, cursos, p.quantidade, colunas, p.folga, p.modelo)
+                api.registrar_versao(p.modelo, inicio, top)
+                api.cache.guardar(chave_perfil(api.perfil_normalizado(p.usuario), assinatura,
+                                               versao, p.cursos_ids, p.quantidade), top)
+                resultados[i] = top
+                continue
+            ids = None if p.cursos_ids is None else tuple(p.cursos_ids)
+            prefixo = isinstance(p.quantidade, int) and p.quantidade > 0
+            grupos.setdefault((p.modelo, ids, None if prefixo else p.quantidade), []).append(i)
+        except Exception as e:
+            resultados[i] = e
+
+    for (modelo, ids, quantidade), indices in grupos.items():
+        try:
+            inicio = time.perf_counter()
+            cursos, colunas, assinatura = api.catalogo.selecionar(None if ids is None else list(ids))
+            if not cursos:
+                raise ErroRequisicao('Nenhum curso do catálogo encontrado')
+            if quantidade is None:
+                quantidade = max(pedidos[i].quantidade for i in indices)
+            perfis = [pedidos[i].usuario for i in indices]
+            for j, top in api.ranquear_lote(perfis, cursos, quantidade, colunas, modelo=modelo):
+                p = pedidos[indices[j]]
+                if isinstance(p.quantidade, int):
+                    top = top[:p.quantidade]
+                resultados[indices[j]] = top
+                api.cache.guardar(chave_perfil(api.perfil_normalizado(p.usuario), assinatura,
+                                               modelo.nome, p.cursos_ids, p.quantidade), top)
+                # Latência desde o início do grupo: cada pedido esperou pelos anteriores
+                api.registrar_versao(modelo, inicio, top)
+        except Exception as e:
+            for i in indices:
+                resultados[i] = e
+    return resultados
+
+
+class MicroLotes:
+    """Fila de pedidos + coletor que despacha micro-lotes para o pool de threads."""
+
+    def __init__(self, janela_ms=JANELA_MS, max_lote=MAX_LOTE, tamanho_fila=TAMANHO_FILA, threads=THREADS):
+        self.janela = janela_ms / 1000
+        self.max_lote = max_lote
+        self.tamanho_fila = tamanho_fila
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='inferencia')
+        # Criados no event loop em iniciar()
+        self._fila = None
+        self._livres = None
+        self._coletor = None
+        self.lotes = 0
+        self.pedidos = 0
+        self.rejeitados = 0
+        self.maior_lote = 0
+
+    def iniciar(self):
+        if self._coletor is None:
+            self._fila = asyncio.Queue(self.tamanho_fila)
+            self._livres = asyncio.Semaphore(self.threads)
+            self._coletor = asyncio.get_running_loop().create_task(self._coletar())
+
+    def encerrar(self):
+        if self._coletor is not None:
+            self._coletor.cancel()
+            self._coletor = None
+        self._executor.shutdown(wait=False)
+
+    async def enviar(self, pedido):
+        """Enfileira o pedido e espera o resultado. Levanta FilaCheia se não houver espaço."""
+        self.iniciar()
+        pedido.futuro = asyncio.get_running_loop().create_future()
+        try:
+            self._fila.put_nowait(pedido)
+        except asyncio.QueueFull:
+            self.rejeitados += 1
+            raise FilaCheia()
+        resultado = await pedido.futuro
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    async def executar(self, funcao, *args):
+        """Roda `funcao` no pool de inferência (para trabalho pesado fora do event loop)."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+    async def _coletar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            if self._fila.qsize() < self.max_lote - 1:
+                await asyncio.sleep(self.janela)
+            # Espera uma thread livre; o que chegar enquanto isso entra no mesmo lote
+            await self._livres.acquire()
+            while len(lote) < self.max_lote and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+
+            self.lotes += 1
+            self.pedidos += len(lote)
+            self.maior_lote = max(self.maior_lote, len(lote))
+            futuro = loop.run_in_executor(self._executor, processar_lote, lote)
+            futuro.add_done_callback(lambda f, lote=lote: self._concluir(f, lote))
+
+    def _concluir(self, futuro, lote):
+        self._livres.release()
+        erro = futuro.exception()
+        resultados = [erro] * len(lote) if erro is not None else futuro.result()
+        for pedido, resultado in zip(lote, resultados):
+            if not pedido.futuro.done():
+                pedido.futuro.set_result(resultado)
+
+    def estatisticas(self):
+        return {
+            'threads': self.threads,
+            'janela_ms': self.janela * 1000,
+            'max_lote': self.max_lote,
+            'fila': self._fila.qsize() if self._fila is not None else 0,
+            'tamanho_fila': self.tamanho_fila,
+            'lotes': self.lotes,
+            'pedidos': self.pedidos,
+            'media_por_lote': round(self.pedidos / self.lotes, 2) if self.lotes else 0.0,
+            'maior_lote': self.maior_lote,
+            'rejeitados': self.rejeitados
+        }
+
+
+micro_lotes = MicroLotes()
+
+CABECALHOS_CORS = [(b'access-control-allow-origin', b'*')]
+
+
+def _dumps(obj):
+    # Mesmo codec (e mesma saída) do jsonify da API Flask
+    return codec_json.dumps(obj)
+
+
+async def _responder(send, status, corpo, cabecalhos=()):
+    await _enviar_bytes(send, status, _dumps(corpo), cabecalhos=cabecalhos)
+
+
+async def _enviar_bytes(send, status, dados, tipo=b'application/json', cabecalhos=()):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', tipo),
+                            (b'content-length', str(len(dados)).encode())] + CABECALHOS_CORS + list(cabecalhos)})
+    await send({'type': 'http.response.body', 'body': dados})
+
+
+async def _responder_stream(send, formato, usuario_id, top):
+    tipo = b'application/x-ndjson' if formato == 'ndjson' else b'application/json'
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', tipo)] + CABECALHOS_CORS})
+    for parte in api.partes_stream(formato, usuario_id, top):
+        await send({'type': 'http.response.body', 'body': parte, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _ler_corpo(receive):
+    partes = []
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'http.disconnect':
+            return None
+        partes.append(mensagem.get('body', b''))
+        if not mensagem.get('more_body', False):
+            return b''.join(partes)
+
+
+def _montar_pedido(corpo):
+    """Decodifica o body e monta o Pedido (mesmas regras de app.recomendar)."""
+    try:
+        with api.metricas.etapa('json'):
+            data = codec_json.loads(corpo)
+    except ValueError:
+        # Inclui NaN/Infinity, que o orjson recusa
+        raise ErroRequisicao('Body não é um JSON válido') from None
+    if not isinstance(data, dict):
+        raise ErroRequisicao('O body deve ser um objeto JSON')
+    try:
+        with api.metricas.etapa('normalizacao'):
+            formato, usuario, cursos, quantidade = api.interpretar_requisicao(data)
+    except api.RequisicaoInvalida as e:
+        raise ErroRequisicao(str(e)) from None
+    usuario_id = data.get('usuario_id')
+    sessao = usuario_id if data.get('incremental') and usuario_id is not None and api.sessoes.ativo else None
+    try:
+        folga = api.folga_requisicao(data)
+    except ValueError as e:
+        raise ErroRequisicao(str(e)) from None
+    # O modo incremental tem precedência, como em app.recomendar
+    if sessao is not None:
+        folga = None
+    # Versão que atende (a candidata do A/B para parte dos usuários)
+    modelo = api.registro.escolher(usuario_id)
+    if not cursos and len(api.catalogo):
+        try:
+            cursos_ids = validar_ids(data.get('cursos_ids'))
+        except ValueError as e:
+            raise ErroRequisicao(str(e)) from None
+        api.metricas.incrementar('recomendacoes_total', formato=formato, catalogo=faixa_catalogo(
+            len(cursos_ids) if cursos_ids is not None else len(api.catalogo)))
+        return data, Pedido(usuario, None, quantidade, cursos_ids, sessao=sessao, folga=folga, modelo=modelo)
+    if not cursos:
+        raise ErroRequisicao('Lista de cursos vazia')
+
+    # Colunas direto dos cursos recebidos (só cursos com ID >= 10000)
+    with api.metricas.etapa('decodificacao_cursos'):
+        cursos_validos, colunas = api.decodificar_cursos(cursos, formato)
+    api.metricas.incrementar('recomendacoes_total', formato=formato, catalogo=faixa_catalogo(len(cursos_validos)))
+    if not cursos_validos:
+        raise ErroRequisicao('Nenhum curso com ID >= 10000 encontrado')
+    return data, Pedido(usuario, cursos_validos, quantidade, colunas=colunas, sessao=sessao, folga=folga,
+                        modelo=modelo)
+
+
+async def recomendar(scope, receive, send):
+    """POST /recomendar (ver app.recomendar para o formato do body)."""
+    corpo = await _ler_corpo(receive)
+    if corpo is None:
+        return
+    formato = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('stream', [None])[-1]
+    try:
+        if len(corpo) > LIMITE_JSON_NO_LOOP:
+            data, pedido = await micro_lotes.executar(_montar_pedido, corpo)
+        else:
+            data, pedido = _montar_pedido(corpo)
+        top = await micro_lotes.enviar(pedido)
+    except FilaCheia:
+        await _responder(send, 503, {'sucesso': False, 'erro': 'Servidor ocupado, tente novamente'},
+                         [(b'retry-after', b'1')])
+        return
+    except api.UsuarioNaoEncontrado as e:
+        await _responder(send, 404, {'sucesso': False, 'erro': str(e)})
+        return
+    except ErroRequisicao as e:
+        await _responder(send, 400, {'sucesso': False, 'erro': str(e)})
+        return
+    except Exception as e:
+        logger.error(f"Erro: {e}")
+        await _responder(send, 500, {'sucesso': False, 'erro': str(e)})
+        return
+
+    if formato in ('json', 'ndjson'):
+        await _responder_stream(send, formato, data.get('usuario_id'), top)
+        return
+    with api.metricas.etapa('serializacao'):
+        dados = _dumps({
+            'usuario_id': data.get('usuario_id'),
+            'timestamp': datetime.now().isoformat(),
+            'total_recomendacoes': len(top),
+            'recomendacoes': top
+        })
+    await _enviar_bytes(send, 200, dados)
+
+
+async def _lifespan(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'lifespan.startup':
+            micro_lotes.iniciar()
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensagem['type'] == 'lifespan.shutdown':
+            micro_lotes.encerrar()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    # Trocas de versão publicadas por /admin/modelos em qualquer worker do app Flask
+    api.registro.verificar()
+    metodo, caminho = scope['method'], scope['path']
+    inicio = time.perf_counter()
+    status = []
+
+    async def enviar(mensagem):
+        if mensagem['type'] == 'http.response.start':
+            status.append(mensagem['status'])
+        await send(mensagem)
+
+    rota = await _rotear(metodo, caminho, scope, receive, enviar)
+    api.metricas.observar('requisicao_segundos', time.perf_counter() - inicio, rota=rota)
+    if status:
+        api.metricas.incrementar('requisicoes_total', rota=rota, status=status[0])
+
+
+async def _rotear(metodo, caminho, scope, receive, send):
+    """Atende a requisição e retorna a rota usada nas métricas."""
+    if metodo == 'OPTIONS':
+        pedidos = dict(scope['headers']).get(b'access-control-request-headers', b'*')
+        await send({'type': 'http.response.start', 'status': 204,
+                    'headers': CABECALHOS_CORS + [(b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+                                                  (b'access-control-allow-headers', pedidos)]})
+        await send({'type': 'http.response.body', 'body': b''})
+    elif caminho == '/' and metodo == 'GET':
+        await _responder(send, 200, {'api': 'SkillBridge', 'versao': '2.0', 'status': 'online'})
+    elif caminho == '/health' and metodo == 'GET':
+        await _responder(send, 200, {'status': 'healthy', 'modelos': True,
+                                     'catalogo': {'versao': api.catalogo.versao, 'cursos': len(api.catalogo)},
+                                     'cache': api.cache.estatisticas(),
+                                     'micro_lotes': micro_lotes.estatisticas(),
+                                     'registro_modelos': {'ativa': api.registro.ativa.nome,
+                                                          'candidata': (api.registro.candidata.nome
+                                                                        if api.registro.candidata else None),
+                                                          'fracao_candidata': api.registro.fracao},
+                                     'processo': dict(memoria_processo(), pid=os.getpid())})
+    elif caminho == '/metrics' and metodo == 'GET':
+        medidores = dict(api.medidores_processo(), micro_lotes_fila=micro_lotes.estatisticas()['fila'])
+        await _enviar_bytes(send, 200, api.metricas.formato_prometheus(medidores).encode('utf-8'),
+                            tipo=b'text/plain; version=0.0.4')
+    elif caminho == '/recomendar' and metodo == 'POST':
+        await recomendar(scope, receive, send)
+    else:
+        await _responder(send, 404, {'sucesso': False, 'erro': 'Rota não encontrada'})
+        return 'desconhecida'
+    return caminho
@@ -0,0 +1,346 @@
+"""
+SkillBridge - Base Colunar
+==========================
+Converte usuarios.csv e dataset_treino.csv para um formato colunar em disco
+e lê as colunas com memory-map, sem carregar o arquivo.
+
+Cada tabela vira um diretório com um .npy por coluna:
+
+    <coluna>.npy              -> valores; inteiros no menor tipo que os comporta,
+                                 decimais em float32 só quando todos os valores
+                                 voltam iguais (senão float64)
+    <coluna>.npy (texto)      -> códigos int8/int16/int32 das categorias
+    indice_<coluna>/          -> ordem (linhas ordenadas pela chave), chaves
+                                 (valores distintos), inicios (início de cada
+                                 chave em ordem) e, se as chaves forem densas,
+                                 direto (posição da chave por valor - mínimo)
+    meta.json                 -> linhas, colunas (tipo e categorias) e índices
+
+A busca por chave com o índice direto é O(1): duas leituras no array
+mapeado. Com chaves esparsas (mais que FATOR_DENSIDADE x o número de chaves
+entre o mínimo e o máximo) a busca é binária sobre `chaves`.
+
+O CSV é lido duas vezes, em blocos: a primeira passada decide o tipo de cada
+coluna e a segunda escreve os valores. A tabela é montada em <destino>.tmp e
+só então substitui o destino, então quem já mapeou a versão anterior continua
+lendo os arquivos antigos.
+
+Uso:
+    $ python base_colunar.py                                   (as duas tabelas)
+    $ python base_colunar.py usuarios.csv base_colunar/usuarios --indice id_usuario
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+DESTINO_PADRAO = 'base_colunar'
+TABELAS_PADRAO = (('usuarios.csv', 'usuarios', ('id_usuario',)),
+                  ('dataset_treino.csv', 'interacoes', ('id_usuario', 'id_curso')))
+LINHAS_POR_BLOCO = 100000
+# Índice direto quando (máximo - mínimo + 1) <= FATOR_DENSIDADE * chaves distintas
+FATOR_DENSIDADE = 4
+TIPOS_INTEIROS = (np.int8, np.int16, np.int32, np.int64)
+_VAZIO = np.zeros(0, dtype=np.int64)
+
+
+def _blocos(origem, linhas_por_bloco):
+    """Blocos do CSV com tudo como texto: o tipo é decidido por coluna na conversão."""
+    import pandas as pd
+    return pd.read_csv(origem, dtype=str, keep_default_na=False, chunksize=linhas_por_bloco)
+
+
+def _menor_inteiro(minimo, maximo):
+    for tipo in TIPOS_INTEIROS:
+        info = np.iinfo(tipo)
+        if info.min <= minimo and maximo <= info.max:
+            return tipo
+    raise ValueError(f"Inteiros fora de int64: {minimo}..{maximo}")
+
+
+def _numeros(valores):
+    """Série de texto -> float64 (vazio vira NaN; o que não é número também)."""
+    import pandas as pd
+    return pd.to_numeric(valores.replace('', np.nan), errors='coerce').to_numpy(dtype=np.float64)
+
+
+class _Perfil:
+    """O que a primeira passada sabe de uma coluna."""
+
+    __slots__ = ('texto', 'inteiro', 'float32', 'faltantes', 'minimo', 'maximo', 'categorias',
+                 'lidas', 'incompleta')
+
+    def __init__(self):
+        self.texto = False
+        self.inteiro = True
+        self.float32 = True
+        self.faltantes = False
+        self.minimo = None
+        self.maximo = None
+        self.categorias = {}
+        self.lidas = 0
+        # Virou texto depois do primeiro bloco: as categorias dos blocos anteriores faltam
+        self.incompleta = False
+
+    def observar(self, valores):
+        if not self.texto:
+            numeros = _numeros(valores)
+            nulos = np.isnan(numeros)
+            if nulos.sum() > (valores == '').sum():
+                # Algum valor não é número: a coluna inteira é texto
+                self.texto = True
+                self.incompleta = self.lidas > 0
+            else:
+                presentes = numeros[~nulos]
+                self.faltantes |= len(presentes) < len(numeros)
+                if len(presentes):
+                    self.inteiro &= bool(np.all(presentes == np.round(presentes)))
+                    self.float32 &= bool(np.all(presentes.astype(np.float32).astype(np.float64) == presentes))
+                    minimo, maximo = presentes.min(), presentes.max()
+                    self.minimo = minimo if self.minimo is None else min(self.minimo, minimo)
+                    self.maximo = maximo if self.maximo is None else max(self.maximo, maximo)
+        if self.texto:
+            for valor in valores.unique():
+                self.categorias.setdefault(valor, len(self.categorias))
+        self.lidas += len(valores)
+
+    def tipo(self):
+        if self.texto:
+            return _menor_inteiro(0, max(len(self.categorias) - 1, 0))
+        if self.inteiro and not self.faltantes and self.minimo is not None:
+            return _menor_inteiro(int(self.minimo), int(self.maximo))
+        return np.float32 if self.float32 else np.float64
+
+
+def converter(origem, destino, indices=(), linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Converte o CSV `origem` para o diretório colunar `destino`, com um índice
+    para cada coluna inteira de `indices`. Retorna o meta.json gravado.
+    """
+    perfis = {}
+    linhas = 0
+    for bloco in _blocos(origem, linhas_por_bloco):
+        for nome in bloco.columns:
+            perfis.setdefault(nome, _Perfil()).observar(bloco[nome])
+        linhas += len(bloco)
+    if not perfis:
+        raise ValueError(f"Nenhuma coluna em {origem}")
+    incompletas = [nome for nome, perfil in perfis.items() if perfil.incompleta]
+    if incompletas:
+        # Categorias desde o primeiro bloco (ordem de aparição no arquivo)
+        for nome in incompletas:
+            perfis[nome].categorias = {}
+        for bloco in _blocos(origem, linhas_por_bloco):
+            for nome in incompletas:
+                for valor in bloco[nome].unique():
+                    perfis[nome].categorias.setdefault(valor, len(perfis[nome].categorias))
+    for nome in indices:
+        if nome not in perfis:
+            raise ValueError(f"Coluna do índice não existe em {origem}: {nome}")
+        if perfis[nome].texto or perfis[nome].tipo() not in TIPOS_INTEIROS:
+            raise ValueError(f"O índice precisa de uma coluna inteira sem faltantes: {nome}")
+
+    temporario = destino.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    colunas = {}
+    arrays = {}
+    for nome, perfil in perfis.items():
+        tipo = perfil.tipo()
+        arrays[nome] = np.lib.format.open_memmap(os.path.join(temporario, f'{nome}.npy'), mode='w+',
+                                                 dtype=tipo, shape=(linhas,))
+        colunas[nome] = {'tipo': np.dtype(tipo).name}
+        if perfil.texto:
+            colunas[nome]['categorias'] = list(perfil.categorias)
+
+    inicio = 0
+    for bloco in _blocos(origem, linhas_por_bloco):
+        fim = inicio + len(bloco)
+        for nome, perfil in perfis.items():
+            valores = bloco[nome]
+            if perfil.texto:
+                arrays[nome][inicio:fim] = valores.map(perfil.categorias).to_numpy()
+            else:
+                arrays[nome][inicio:fim] = _numeros(valores)
+        inicio = fim
+    for array in arrays.values():
+        array.flush()
+
+    meta_indices = {}
+    for nome in indices:
+        meta_indices[nome] = _gravar_indice(arrays[nome], os.path.join(temporario, f'indice_{nome}'))
+    del arrays
+
+    meta = {'origem': os.path.basename(origem), 'linhas': linhas, 'colunas': colunas, 'indices': meta_indices}
+    with open(os.path.join(temporario, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    return meta
+
+
+def _gravar_indice(valores, destino):
+    """Grava ordem/chaves/inicios (e direto, se as chaves forem densas) de uma coluna inteira."""
+    os.makedirs(destino)
+    ordem = np.argsort(valores, kind='stable')
+    ordenados = np.asarray(valores)[ordem]
+    if len(ordenados):
+        novas = np.flatnonzero(np.concatenate(([True], ordenados[1:] != ordenados[:-1])))
+    else:
+        novas = _VAZIO
+    chaves = ordenados[novas]
+    inicios = np.append(novas, len(ordenados))
+
+    tipo_posicao = _menor_inteiro(0, max(len(valores), 1))
+    np.save(os.path.join(destino, 'ordem.npy'), ordem.astype(tipo_posicao))
+    np.save(os.path.join(destino, 'chaves.npy'), chaves)
+    np.save(os.path.join(destino, 'inicios.npy'), inicios.astype(tipo_posicao))
+
+    meta = {'chaves': len(chaves), 'unico': bool(len(chaves) == len(ordenados)), 'direto': False}
+    if len(chaves):
+        minimo, maximo = int(chaves[0]), int(chaves[-1])
+        if maximo - minimo + 1 <= FATOR_DENSIDADE * len(chaves):
+            direto = np.full(maximo - minimo + 1, -1, dtype=_menor_inteiro(-1, len(chaves)))
+            direto[chaves.astype(np.int64) - minimo] = np.arange(len(chaves))
+            np.save(os.path.join(destino, 'direto.npy'), direto)
+            meta.update(direto=True, minimo=minimo)
+    return meta
+
+
+class TabelaColunar:
+    """
+    Tabela convertida por `converter`, aberta com memory-map: nenhuma coluna
+    é lida até ser usada, e só as páginas tocadas vão para a memória.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self._arrays = {}
+        # Categorias como array de objetos, para decodificar vários códigos de uma vez
+        self._categorias = {nome: np.array(info['categorias'], dtype=object)
+                            for nome, info in self.meta['colunas'].items() if 'categorias' in info}
+
+    def __len__(self):
+        return self.meta['linhas']
+
+    @property
+    def colunas(self):
+        return list(self.meta['colunas'])
+
+    def _array(self, caminho):
+        array = self._arrays.get(caminho)
+        if array is None:
+            # Views ndarray simples do np.memmap (sem cópia), como em motor_arvores
+            array = np.load(os.path.join(self.diretorio, caminho), mmap_mode='r').view(np.ndarray)
+            self._arrays[caminho] = array
+        return array
+
+    def coluna(self, nome):
+        """Array mapeado da coluna (os códigos, nas colunas de texto)."""
+        if nome not in self.meta['colunas']:
+            raise KeyError(f"Coluna inexistente: {nome}")
+        return self._array(f'{nome}.npy')
+
+    def valores(self, nome, linhas=None):
+        """Valores da coluna (todas as linhas ou só `linhas`), com o texto já decodificado."""
+        array = self.coluna(nome)
+        if linhas is not None:
+            array = array[linhas]
+        categorias = self._categorias.get(nome)
+        return categorias[array] if categorias is not None else array
+
+    def ler(self, colunas=None, linhas=None):
+        """Dict coluna -> valores, lendo do disco só as colunas pedidas."""
+        return {nome: self.valores(nome, linhas) for nome in (colunas or self.colunas)}
+
+    def linhas(self, coluna, valor):
+        """Posições das linhas com `coluna` == valor, pelo índice da coluna (em ordem de arquivo)."""
+        indice = self.meta['indices'].get(coluna)
+        if indice is None:
+            raise KeyError(f"Coluna sem índice: {coluna}")
+        try:
+            inteiro = int(valor)
+        except (TypeError, ValueError):
+            return _VAZIO
+        if inteiro != valor and not isinstance(valor, str):
+            return _VAZIO
+        valor = inteiro
+        prefixo = f'indice_{coluna}/'
+        if indice['direto']:
+            direto = self._array(prefixo + 'direto.npy')
+            posicao = valor - indice['minimo']
+            if not 0 <= posicao < len(direto):
+                return _VAZIO
+            k = int(direto[posicao])
+            if k < 0:
+                return _VAZIO
+        else:
+            chaves = self._array(prefixo + 'chaves.npy')
+            if not len(chaves) or not chaves[0] <= valor <= chaves[-1]:
+                return _VAZIO
+            k = int(np.searchsorted(chaves, valor))
+            if chaves[k] != valor:
+                return _VAZIO
+        inicios = self._array(prefixo + 'inicios.npy')
+        return self._array(prefixo + 'ordem.npy')[inicios[k]:inicios[k + 1]]
+
+    def registro(self, linha, colunas=None):
+        """Uma linha como dict de valores Python (int, float ou str)."""
+        registro = {}
+        for nome in colunas or self.colunas:
+            valor = self.coluna(nome)[linha]
+            categorias = self._categorias.get(nome)
+            registro[nome] = categorias[valor] if categorias is not None else valor.item()
+        return registro
+
+    def buscar(self, coluna, valor, colunas=None):
+        """Registros com `coluna` == valor (lista vazia se não houver)."""
+        return [self.registro(linha, colunas) for linha in self.linhas(coluna, valor)]
+
+    def primeiro(self, coluna, valor, colunas=None):
+        """O primeiro registro com `coluna` == valor, ou None."""
+        linhas = self.linhas(coluna, valor)
+        return self.registro(linhas[0], colunas) if len(linhas) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Converte um CSV para a base colunar (memory-map)')
+    parser.add_argument('origem', nargs='?', help='CSV de origem (sem argumentos: usuarios.csv e dataset_treino.csv)')
+    parser.add_argument('destino', nargs='?', help='diretório da tabela convertida')
+    parser.add_argument('--indice', action='append', default=[], help='coluna inteira a indexar (repetível)')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO)
+    args = parser.parse_args(argv)
+
+    if args.origem:
+        destino = args.destino or os.path.join(DESTINO_PADRAO, os.path.splitext(os.path.basename(args.origem))[0])
+        tarefas = [(args.origem, destino, tuple(args.indice))]
+    else:
+        tarefas = [(origem, os.path.join(DESTINO_PADRAO, nome), indices)
+                   for origem, nome, indices in TABELAS_PADRAO if os.path.exists(origem)]
+        if not tarefas:
+            raise SystemExit("Nenhum CSV encontrado (usuarios.csv, dataset_treino.csv)")
+
+    for origem, destino, indices in tarefas:
+        inicio = time.perf_counter()
+        meta = converter(origem, destino, indices, args.linhas_por_bloco)
+        tamanho = sum(os.path.getsize(os.path.join(raiz, arquivo))
+                      for raiz, _, arquivos in os.walk(destino) for arquivo in arquivos)
+        print(f"✓ {origem} -> {destino}: {meta['linhas']} linhas, {len(meta['colunas'])} colunas, "
+              f"{tamanho / 2 ** 20:.2f} MB ({os.path.getsize(origem) / 2 ** 20:.2f} MB em CSV) "
+              f"em {time.perf_counter() - inicio:.2f}s")
+        for nome, indice in meta['indices'].items():
+            print(f"   índice {nome}: {indice['chaves']} chaves"
+                  f"{', únicas' if indice['unico'] else ''}, {'direto' if indice['direto'] else 'busca binária'}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+SkillBridge - Benchmark do Caminho de Recomendação
+==================================================
+Mede as etapas do /recomendar em catálogos sintéticos de tamanhos
+diferentes, com perfis sorteados a partir das distribuições de usuarios.csv:
+
+    criar_features   -> app.criar_features_perfis (features de todos os cursos)
+    predicao         -> modelo de regressão sobre todos os cursos
+    regras_negocio   -> app.aplicar_regras_negocio_lote
+    recomendar       -> POST /recomendar de ponta a ponta (cliente de teste do Flask)
+
+Para cada etapa e tamanho: latência p50/p95/p99 (ms), vazão (chamadas/s e
+cursos/s) e pico de memória alocada (tracemalloc, em uma chamada extra).
+O resultado sai em JSON.
+
+Com --baseline, compara com um JSON anterior e marca como regressão as
+latências que pioraram mais que --tolerancia (código de saída 1).
+
+Com --aproximado FOLGA [FOLGA ...], mede também o ranking aproximado
+(app.pontuar_aproximado) para cada folga: latência de app.ranquear_top contra
+o exato e recall@N (fração do top exato que aparece no top aproximado). A
+memória de previsões é esvaziada antes de cada chamada, nos dois modos: com
+os vetores já guardados nenhum deles passa pelas árvores.
+
+Uso:
+    $ python benchmark.py --saida benchmark.json
+    $ python benchmark.py --tamanhos 10 100 --baseline benchmark.json
+    $ python benchmark.py --tamanhos 1000 10000 --aproximado 1.0 0.5 0.2
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+os.environ.setdefault('SKILLBRIDGE_CACHE_ITENS', '0')
+os.environ.setdefault('SKILLBRIDGE_MEMO_ITENS', '0')
+
+import numpy as np
+
+import app
+from recursos import memoria_processo
+
+TAMANHOS = [10, 100, 1000, 10000]
+ETAPAS = ('criar_features', 'predicao', 'regras_negocio', 'recomendar')
+NIVEIS_CURSO = list(app.NIVEL_CURSO_MAP)
+CAMPOS_NUMERICOS = ('idade', 'anos_experiencia', 'tempo_disponivel_semanal')
+# Diferenças abaixo disso (ms) são ruído de medição, mesmo que passem da tolerância
+FOLGA_MS = 0.05
+
+
+def distribuicoes_usuarios(caminho):
+    """Frequência de cada valor das colunas de perfil em usuarios.csv."""
+    colunas = ('carreira_desejada', 'nivel_experiencia', 'escolaridade') + CAMPOS_NUMERICOS
+    contagens = {c: Counter() for c in colunas}
+    with open(caminho, newline='', encoding='utf-8') as f:
+        for linha in csv.DictReader(f):
+            for c in colunas:
+                contagens[c][float(linha[c]) if c in CAMPOS_NUMERICOS else linha[c]] += 1
+    return {c: (list(cont), list(cont.values())) for c, cont in contagens.items()}
+
+
+def gerar_usuarios(rng, distribuicoes, n):
+    """Perfis com cada campo sorteado (independentemente) pela frequência observada."""
+    return [{campo: rng.choices(valores, pesos)[0] for campo, (valores, pesos) in distribuicoes.items()}
+            for _ in range(n)]
+
+
+def gerar_catalogo(rng, n):
+    """Cursos sintéticos com IDs >= 10000; inclui IDs das carreiras conforme o tamanho."""
+    ids = rng.sample(range(10000, 10000 + max(n, 200)), n)
+    return [{
+        'id_curso': id_curso,
+        'nome': f'Curso {id_curso}',
+        'nivel': rng.choice(NIVEIS_CURSO),
+        'carga_horaria': float(rng.choice([8, 12, 20, 30, 40, 60, 80])),
+        'avaliacao_media': round(rng.uniform(3.5, 5.0), 1),
+        'taxa_conclusao_media': round(rng.uniform(50, 95), 1),
+        'popularidade_score': float(rng.randint(10, 100))
+    } for id_curso in ids]
+
+
+def medir(funcao, argumentos, iteracoes, aquecimento):
+    """Latências (s) de `iteracoes` chamadas, percorrendo `argumentos` em ciclo."""
+    for i in range(aquecimento):
+        funcao(*argumentos[i % len(argumentos)])
+    tempos = []
+    for i in range(iteracoes):
+        args = argumentos[i % len(argumentos)]
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao(*argumentos[0])
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tempos, pico
+
+
+def resumir(tempos, pico, n_cursos):
+    ms = np.array(tempos) * 1000
+    total = float(np.sum(tempos))
+    return {
+        'iteracoes': len(tempos),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'media_ms': round(float(ms.mean()), 4),
+        'chamadas_por_segundo': round(len(tempos) / total, 1),
+        'cursos_por_segundo': round(len(tempos) * n_cursos / total, 1),
+        'pico_memoria_mb': round(pico / 2 ** 20, 3)
+    }
+
+
+def executar(tamanhos, usuarios, iteracoes, aquecimento, quantidade, rng):
+    cliente = app.app.test_client()
+    colunas_reg = app.features_config['regressao']
+    resultados = {}
+
+    for n in tamanhos:
+        cursos = gerar_catalogo(rng, n)
+        colunas = app.colunas_cursos(cursos)
+        features = [app.criar_features_perfis([u], colunas) for u in usuarios]
+        entradas = [app.entrada_modelo(app.modelo_regressao, app.matriz_features(f, colunas_reg), colunas_reg)
+                    for f in features]
+        scores = [np.clip(app.modelo_regressao.predict(X), 0, 10) for X in entradas]
+        corpos = [json.dumps({'usuario': u, 'cursos': cursos, 'quantidade': quantidade}) for u in usuarios]
+
+        def recomendar(corpo):
+            resposta = cliente.post('/recomendar', data=corpo, content_type='application/json')
+            if resposta.status_code != 200:
+                raise RuntimeError(f"/recomendar respondeu {resposta.status_code}: {resposta.get_data(as_text=True)}")
+
+        etapas = {
+            'criar_features': (lambda u: app.criar_features_perfis([u], colunas), [(u,) for u in usuarios]),
+            'predicao': (app.modelo_regressao.predict, [(X,) for X in entradas]),
+            'regras_negocio': (app.aplicar_regras_negocio_lote, list(zip(scores, features))),
+            'recomendar': (recomendar, [(c,) for c in corpos])
+        }
+        resultados[str(n)] = {}
+        for etapa in ETAPAS:
+            funcao, argumentos = etapas[etapa]
+            tempos, pico = medir(funcao, argumentos, iteracoes, aquecimento)
+            resultados[str(n)][etapa] = resumir(tempos, pico, n)
+            r = resultados[str(n)][etapa]
+            print(f"  {n:>6} cursos  {etapa:<15} p50 {r['p50_ms']:9.3f} ms  p95 {r['p95_ms']:9.3f} ms  "
+                  f"p99 {r['p99_ms']:9.3f} ms  {r['chamadas_por_segundo']:9.1f}/s", file=sys.stderr)
+    return resultados
+
+
+def latencias(tempos):
+    ms = np.array(tempos) * 1000
+    return {'p50_ms': round(float(np.percentile(ms, 50)), 4), 'p95_ms': round(float(np.percentile(ms, 95)), 4),
+            'media_ms': round(float(ms.mean()), 4)}
+
+
+def avaliar_aproximado(tamanhos, usuarios, folgas, iteracoes, quantidade, rng):
+    """Recall@N e latência (ms) do ranking aproximado, por tamanho e folga (memória de previsões vazia)."""
+    memo = app.registro.ativa.memo
+
+    def ranquear(u, cursos, colunas, folga=None):
+        memo.invalidar()
+        return app.ranquear_top(u, cursos, quantidade, colunas, folga)
+
+    resultados = {}
+    for n in tamanhos:
+        cursos = gerar_catalogo(rng, n)
+        colunas = app.colunas_cursos(cursos)
+        exatos = [ranquear(u, cursos, colunas) for u in usuarios]
+        argumentos = [(u,) for u in usuarios]
+        tempos, _ = medir(lambda u: ranquear(u, cursos, colunas), argumentos, iteracoes, 1)
+        exato = resultados[str(n)] = {'exato': latencias(tempos)}
+        print(f"  {n:>6} cursos  exato{'':<13} p50 {exato['exato']['p50_ms']:9.3f} ms  "
+              f"p95 {exato['exato']['p95_ms']:9.3f} ms  média {exato['exato']['media_ms']:9.3f} ms", file=sys.stderr)
+
+        for folga in folgas:
+            recalls = []
+            for u, (ordem_exata, _) in zip(usuarios, exatos):
+                ordem, _ = ranquear(u, cursos, colunas, folga)
+                if len(ordem_exata):
+                    recalls.append(len(set(ordem.tolist()) & set(ordem_exata.tolist())) / len(ordem_exata))
+            tempos, _ = medir(lambda u: ranquear(u, cursos, colunas, folga), argumentos, iteracoes, 1)
+            r = resultados[str(n)][str(folga)] = {
+                'recall': round(float(np.mean(recalls)), 4) if recalls else 1.0,
+                'recall_minimo': round(float(np.min(recalls)), 4) if recalls else 1.0,
+                **latencias(tempos)
+            }
+            # Aceleração pela média: o ganho está nos perfis cujo top não satura no teto de 10
+            r['aceleracao'] = round(exato['exato']['media_ms'] / r['media_ms'], 2)
+            r['aceleracao_p95'] = round(exato['exato']['p95_ms'] / r['p95_ms'], 2)
+            print(f"  {n:>6} cursos  folga {folga:<6} recall@{quantidade} {r['recall']:.4f}  "
+                  f"p50 {r['p50_ms']:9.3f} ms  p95 {r['p95_ms']:9.3f} ms  média {r['media_ms']:9.3f} ms  "
+                  f"({r['aceleracao']}x)", file=sys.stderr)
+    return resultados
+
+
+def comparar(atual, baseline, tolerancia):
+    """Lista de regressões (textos) de `atual` em relação a `baseline`."""
+    regressoes = []
+    for n, etapas in atual['resultados'].items():
+        for etapa, r in etapas.items():
+            base = baseline.get('resultados', {}).get(n, {}).get(etapa)
+            if base is None:
+                continue
+            for metrica in ('p50_ms', 'p95_ms', 'p99_ms'):
+                antes, depois = base[metrica], r[metrica]
+                if depois > antes * (1 + tolerancia) and depois - antes > FOLGA_MS:
+                    regressoes.append(f"{n} cursos / {etapa} / {metrica}: {antes:.3f} -> {depois:.3f} ms "
+                                      f"(+{(depois / antes - 1) * 100:.0f}%)")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do caminho de recomendação')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS)
+    parser.add_argument('--usuarios', default='usuarios.csv')
+    parser.add_argument('--perfis', type=int, default=20, help='perfis sorteados (usados em ciclo)')
+    parser.add_argument('--iteracoes', type=int, default=50)
+    parser.add_argument('--aquecimento', type=int, default=3)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: stdout)')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='piora relativa aceita antes de marcar regressão (padrão 0.2 = 20%%)')
+    parser.add_argument('--aproximado', type=float, nargs='+', metavar='FOLGA',
+                        help='mede recall@N e latência do ranking aproximado com estas folgas')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semente)
+    usuarios = gerar_usuarios(rng, distribuicoes_usuarios(args.usuarios), args.perfis)
+
+    print(f"⏱️  Benchmark: {len(args.tamanhos)} tamanhos x {args.iteracoes} iterações", file=sys.stderr)
+    inicio = time.perf_counter()
+    resultados = executar(args.tamanhos, usuarios, args.iteracoes, args.aquecimento, args.top_n, rng)
+
+    relatorio = {
+        'meta': {
+            'data': datetime.now().isoformat(),
+            'duracao_s': round(time.perf_counter() - inicio, 2),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'modelo': type(app.modelo_regressao).__name__,
+            'versao_modelo': app.registro.ativa.nome,
+            'semente': args.semente,
+            'perfis': args.perfis,
+            'top_n': args.top_n
+        },
+        'processo': memoria_processo(),
+        'resultados': resultados
+    }
+    if args.aproximado:
+        print(f"🎯 Ranking aproximado (estágios {app.ESTAGIOS_APROXIMADO})", file=sys.stderr)
+        relatorio['aproximado'] = {
+            'estagios': app.ESTAGIOS_APROXIMADO,
+            'resultados': avaliar_aproximado(args.tamanhos, usuarios, args.aproximado, args.iteracoes,
+                                             args.top_n, rng)
+        }
+
+    regressoes = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressoes = comparar(relatorio, baseline, args.tolerancia)
+        relatorio['comparacao'] = {'baseline': args.baseline, 'tolerancia': args.tolerancia,
+                                   'regressoes': regressoes}
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"✓ Resultado em {args.saida}", file=sys.stderr)
+    else:
+        print(texto)
+
+    if args.baseline:
+        for r in regressoes:
+            print(f"❌ Regressão: {r}", file=sys.stderr)
+        if regressoes:
+            return 1
+        print(f"✅ Sem regressões em relação a {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+SkillBridge - Cache de Recomendações por Perfil
+===============================================
+Para uma mesma versão de catálogo e de modelo, o ranking depende apenas do
+perfil já mapeado por criar_features. Usuários com o mesmo perfil
+normalizado recebem o mesmo resultado, então ele pode ser reaproveitado.
+
+- Cache em memória do processo, com LRU + TTL e número máximo de itens.
+- Backend compartilhado opcional em SQLite (arquivo local), para que os
+  workers do gunicorn na mesma máquina aproveitem os resultados uns dos outros.
+  Cada processo abre a sua conexão no primeiro uso: com preload_app o backend
+  é criado no master, e uma conexão SQLite não pode atravessar o fork.
+- Contadores de hit/miss expostos no /health.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import codec_json
+
+
+class BackendSqlite:
+    """Cache compartilhado entre processos da mesma máquina."""
+
+    def __init__(self, caminho, max_itens):
+        self.caminho = caminho
+        self.max_itens = max_itens
+        self._lock = threading.Lock()
+        # Cria a tabela já (erros de caminho aparecem na inicialização) e fecha a conexão
+        conn = self._conectar()
+        conn.close()
+        self._conn = None
+        self._pid = None
+        self._escritas = 0
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=1.0, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache '
+                     '(chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira REAL NOT NULL)')
+        return conn
+
+    def _conexao(self):
+        """Conexão deste processo (chamar com o lock); depois de um fork abre outra."""
+        if self._pid != os.getpid():
+            # A conexão herdada do pai é abandonada, não fechada: ela é do outro processo
+            self._conn = self._conectar()
+            self._pid = os.getpid()
+        return self._conn
+
+    def obter(self, chave):
+        with self._lock:
+            linha = self._conexao().execute('SELECT valor, expira FROM cache WHERE chave = ?', (chave,)).fetchone()
+        if linha is None or linha[1] < time.time():
+            return None
+        return codec_json.loads(linha[0])
+
+    def guardar(self, chave, valor, ttl):
+        agora = time.time()
+        with self._lock:
+            conn = self._conexao()
+            conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                         (chave, codec_json.dumps(valor), agora + ttl))
+            self._escritas += 1
+            if self._escritas % 256 == 0:
+                # Remove expirados e, se ainda passar do limite, os que expiram primeiro
+                conn.execute('DELETE FROM cache WHERE expira < ?', (agora,))
+                conn.execute('DELETE FROM cache WHERE chave IN (SELECT chave FROM cache '
+                             'ORDER BY expira DESC LIMIT -1 OFFSET ?)', (self.max_itens,))
+
+    def limpar(self):
+        with self._lock:
+            self._conexao().execute('DELETE FROM cache')
+
+
+class CacheRecomendacoes:
+
+    def __init__(self, max_itens=10000, ttl=300.0, backend=None):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.backend = backend
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+
+    @property
+    def ativo(self):
+        return self.max_itens > 0 and self.ttl > 0
+
+    def obter(self, chave):
+        """Retorna o valor guardado ou None (contabiliza hit/miss)."""
+        if not self.ativo:
+            return None
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[0] >= agora:
+                    self._itens.move_to_end(chave)
+                    self.hits += 1
+                    return item[1]
+                del self._itens[chave]
+
+        valor = self.backend.obter(chave) if self.backend is not None else None
+        with self._lock:
+            if valor is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._guardar_local(chave, valor, agora)
+        return valor
+
+    def guardar(self, chave, valor):
+        if not self.ativo:
+            return
+        with self._lock:
+            self._guardar_local(chave, valor, time.monotonic())
+        if self.backend is not None:
+            self.backend.guardar(chave, valor, self.ttl)
+
+    def _guardar_local(self, chave, valor, agora):
+        self._itens[chave] = (agora + self.ttl, valor)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    def invalidar(self):
+        """Descarta tudo (chamado quando o catálogo ou os modelos mudam)."""
+        with self._lock:
+            self._itens.clear()
+            self.invalidacoes += 1
+        if self.backend is not None:
+            self.backend.limpar()
+
+    def estatisticas(self):
+        total = self.hits + self.misses
+        return {
+            'ativo': self.ativo,
+            'itens': len(self._itens),
+            'max_itens': self.max_itens,
+            'ttl_segundos': self.ttl,
+            'compartilhado': self.backend is not None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'taxa_acerto': round(self.hits / total, 4) if total else 0.0,
+            'invalidacoes': self.invalidacoes
+        }
+
+
+def chave_perfil(perfil_normalizado, *partes):
+    """Chave textual (serve também para o backend SQLite) a partir de valores JSON."""
+    return codec_json.dumps_texto([perfil_normalizado, *partes])
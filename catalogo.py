@@ -0,0 +1,145 @@
+"""
+SkillBridge - Catálogo de Cursos no Servidor
+============================================
+Carrega os cursos uma única vez e pré-calcula as colunas que dependem
+apenas do curso (nível, carga horária, avaliação, taxa de conclusão e
+popularidade) em arrays NumPy contíguos.
+
+Com o catálogo carregado, os clientes podem enviar só o perfil (e,
+opcionalmente, `cursos_ids`) em vez da lista completa de cursos.
+
+O estado fica em um snapshot imutável: recarregar ou fazer upsert monta um
+snapshot novo e troca a referência de uma vez, então requisições em
+andamento continuam usando o snapshot que já tinham.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ID_MINIMO = 10000
+
+
+def validar_ids(ids):
+    """Devolve `ids` se for None ou uma lista de inteiros; senão ValueError."""
+    if ids is not None and not (isinstance(ids, list) and
+                                all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+        raise ValueError('"cursos_ids" deve ser uma lista de IDs inteiros')
+    return ids
+
+
+class _Snapshot:
+    __slots__ = ('cursos', 'colunas', 'posicoes', 'validos', 'versao', 'assinatura')
+
+    def __init__(self, cursos, colunas, versao):
+        self.cursos = cursos
+        self.colunas = colunas
+        self.posicoes = {c['id_curso']: i for i, c in enumerate(cursos)}
+        self.validos = np.flatnonzero(colunas['id_curso'] >= ID_MINIMO) if cursos else np.zeros(0, dtype=np.intp)
+        self.versao = versao
+        # Identifica o conteúdo (inclusive a ordem, que desempata o ranking), igual entre workers
+        conteudo = json.dumps(cursos, sort_keys=True, ensure_ascii=False, default=str)
+        self.assinatura = hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+class Catalogo:
+    """
+    Catálogo de cursos com colunas pré-calculadas.
+
+    `normalizar` converte um curso recebido (camelCase ou snake_case) para o
+    formato interno e `preparar_colunas` gera o dict coluna -> array usado
+    por criar_features_lote.
+    """
+
+    def __init__(self, caminho, normalizar, preparar_colunas):
+        self.caminho = caminho
+        self._normalizar = normalizar
+        self._preparar_colunas = preparar_colunas
+        self._lock = threading.Lock()
+        self._snapshot = self._montar([], 0)
+
+    def _montar(self, cursos, versao):
+        colunas = {k: np.ascontiguousarray(v) for k, v in self._preparar_colunas(cursos).items()}
+        return _Snapshot(cursos, colunas, versao)
+
+    def _normalizar_lista(self, cursos):
+        """Cursos no formato interno; ValueError se algum não for um objeto ou tiver campo numérico inválido."""
+        normalizados = []
+        for i, c in enumerate(cursos):
+            if not isinstance(c, dict):
+                raise ValueError(f"cursos[{i}]: esperado um objeto")
+            try:
+                curso = self._normalizar(c)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"cursos[{i}]: {e}") from None
+            if curso.get('id_curso') is None:
+                continue
+            if c.get('area'):
+                curso['area'] = c['area']
+            normalizados.append(curso)
+        return normalizados
+
+    @property
+    def versao(self):
+        return self._snapshot.versao
+
+    @property
+    def assinatura(self):
+        return self._snapshot.assinatura
+
+    def __len__(self):
+        return len(self._snapshot.cursos)
+
+    def carregar(self):
+        """(Re)carrega o catálogo do arquivo. Retorna o total de cursos."""
+        if not os.path.exists(self.caminho):
+            logger.warning(f"Catálogo {self.caminho} não encontrado, iniciando vazio")
+            cursos = []
+        else:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            if isinstance(dados, dict):
+                dados = dados.get('cursos', [])
+            cursos = self._normalizar_lista(dados)
+
+        # Mantém a última ocorrência de cada id, na ordem do arquivo
+        unicos = {c['id_curso']: c for c in cursos}
+        with self._lock:
+            self._snapshot = self._montar(list(unicos.values()), self._snapshot.versao + 1)
+        logger.info(f"✓ Catálogo carregado: {len(unicos)} cursos (versão {self.versao})")
+        return len(unicos)
+
+    def upsert(self, cursos):
+        """Insere ou atualiza cursos pelo id. Retorna (inseridos, atualizados)."""
+        novos = self._normalizar_lista(cursos)
+        with self._lock:
+            atual = self._snapshot
+            por_id = {c['id_curso']: c for c in atual.cursos}
+            inseridos = sum(1 for c in {c['id_curso'] for c in novos} if c not in por_id)
+            for c in novos:
+                por_id[c['id_curso']] = c
+            self._snapshot = self._montar(list(por_id.values()), atual.versao + 1)
+        return inseridos, len({c['id_curso'] for c in novos}) - inseridos
+
+    def selecionar(self, ids=None):
+        """
+        Retorna (cursos, colunas, assinatura) dos cursos recomendáveis (ID >= 10000).
+        Com `ids`, mantém a ordem pedida e ignora ids fora do catálogo;
+        ValueError se `ids` não for uma lista de inteiros (ver validar_ids).
+        """
+        ids = validar_ids(ids)
+        snap = self._snapshot
+        if ids is None:
+            indices = snap.validos
+        else:
+            indices = np.array([snap.posicoes[i] for i in ids
+                                if i in snap.posicoes and i >= ID_MINIMO], dtype=np.intp)
+        cursos = [snap.cursos[i] for i in indices.tolist()]
+        colunas = {k: v[indices] for k, v in snap.colunas.items()}
+        return cursos, colunas, snap.assinatura
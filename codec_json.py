@@ -0,0 +1,55 @@
+"""
+SkillBridge - Codec JSON
+========================
+Backend de JSON plugável usado pela API (Flask e ASGI), pelo cache e pelo
+job em lote. Usa o orjson quando instalado (dependência opcional, em C) e
+cai para o json da biblioteca padrão; SKILLBRIDGE_JSON=json força o padrão.
+
+`dumps` devolve bytes já em UTF-8, prontos para o corpo da resposta, sem
+passar por uma str intermediária. A saída segue o jsonify do Flask: chaves
+ordenadas e separadores compactos. O orjson escreve os acentos direto em
+UTF-8 em vez de escapes \\uXXXX; para quem lê é o mesmo JSON.
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.environ.get('SKILLBRIDGE_JSON', 'orjson') == 'json':
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _padrao(obj):
+    # Escalares e arrays NumPy que escaparem para a resposta
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+if orjson is not None:
+    _OPCOES = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj):
+        """Serializa `obj` em bytes UTF-8."""
+        return orjson.dumps(obj, default=_padrao, option=_OPCOES)
+
+    loads = orjson.loads
+else:
+    _codificador = json.JSONEncoder(sort_keys=True, separators=(',', ':'), default=_padrao)
+
+    def dumps(obj):
+        """Serializa `obj` em bytes UTF-8."""
+        return _codificador.encode(obj).encode('utf-8')
+
+    loads = json.loads
+
+
+def dumps_texto(obj):
+    """Mesmo que dumps, como str (chaves de cache, colunas de texto)."""
+    return dumps(obj).decode('utf-8')
@@ -0,0 +1,32 @@
+"""
+Configuração do gunicorn para o SkillBridge.
+
+Com preload_app o app.py (e os modelos) é importado uma vez no master antes
+do fork. Os modelos compilados são memory-mapped somente leitura, então os
+workers compartilham as mesmas páginas físicas e dá para usar um worker por
+core sem multiplicar a memória.
+
+    $ gunicorn -c gunicorn.conf.py app:app
+"""
+
+import logging
+import multiprocessing
+import os
+
+from recursos import resumo_memoria
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '7860')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def when_ready(server):
+    logger.info(f"✓ Master pronto com {server.cfg.workers} workers ({resumo_memoria()})")
+
+
+def post_fork(server, worker):
+    logger.info(f"✓ Worker {worker.pid} iniciado ({resumo_memoria()})")
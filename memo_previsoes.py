@@ -0,0 +1,161 @@
+"""
+SkillBridge - Memória de Previsões por Vetor de Features
+========================================================
+Boa parte das features é discreta (níveis, escolaridade, flags match_*) e as
+contínuas do perfil (idade, tempo disponível...) assumem poucos valores, então
+muitos pares (usuário, curso) geram exatamente o mesmo vetor de features.
+
+MemoPrevisoes guarda, para os bytes de cada vetor, o par (score_base, prob)
+já previsto pelas florestas:
+
+- dentro de um lote, linhas iguais são previstas uma vez só;
+- entre chamadas, vetores já vistos não passam de novo pelo modelo
+  (LRU limitado a `max_itens`).
+
+A previsão de uma linha não depende das outras linhas da matriz, então o
+resultado é idêntico ao de chamar o modelo sobre todas as linhas.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SCORE_BASE = 0
+PROB = 1
+
+
+def _hash_linhas(X):
+    """Hash de 64 bits dos bytes de cada linha (FNV-1a por coluna, vetorizado)."""
+    palavras = X.view(np.uint64)
+    h = np.full(len(X), np.uint64(0xcbf29ce484222325))
+    for j in range(palavras.shape[1]):
+        h ^= palavras[:, j]
+        h *= np.uint64(0x100000001b3)
+        h ^= h >> np.uint64(29)
+    return h
+
+
+def agrupar_linhas(X):
+    """
+    (primeiras, inverso): índice de uma linha de cada vetor distinto de X
+    (matriz float64 contígua) e, para cada linha, a posição do seu vetor em
+    `primeiras`. Agrupa pelo hash e confere os bytes; se houver colisão,
+    refaz comparando as linhas inteiras.
+    """
+    _, primeiras, inverso = np.unique(_hash_linhas(X), return_index=True, return_inverse=True)
+    inverso = inverso.ravel()
+    if len(primeiras) < len(X) and not np.array_equal(X[primeiras[inverso]], X, equal_nan=True):
+        vetores = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, primeiras, inverso = np.unique(vetores, return_index=True, return_inverse=True)
+        inverso = inverso.ravel()
+    return primeiras, inverso
+
+
+class MemoPrevisoes:
+
+    def __init__(self, max_itens=100000):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.linhas = 0
+        self.vetores_unicos = 0
+        self.hits = 0
+        self.previstas = 0
+        self.despejados = 0
+
+    def consultar(self, X, campo, prever):
+        """
+        Valor de `campo` (SCORE_BASE ou PROB) para cada linha de X (a matriz
+        que identifica o vetor de features). `prever(linhas)` recebe os índices
+        das linhas de X que precisam passar pelo modelo, uma por vetor distinto
+        sem valor guardado, e devolve um array com os valores.
+        """
+        n = len(X)
+        if n == 0:
+            return np.zeros(0)
+        X = np.ascontiguousarray(X)
+        primeiras, inverso = agrupar_linhas(X)
+        if self.max_itens <= 0:
+            valores = prever(primeiras)
+            with self._lock:
+                self.linhas += n
+                self.vetores_unicos += len(primeiras)
+                self.previstas += len(primeiras)
+            return valores[inverso]
+
+        largura = X.shape[1] * X.dtype.itemsize
+        dados = X[primeiras].tobytes()
+        chaves = [dados[i:i + largura] for i in range(0, len(dados), largura)]
+
+        valores = [None] * len(chaves)
+        faltam = []
+        with self._lock:
+            for j, chave in enumerate(chaves):
+                entrada = self._itens.get(chave)
+                if entrada is None or entrada[campo] is None:
+                    faltam.append(j)
+                else:
+                    self._itens.move_to_end(chave)
+                    valores[j] = entrada[campo]
+
+        novos = prever(primeiras[faltam]).tolist() if faltam else []
+        for j, valor in zip(faltam, novos):
+            valores[j] = valor
+
+        with self._lock:
+            self.linhas += n
+            self.vetores_unicos += len(chaves)
+            self.hits += len(chaves) - len(faltam)
+            self.previstas += len(faltam)
+            for j, valor in zip(faltam, novos):
+                entrada = self._itens.get(chaves[j])
+                if entrada is None:
+                    entrada = self._itens[chaves[j]] = [None, None]
+                else:
+                    self._itens.move_to_end(chaves[j])
+                entrada[campo] = valor
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.despejados += 1
+        return np.array(valores, dtype=np.float64)[inverso]
+
+    def guardados(self, X, campo):
+        """
+        Valor guardado de `campo` para cada linha de X, NaN nas linhas cujo
+        vetor ainda não foi previsto. Só consulta: não chama o modelo, não
+        guarda nada e não entra nas estatísticas.
+        """
+        n = len(X)
+        if n == 0 or self.max_itens <= 0:
+            return np.full(n, np.nan)
+        X = np.ascontiguousarray(X)
+        primeiras, inverso = agrupar_linhas(X)
+        largura = X.shape[1] * X.dtype.itemsize
+        dados = X[primeiras].tobytes()
+        with self._lock:
+            valores = []
+            for i in range(0, len(dados), largura):
+                entrada = self._itens.get(dados[i:i + largura])
+                valores.append(np.nan if entrada is None or entrada[campo] is None else entrada[campo])
+        return np.array(valores, dtype=np.float64)[inverso]
+
+    def invalidar(self):
+        """Descarta as previsões guardadas (modelos trocados)."""
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'linhas': self.linhas,
+                'vetores_unicos': self.vetores_unicos,
+                'hits': self.hits,
+                'previstas': self.previstas,
+                'despejados': self.despejados,
+                # Fração das linhas que não precisaram passar pelo modelo
+                'economia_lote': round(1 - self.vetores_unicos / self.linhas, 4) if self.linhas else 0.0,
+                'economia_total': round(1 - self.previstas / self.linhas, 4) if self.linhas else 0.0
+            }
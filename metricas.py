@@ -0,0 +1,189 @@
+"""
+SkillBridge - Métricas e Profiler por Amostragem
+================================================
+Histogramas de latência por etapa e contadores de requisições, expostos no
+formato texto do Prometheus (GET /metrics). As métricas são do processo:
+com vários workers do gunicorn, cada um expõe as suas (o Prometheus agrega
+por instância).
+
+    with metricas.etapa('regressao'):
+        modelo.predict(X)
+
+    @metricas.cronometrar('features')
+    def criar_features_perfis(...): ...
+
+O profiler por amostragem é opcional (SKILLBRIDGE_PROFILER_HZ): uma thread
+lê a pilha das outras threads algumas vezes por segundo e conta cada pilha
+no formato "collapsed" (uma linha `f1;f2;f3 contagem`), que o flamegraph.pl
+e o speedscope abrem direto. O custo fica na thread de amostragem, não nas
+requisições.
+"""
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Limites dos buckets de latência, em segundos
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _serie(nome, rotulos):
+    if not rotulos:
+        return nome
+    return nome + '{' + ','.join(f'{k}="{v}"' for k, v in rotulos) + '}'
+
+
+class Histograma:
+    __slots__ = ('contagens', 'soma', 'total')
+
+    def __init__(self):
+        self.contagens = [0] * (len(BUCKETS) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(BUCKETS, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Metricas:
+    """Registro de histogramas e contadores, indexados por (nome, rótulos)."""
+
+    def __init__(self, prefixo='skillbridge'):
+        self.prefixo = prefixo
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+        self._ajuda = {}
+
+    def observar(self, nome, valor, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(valor)
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def descrever(self, nome, ajuda):
+        self._ajuda[nome] = ajuda
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o bloco no histograma etapa_segundos{etapa=nome}."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar('etapa_segundos', time.perf_counter() - inicio, etapa=nome)
+
+    def cronometrar(self, nome):
+        """Decorador: mede cada chamada da função como a etapa `nome`."""
+        def decorador(funcao):
+            @wraps(funcao)
+            def medida(*args, **kwargs):
+                inicio = time.perf_counter()
+                try:
+                    return funcao(*args, **kwargs)
+                finally:
+                    self.observar('etapa_segundos', time.perf_counter() - inicio, etapa=nome)
+            return medida
+        return decorador
+
+    def formato_prometheus(self, medidores=None):
+        """
+        Texto no formato de exposição do Prometheus. `medidores` é um dict
+        opcional nome -> valor com gauges calculados na hora (cache, catálogo...).
+        """
+        with self._lock:
+            histogramas = {k: (list(h.contagens), h.soma, h.total) for k, h in self._histogramas.items()}
+            contadores = dict(self._contadores)
+
+        linhas = []
+        for tipo, itens in (('counter', contadores), ('histogram', histogramas)):
+            for nome in sorted({n for n, _ in itens}):
+                completo = f'{self.prefixo}_{nome}'
+                if nome in self._ajuda:
+                    linhas.append(f'# HELP {completo} {self._ajuda[nome]}')
+                linhas.append(f'# TYPE {completo} {tipo}')
+                for (n, rotulos), valor in sorted(itens.items()):
+                    if n != nome:
+                        continue
+                    if tipo == 'counter':
+                        linhas.append(f'{_serie(completo, rotulos)} {valor}')
+                        continue
+                    contagens, soma, total = valor
+                    acumulado = 0
+                    for limite, contagem in zip(BUCKETS + ('+Inf',), contagens):
+                        acumulado += contagem
+                        linhas.append(f"{_serie(completo + '_bucket', rotulos + (('le', limite),))} {acumulado}")
+                    linhas.append(f"{_serie(completo + '_sum', rotulos)} {soma:.6f}")
+                    linhas.append(f"{_serie(completo + '_count', rotulos)} {total}")
+
+        for nome, valor in (medidores or {}).items():
+            completo = f'{self.prefixo}_{nome}'
+            linhas.append(f'# TYPE {completo} gauge')
+            linhas.append(f'{completo} {valor}')
+        return '\n'.join(linhas) + '\n'
+
+
+def faixa_catalogo(n):
+    """Faixa do número de cursos, para rotular sem criar uma série por tamanho."""
+    for limite in (10, 100, 1000, 10000):
+        if n <= limite:
+            return f'ate_{limite}'
+    return 'acima_10000'
+
+
+class AmostradorPilhas:
+    """Profiler por amostragem: conta as pilhas das threads do processo."""
+
+    def __init__(self, hz):
+        self.intervalo = 1.0 / hz
+        self.pilhas = {}
+        self.amostras = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def garantir(self):
+        """Inicia a thread no processo atual (threads não sobrevivem ao fork do gunicorn)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._amostrar, name='amostrador-pilhas', daemon=True).start()
+
+    def _amostrar(self):
+        propria = threading.get_ident()
+        while True:
+            time.sleep(self.intervalo)
+            for ident, frame in sys._current_frames().items():
+                if ident == propria:
+                    continue
+                nomes = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    nomes.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)})')
+                    frame = frame.f_back
+                pilha = ';'.join(reversed(nomes))
+                with self._lock:
+                    self.pilhas[pilha] = self.pilhas.get(pilha, 0) + 1
+                    self.amostras += 1
+
+    def collapsed(self):
+        with self._lock:
+            itens = sorted(self.pilhas.items(), key=lambda item: -item[1])
+        return ''.join(f'{pilha} {contagem}\n' for pilha, contagem in itens)
+
+    def limpar(self):
+        with self._lock:
+            self.pilhas.clear()
+            self.amostras = 0
@@ -0,0 +1,65 @@
+"""
+SkillBridge - Núcleo de Pontuação
+=================================
+Implementação única das features, das regras de negócio e do carregamento
+dos modelos, usada pela API (app.py e app_asgi.py), pelo job em lote e pelos
+scripts de teste.
+
+    from pontuacao import Perfil, criar_features, aplicar_regras_negocio
+
+Os nomes são importados sob demanda: usar só as regras escalares
+(pontuacao.regras) não carrega NumPy, pandas nem scikit-learn; o NumPy entra
+com as versões vetorizadas e o pandas/sklearn só quando um modelo .pkl é
+carregado ou recebe um DataFrame.
+
+    mapas            -> NIVEL_EXP_MAP, ESCOLARIDADE_MAP, NIVEL_CURSO_MAP, CARREIRAS_CURSOS
+    registros        -> Perfil e Curso (__slots__)
+    regras           -> criar_features, aplicar_regras_negocio, gerar_motivo (um curso)
+    vetorizado       -> as mesmas regras para um catálogo inteiro (NumPy)
+    modelos          -> carregar_modelos, entrada_modelo, pontuar_cursos
+    motor_arvores    -> FlorestaCompilada (florestas em arrays NumPy) e a compilação dos .pkl
+    indice_carreiras -> IndiceCarreiras (bitmap curso -> carreiras)
+"""
+
+import importlib
+
+_ORIGEM = {
+    'NIVEL_EXP_MAP': 'mapas',
+    'ESCOLARIDADE_MAP': 'mapas',
+    'NIVEL_CURSO_MAP': 'mapas',
+    'CARREIRAS_CURSOS': 'mapas',
+    'CURSOS_POR_CARREIRA': 'mapas',
+    'Perfil': 'registros',
+    'Curso': 'registros',
+    'criar_features': 'regras',
+    'aplicar_regras_negocio': 'regras',
+    'gerar_motivo': 'regras',
+    'INDICE_CARREIRAS': 'vetorizado',
+    'colunas_cursos': 'vetorizado',
+    'criar_features_perfis': 'vetorizado',
+    'matriz_features': 'vetorizado',
+    'aplicar_regras_negocio_lote': 'vetorizado',
+    'flags_motivo_lote': 'vetorizado',
+    'texto_motivo': 'vetorizado',
+    'Modelos': 'modelos',
+    'carregar_modelos': 'modelos',
+    'entrada_modelo': 'modelos',
+    'pontuar_cursos': 'modelos',
+    'FlorestaCompilada': 'motor_arvores',
+    'IndiceCarreiras': 'indice_carreiras',
+}
+
+__all__ = sorted(_ORIGEM)
+
+
+def __getattr__(nome):
+    modulo = _ORIGEM.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f'{__name__}.{modulo}'), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_ORIGEM))
@@ -0,0 +1,43 @@
+"""
+SkillBridge - Índice de Cursos por Carreira
+===========================================
+Compila CARREIRAS_CURSOS uma vez na inicialização:
+
+- um frozenset de ids por carreira (lookup O(1) no lugar da busca em lista);
+- um índice invertido curso -> carreiras, guardado como bitmap (um bit por
+  carreira), que permite calcular match_carreira para um catálogo inteiro
+  com uma única operação NumPy.
+"""
+
+import numpy as np
+
+
+class IndiceCarreiras:
+
+    def __init__(self, carreiras_cursos):
+        self.carreiras = tuple(carreiras_cursos)
+        if len(self.carreiras) > 63:
+            raise ValueError("O bitmap de carreiras suporta no máximo 63 carreiras")
+
+        self.bits = {nome: 1 << i for i, nome in enumerate(self.carreiras)}
+        self.por_carreira = {nome: frozenset(ids) for nome, ids in carreiras_cursos.items()}
+
+        self.mascaras = {}
+        for nome, ids in self.por_carreira.items():
+            for id_curso in ids:
+                self.mascaras[id_curso] = self.mascaras.get(id_curso, 0) | self.bits[nome]
+
+    def cursos_da_carreira(self, carreira):
+        return self.por_carreira.get(carreira, frozenset())
+
+    def carreiras_do_curso(self, id_curso):
+        mascara = self.mascaras.get(id_curso, 0)
+        return [nome for nome in self.carreiras if mascara & self.bits[nome]]
+
+    def mascaras_cursos(self, ids):
+        """Bitmap de carreiras de cada id, como array int64."""
+        return np.array([self.mascaras.get(i, 0) for i in ids], dtype=np.int64)
+
+    def match(self, carreira, mascaras):
+        """match_carreira (0/1) para um array de bitmaps de mascaras_cursos."""
+        return ((mascaras & self.bits.get(carreira, 0)) != 0).astype(np.int64)
@@ -0,0 +1,29 @@
+"""Mapeamentos de categorias para números e cursos (ID >= 10000) de cada carreira."""
+
+NIVEL_EXP_MAP = {'Junior': 1, 'Intermediário': 2, 'Senior': 3}
+ESCOLARIDADE_MAP = {'Ensino Fundamental': 1, 'Ensino Médio': 2, 'Técnico': 3,
+                    'Superior Incompleto': 4, 'Superior Completo': 5,
+                    'Pós-graduação': 6, 'Mestrado': 7, 'Doutorado': 8}
+NIVEL_CURSO_MAP = {'BASICO': 1, 'INTERMEDIARIO': 2, 'AVANCADO': 3}
+
+# Cursos com ID >= 10000 por carreira
+CARREIRAS_CURSOS = {
+    'Desenvolvedor Full Stack': [10034, 10035, 10036, 10037, 10038, 10039, 10040, 10041, 10042, 10043],
+    'Desenvolvedor Frontend': [10034, 10035, 10036, 10044, 10045, 10046, 10047, 10048, 10049, 10050, 10051, 10052, 10053],
+    'Desenvolvedor Backend': [10037, 10038, 10054, 10055, 10056, 10057, 10058, 10059, 10060, 10061, 10062, 10063],
+    'Desenvolvedor Mobile': [10064, 10065, 10066, 10067, 10068, 10069, 10070, 10071, 10072, 10073],
+    'Cientista de Dados': [10074, 10075, 10076, 10077, 10078, 10079, 10080, 10081, 10082, 10083],
+    'Engenheiro de Dados': [10084, 10085, 10086, 10087, 10088, 10089, 10090, 10091, 10092, 10093],
+    'Analista de Dados': [10094, 10095, 10096, 10097, 10098, 10099, 10100, 10101, 10102, 10103],
+    'DevOps Engineer': [10104, 10105, 10106, 10107, 10108, 10109, 10110, 10111, 10112, 10113],
+    'Designer UX/UI': [10114, 10115, 10116, 10117, 10118, 10119, 10120, 10121, 10122, 10123],
+    'Product Manager': [10124, 10125, 10126, 10127, 10128, 10129, 10130, 10131, 10132, 10133],
+    'Arquiteto de Software': [10134, 10135, 10136, 10137, 10138, 10139, 10140, 10141, 10142, 10143],
+    'Engenheiro de Machine Learning': [10144, 10145, 10146, 10147, 10148, 10149, 10150, 10151, 10152, 10153],
+    'Especialista em Cloud': [10154, 10155, 10156, 10157, 10158, 10159, 10160, 10161, 10162, 10163],
+    'Analista de Segurança': [10164, 10165, 10166, 10167, 10168, 10169, 10170, 10171, 10172, 10173],
+    'QA/Tester': [10174, 10175, 10176, 10177, 10178, 10179, 10180, 10181, 10182, 10183]
+}
+
+# Lookup O(1) de match_carreira na versão escalar
+CURSOS_POR_CARREIRA = {nome: frozenset(ids) for nome, ids in CARREIRAS_CURSOS.items()}
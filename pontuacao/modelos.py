@@ -0,0 +1,82 @@
+"""
+Carregamento dos modelos e pontuação completa de um catálogo.
+
+Se existirem modelos compilados (python -m pontuacao.motor_arvores), usa o
+motor NumPy e não importa o scikit-learn; senão abre os .pkl (o que importa o
+sklearn).
+O pandas só é importado para montar a entrada dos modelos do sklearn.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .motor_arvores import FlorestaCompilada
+from .vetorizado import aplicar_regras_negocio_lote, criar_features_perfis, matriz_features
+
+
+class Modelos:
+    __slots__ = ('regressao', 'classificacao', 'features', 'origem')
+
+    def __init__(self, regressao, classificacao, features: dict, origem: str):
+        self.regressao = regressao
+        self.classificacao = classificacao
+        # features.json: colunas de cada modelo, na ordem do treino
+        self.features = features
+        self.origem = origem
+
+
+def carregar_modelos(diretorio='.', compilados=None, permitir_pickle=True):
+    """
+    Modelos de `diretorio` (modelo_*.pkl e features.json). `compilados` é o
+    diretório do motor NumPy; o padrão é SKILLBRIDGE_MODELOS_COMPILADOS ou
+    modelos_compilados, usado quando existe. Sem compilados, os .pkl só são
+    abertos com `permitir_pickle` (pickle.load executa código do arquivo).
+    """
+    if compilados is None:
+        compilados = os.environ.get('SKILLBRIDGE_MODELOS_COMPILADOS', 'modelos_compilados')
+    with open(os.path.join(diretorio, 'features.json'), 'r') as f:
+        features = json.load(f)
+    if os.path.isdir(compilados):
+        return Modelos(FlorestaCompilada.carregar(os.path.join(compilados, 'regressao')),
+                       FlorestaCompilada.carregar(os.path.join(compilados, 'classificacao')),
+                       features, compilados)
+
+    if not permitir_pickle:
+        raise ValueError(f"Sem modelos compilados em {compilados} e o fallback para .pkl está desativado")
+    import pickle
+    with open(os.path.join(diretorio, 'modelo_regressao.pkl'), 'rb') as f:
+        regressao = pickle.load(f)
+    with open(os.path.join(diretorio, 'modelo_classificacao.pkl'), 'rb') as f:
+        classificacao = pickle.load(f)
+    return Modelos(regressao, classificacao, features, diretorio)
+
+
+def entrada_modelo(modelo, X, colunas):
+    """
+    O motor compilado recebe a matriz NumPy direto; os modelos do sklearn foram
+    treinados com nomes de colunas e recebem um DataFrame.
+    """
+    if isinstance(modelo, FlorestaCompilada):
+        return X
+    import pandas as pd
+    return pd.DataFrame(X, columns=colunas)
+
+
+def pontuar_cursos(modelos, perfil, colunas):
+    """
+    Pontua todos os cursos de `colunas` (ver colunas_cursos) para um perfil,
+    sem poda. Retorna (scores, probs, features): score final já limitado a
+    [0, 10] (sem arredondar), probabilidade de conclusão e as features.
+    """
+    features = criar_features_perfis([perfil], colunas)
+    if not len(colunas['id_curso']):
+        return np.zeros(0), np.zeros(0), features
+    colunas_reg = modelos.features['regressao']
+    colunas_class = modelos.features['classificacao']
+    X_reg = entrada_modelo(modelos.regressao, matriz_features(features, colunas_reg), colunas_reg)
+    X_class = entrada_modelo(modelos.classificacao, matriz_features(features, colunas_class), colunas_class)
+    scores_base = np.clip(modelos.regressao.predict(X_reg), 0, 10)
+    scores = np.clip(aplicar_regras_negocio_lote(scores_base, features), 0, 10)
+    return scores, modelos.classificacao.predict_proba(X_class)[:, 1], features
@@ -0,0 +1,301 @@
+"""
+SkillBridge - Motor de Inferência das Florestas
+===============================================
+Exporta os RandomForest treinados (modelo_regressao.pkl e
+modelo_classificacao.pkl) para arrays NumPy planos e avalia todas as
+árvores de uma vez, sem passar pelo predict genérico do scikit-learn.
+
+Cada modelo vira um diretório com um .npy por array:
+
+    feature, threshold   -> teste do nó (X[feature] <= threshold vai para a esquerda)
+    filhos               -> (n_nos, 2): esquerda e direita, já com índice global
+                            (todas as árvores concatenadas)
+    valor                -> previsão da folha (regressão) ou probabilidades por classe
+    raizes               -> índice global da raiz de cada árvore
+    meta.json            -> tipo, colunas, classes, profundidade máxima
+
+Os arrays são abertos com memory-map somente leitura: com o gunicorn em
+preload (ou mesmo sem ele), todos os workers usam as mesmas páginas do
+page cache em vez de uma cópia por processo.
+
+As folhas apontam para si mesmas com threshold = +inf, então a travessia é
+um laço de `profundidade_maxima` passos sem desvio por árvore. Lotes
+pequenos percorrem todas as árvores juntas (poucas operações NumPy grandes);
+lotes grandes percorrem uma árvore por vez, que cabe melhor no cache.
+
+Uso (etapa de build, precisa do scikit-learn):
+    $ python -m pontuacao.motor_arvores [destino]
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+ARRAYS = ('feature', 'threshold', 'filhos', 'valor', 'raizes')
+TAMANHO_BLOCO = 16384
+# Acima deste número de linhas a travessia por árvore é mais rápida
+LIMITE_TODAS_ARVORES = 1000
+
+
+def exportar_floresta(modelo, destino, colunas=None):
+    """Grava a floresta `modelo` (RandomForest do sklearn) como arrays planos em `destino`."""
+    arvores = [e.tree_ for e in modelo.estimators_]
+    classificador = hasattr(modelo, 'classes_')
+
+    feature, threshold, esquerda, direita, valor, raizes = [], [], [], [], [], []
+    inicio = 0
+    for t in arvores:
+        folha = t.children_left == -1
+        proprio = np.arange(t.node_count) + inicio
+        feature.append(np.where(folha, 0, t.feature))
+        threshold.append(np.where(folha, np.inf, t.threshold))
+        esquerda.append(np.where(folha, proprio, t.children_left + inicio))
+        direita.append(np.where(folha, proprio, t.children_right + inicio))
+        if classificador:
+            v = t.value[:, 0, :].astype(np.float64)
+            soma = v.sum(axis=1, keepdims=True)
+            soma[soma == 0.0] = 1.0
+            valor.append(v / soma)
+        else:
+            valor.append(t.value[:, 0, 0].astype(np.float64))
+        raizes.append(inicio)
+        inicio += t.node_count
+
+    os.makedirs(destino, exist_ok=True)
+    arrays = {
+        # Índices em int64: o NumPy converteria índices int32 para intp a cada passo
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'filhos': np.column_stack([np.concatenate(esquerda), np.concatenate(direita)]).astype(np.int64),
+        'valor': np.concatenate(valor),
+        'raizes': np.array(raizes, dtype=np.int64)
+    }
+    for nome, array in arrays.items():
+        np.save(os.path.join(destino, f'{nome}.npy'), np.ascontiguousarray(array))
+
+    if colunas is None and hasattr(modelo, 'feature_names_in_'):
+        colunas = [str(c) for c in modelo.feature_names_in_]
+    meta = {
+        'tipo': 'classificacao' if classificador else 'regressao',
+        'n_arvores': len(arvores),
+        'n_features': int(modelo.n_features_in_),
+        'colunas': colunas,
+        'classes': [int(c) for c in modelo.classes_] if classificador else None,
+        'profundidade_maxima': int(max(t.max_depth for t in arvores)),
+        'n_nos': int(inicio)
+    }
+    with open(os.path.join(destino, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class FlorestaCompilada:
+    """Floresta exportada por exportar_floresta, avaliada só com NumPy."""
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        # Views ndarray simples dos np.memmap (sem cópia): indexar a subclasse memmap
+        # tem um custo fixo alto por operação
+        arrays = {nome: np.asarray(array) for nome, array in arrays.items()}
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.filhos = arrays['filhos']
+        # filhos[nó * 2 + (x > threshold)] é o próximo nó; ravel de array contíguo não copia
+        self._filhos_plano = self.filhos.ravel()
+        self.valor = arrays['valor']
+        self.raizes = arrays['raizes']
+        self.n_features_in_ = meta['n_features']
+        if meta['classes'] is not None:
+            self.classes_ = np.array(meta['classes'])
+
+    @classmethod
+    def carregar(cls, diretorio, mmap=True):
+        with open(os.path.join(diretorio, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {nome: np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r' if mmap else None)
+                  for nome in ARRAYS}
+        return cls(arrays, meta)
+
+    def limiares(self):
+        """Thresholds de cada feature, ordenados e sem repetição (ver limiares_por_feature)."""
+        internos = np.isfinite(self.threshold)
+        return _agrupar_limiares(self.feature[internos], self.threshold[internos], self.n_features_in_)
+
+    def maximos_por_arvore(self):
+        """Maior valor de folha de cada árvore (regressão)."""
+        fins = np.append(self.raizes[1:], len(self.valor))
+        return [float(self.valor[i:j].max()) for i, j in zip(self.raizes, fins)]
+
+    def minimos_por_arvore(self):
+        """Menor valor de folha de cada árvore (regressão)."""
+        fins = np.append(self.raizes[1:], len(self.valor))
+        return [float(self.valor[i:j].min()) for i, j in zip(self.raizes, fins)]
+
+    def soma_arvores(self, X, inicio, fim, soma=None):
+        """
+        Soma das previsões das árvores inicio..fim-1 (regressão), sem dividir
+        pelo total, acumulada árvore a árvore sobre `soma` (zeros se None).
+        predict soma as folhas nessa mesma ordem, então continuar a soma das
+        árvores 0..inicio-1 até o fim dá exatamente a soma de predict.
+        """
+        X = np.asarray(X)
+        total = np.zeros(len(X)) if soma is None else np.array(soma, dtype=np.float64)
+        for i in range(0, len(X), TAMANHO_BLOCO):
+            parte = total[i:i + TAMANHO_BLOCO]
+            for valores in self.valor[self.folhas(X[i:i + TAMANHO_BLOCO], self.raizes[inicio:fim])]:
+                parte += valores
+        return total
+
+    def folhas(self, X, raizes=None):
+        """
+        Índice global da folha alcançada em cada árvore: array (n_arvores, n_amostras).
+        `raizes` restringe a avaliação a um subconjunto das árvores.
+        """
+        if raizes is None:
+            raizes = self.raizes
+        # O sklearn compara em float32 contra thresholds float64; mantém a mesma conversão
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        plano = X.ravel()
+        base = np.arange(n, dtype=np.intp) * n_features
+        profundidade = self.meta['profundidade_maxima']
+
+        if n <= LIMITE_TODAS_ARVORES:
+            base = base[np.newaxis, :]
+            nos = np.repeat(raizes[:, np.newaxis], n, axis=1).astype(np.intp)
+            for _ in range(profundidade):
+                nos = self._filhos_plano[2 * nos + (plano[base + self.feature[nos]] > self.threshold[nos])]
+            return nos
+
+        folhas = np.empty((len(raizes), n), dtype=np.intp)
+        for t, raiz in enumerate(raizes):
+            nos = np.full(n, raiz, dtype=np.intp)
+            for _ in range(profundidade):
+                nos = self._filhos_plano[2 * nos + (plano[base + self.feature[nos]] > self.threshold[nos])]
+            folhas[t] = nos
+        return folhas
+
+    def _media_folhas(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Esperado X com {self.n_features_in_} colunas, recebido {X.shape}")
+        partes = []
+        for i in range(0, len(X), TAMANHO_BLOCO):
+            folhas = self.folhas(X[i:i + TAMANHO_BLOCO])
+            partes.append(self.valor[folhas].sum(axis=0) / len(self.raizes))
+        if not partes:
+            return self.valor[:0]
+        return np.concatenate(partes)
+
+    def predict(self, X):
+        if self.meta['tipo'] == 'classificacao':
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        return self._media_folhas(X)
+
+    def predict_proba(self, X):
+        if self.meta['tipo'] != 'classificacao':
+            raise AttributeError("predict_proba só existe para o modelo de classificação")
+        return self._media_folhas(X)
+
+
+def _agrupar_limiares(feature, threshold, n_features):
+    return [np.unique(threshold[feature == f]) for f in range(n_features)]
+
+
+def limiares_por_feature(modelo):
+    """
+    Lista (uma posição por feature) com os thresholds usados pela floresta,
+    compilada ou do scikit-learn. A previsão só muda quando algum valor cruza
+    um desses thresholds, então dois valores de uma feature com o mesmo
+    resultado em faixa_limiares são indistinguíveis para o modelo.
+    """
+    if isinstance(modelo, FlorestaCompilada):
+        return modelo.limiares()
+    arvores = [e.tree_ for e in modelo.estimators_]
+    feature = np.concatenate([t.feature for t in arvores])
+    threshold = np.concatenate([t.threshold for t in arvores])
+    internos = feature >= 0
+    return _agrupar_limiares(feature[internos], threshold[internos], modelo.n_features_in_)
+
+
+def faixa_limiares(valores, limiares):
+    """
+    Índice do intervalo entre thresholds de cada valor: quantos thresholds
+    ficam abaixo do valor convertido para float32, a mesma comparação
+    (x > threshold vai para a direita) feita pelo sklearn e por folhas().
+    """
+    return np.searchsorted(limiares, np.asarray(valores, dtype=np.float32).astype(np.float64), side='left')
+
+
+def extremos_por_arvore(modelo):
+    """(minimos, maximos): menor e maior valor de folha de cada árvore de uma floresta de regressão."""
+    if isinstance(modelo, FlorestaCompilada):
+        return np.array(modelo.minimos_por_arvore()), np.array(modelo.maximos_por_arvore())
+    valores = [e.tree_.value[:, 0, 0] for e in modelo.estimators_]
+    return np.array([v.min() for v in valores]), np.array([v.max() for v in valores])
+
+
+def soma_arvores(modelo, X, inicio, fim, soma=None):
+    """
+    Soma das previsões das árvores inicio..fim-1 de uma floresta de regressão
+    (compilada ou do scikit-learn) para cada linha da matriz NumPy X,
+    acumulada sobre `soma` (zeros se None) na ordem das árvores.
+    """
+    if isinstance(modelo, FlorestaCompilada):
+        return modelo.soma_arvores(X, inicio, fim, soma)
+    X = np.asarray(X, dtype=np.float32)
+    soma = np.zeros(len(X)) if soma is None else np.array(soma, dtype=np.float64)
+    for estimador in modelo.estimators_[inicio:fim]:
+        soma += estimador.predict(X, check_input=False)
+    return soma
+
+
+def verificar_paridade(modelo, compilado, X, tolerancia=1e-9):
+    """Maior diferença absoluta entre sklearn e o motor compilado em X."""
+    if compilado.meta['tipo'] == 'classificacao':
+        esperado, obtido = modelo.predict_proba(X), compilado.predict_proba(X)
+    else:
+        esperado, obtido = modelo.predict(X), compilado.predict(X)
+    diff = float(np.max(np.abs(np.asarray(esperado) - obtido))) if len(obtido) else 0.0
+    return diff, diff <= tolerancia
+
+
+if __name__ == '__main__':
+    import pickle
+    import pandas as pd
+
+    destino = sys.argv[1] if len(sys.argv) > 1 else 'modelos_compilados'
+    with open('features.json', 'r') as f:
+        features_config = json.load(f)
+    df = pd.read_csv('dataset_treino.csv')
+    rng = np.random.default_rng(42)
+
+    print("=" * 70)
+    print("🔧 Compilando florestas para NumPy")
+    print("=" * 70)
+
+    ok = True
+    for nome in ('regressao', 'classificacao'):
+        with open(f'modelo_{nome}.pkl', 'rb') as f:
+            modelo = pickle.load(f)
+        colunas = features_config[nome]
+        meta = exportar_floresta(modelo, os.path.join(destino, nome), colunas)
+        compilado = FlorestaCompilada.carregar(os.path.join(destino, nome))
+
+        # Linhas reais do dataset + linhas sintéticas fora da distribuição
+        X = df[colunas]
+        X_sintetico = pd.DataFrame(rng.uniform(X.min() - 5, X.max() + 5, size=(5000, len(colunas))),
+                                   columns=colunas)
+        for dados in (X, X_sintetico):
+            diff, passou = verificar_paridade(modelo, compilado, dados)
+            ok = ok and passou
+            print(f"{'✓' if passou else '❌'} {nome}: {meta['n_arvores']} árvores, "
+                  f"{meta['n_nos']} nós, {len(dados)} linhas, diferença máxima {diff:.2e}")
+
+    print("=" * 70)
+    if not ok:
+        print("❌ Paridade com o scikit-learn acima de 1e-9")
+        sys.exit(1)
+    print(f"✅ Modelos compilados em {destino}/")
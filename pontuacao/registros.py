@@ -0,0 +1,70 @@
+"""
+Perfil e Curso: registros com __slots__ só com o que as features usam, já
+com as categorias convertidas para número. Os dicts recebidos pela API (ou
+lidos dos CSVs) viram registros com `de_dict`, uma vez por perfil/curso.
+"""
+
+from .mapas import ESCOLARIDADE_MAP, NIVEL_CURSO_MAP, NIVEL_EXP_MAP
+
+
+class Perfil:
+    __slots__ = ('carreira_desejada', 'nivel_experiencia_num', 'escolaridade_num',
+                 'tempo_disponivel_semanal', 'idade', 'anos_experiencia')
+
+    def __init__(self, carreira_desejada: str = '', nivel_experiencia_num: int = 1, escolaridade_num: int = 5,
+                 tempo_disponivel_semanal: float = 5.0, idade: float = 25, anos_experiencia: float = 0):
+        self.carreira_desejada = carreira_desejada
+        self.nivel_experiencia_num = nivel_experiencia_num
+        self.escolaridade_num = escolaridade_num
+        self.tempo_disponivel_semanal = tempo_disponivel_semanal
+        self.idade = idade
+        self.anos_experiencia = anos_experiencia
+
+    @classmethod
+    def de_dict(cls, perfil: dict) -> 'Perfil':
+        """Perfil no formato interno (usuarios.csv / frontend); categorias desconhecidas usam o padrão."""
+        return cls(perfil.get('carreira_desejada', ''),
+                   NIVEL_EXP_MAP.get(perfil.get('nivel_experiencia', 'Junior'), 1),
+                   ESCOLARIDADE_MAP.get(perfil.get('escolaridade', 'Superior Completo'), 5),
+                   perfil.get('tempo_disponivel_semanal', 5.0),
+                   perfil.get('idade', 25),
+                   perfil.get('anos_experiencia', 0))
+
+    @classmethod
+    def de(cls, perfil) -> 'Perfil':
+        return perfil if isinstance(perfil, cls) else cls.de_dict(perfil)
+
+    def __repr__(self):
+        return f"Perfil({', '.join(f'{c}={getattr(self, c)!r}' for c in self.__slots__)})"
+
+
+class Curso:
+    __slots__ = ('id_curso', 'nivel_curso_num', 'carga_horaria', 'avaliacao_media',
+                 'taxa_conclusao_media', 'popularidade_score')
+
+    def __init__(self, id_curso: int, nivel_curso_num: int = 1, carga_horaria: float = 10.0,
+                 avaliacao_media: float = 4.0, taxa_conclusao_media: float = 80.0,
+                 popularidade_score: float = 50.0):
+        self.id_curso = id_curso
+        self.nivel_curso_num = nivel_curso_num
+        self.carga_horaria = carga_horaria
+        self.avaliacao_media = avaliacao_media
+        self.taxa_conclusao_media = taxa_conclusao_media
+        self.popularidade_score = popularidade_score
+
+    @classmethod
+    def de_dict(cls, curso: dict) -> 'Curso':
+        """Curso no formato interno (snake_case); campos ausentes usam o padrão."""
+        return cls(curso.get('id_curso'),
+                   NIVEL_CURSO_MAP.get(curso.get('nivel', 'BASICO'), 1),
+                   curso.get('carga_horaria', 10.0),
+                   curso.get('avaliacao_media', 4.0),
+                   curso.get('taxa_conclusao_media', 80.0),
+                   curso.get('popularidade_score', 50.0))
+
+    @classmethod
+    def de(cls, curso) -> 'Curso':
+        return curso if isinstance(curso, cls) else cls.de_dict(curso)
+
+    def __repr__(self):
+        return f"Curso({', '.join(f'{c}={getattr(self, c)!r}' for c in self.__slots__)})"
@@ -0,0 +1,83 @@
+"""
+Features e regras de negócio de um par (perfil, curso), em Python puro.
+Referência das versões vetorizadas de pontuacao.vetorizado.
+"""
+
+from .mapas import CURSOS_POR_CARREIRA
+from .registros import Curso, Perfil
+
+_VAZIO = frozenset()
+
+
+def criar_features(perfil, curso):
+    """Features do par (Perfil ou dict, Curso ou dict), por nome de coluna."""
+    perfil = Perfil.de(perfil)
+    curso = Curso.de(curso)
+    nivel_exp = perfil.nivel_experiencia_num
+    nivel_curso = curso.nivel_curso_num
+
+    match_nivel = 1 if nivel_exp >= nivel_curso - 1 else 0
+    tempo_semanal = perfil.tempo_disponivel_semanal
+    match_tempo = 1 if tempo_semanal >= curso.carga_horaria / 4 else 0
+    match_carreira = 1 if curso.id_curso in CURSOS_POR_CARREIRA.get(perfil.carreira_desejada, _VAZIO) else 0
+
+    return {
+        'nivel_experiencia_num': nivel_exp, 'tempo_disponivel_semanal': tempo_semanal,
+        'idade': perfil.idade, 'anos_experiencia': perfil.anos_experiencia,
+        'escolaridade_num': perfil.escolaridade_num, 'nivel_curso_num': nivel_curso,
+        'carga_horaria': curso.carga_horaria,
+        'avaliacao_media': curso.avaliacao_media,
+        'taxa_conclusao_media': curso.taxa_conclusao_media,
+        'popularidade_score': curso.popularidade_score,
+        'match_nivel': match_nivel, 'match_tempo': match_tempo,
+        'match_carreira': match_carreira, 'progresso': 0.0
+    }
+
+
+def aplicar_regras_negocio(score_base, features, perfil=None, curso=None):
+    """
+    Camada de regras de negócio para ajustar score do modelo.
+    Garante que recomendações façam sentido do ponto de vista de UX.
+    Os níveis vêm de `features`; perfil e curso ficam por compatibilidade.
+    """
+    score = score_base
+    nivel_usuario = features['nivel_experiencia_num']
+    nivel_curso = features['nivel_curso_num']
+
+    # PENALIZAÇÕES POR MISMATCH DE NÍVEL
+    diff_nivel = nivel_curso - nivel_usuario
+
+    if diff_nivel >= 2:  # Curso muito avançado (ex: Junior tentando Avançado)
+        score *= 0.3
+    elif diff_nivel == 1 and nivel_usuario == 1:  # Junior tentando Intermediário
+        score *= 0.7
+    elif diff_nivel <= -2:  # Curso muito básico (ex: Senior fazendo Básico)
+        score *= 0.4
+    elif diff_nivel == -1 and nivel_usuario == 3:  # Senior fazendo Intermediário
+        score *= 0.7
+
+    # BOOST PARA MATCH DE CARREIRA
+    if features['match_carreira'] == 1:
+        score *= 1.4  # +40% se alinhado com carreira
+    else:
+        score *= 0.6  # -40% se não alinhado
+
+    # BOOST PARA MATCH DE TEMPO
+    if features['match_tempo'] == 1:
+        score *= 1.1  # +10% se tem tempo disponível
+
+    # BOOST PARA CURSOS BEM AVALIADOS
+    if features['avaliacao_media'] >= 4.7:
+        score *= 1.1  # +10% para cursos excelentes
+
+    return max(0, min(10, score))
+
+
+def gerar_motivo(features, prob):
+    m = []
+    if features['match_carreira'] == 1: m.append("Alinhado com sua carreira")
+    if features['match_nivel'] == 1: m.append("Nível adequado")
+    if features['match_tempo'] == 1: m.append("Carga horária compatível")
+    if features['avaliacao_media'] >= 4.5: m.append(f"Bem avaliado ({features['avaliacao_media']:.1f}/5)")
+    if prob >= 0.7: m.append("Alta chance de conclusão")
+    return ". ".join(m) + "." if m else "Recomendado para você"
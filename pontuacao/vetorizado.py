@@ -0,0 +1,116 @@
+"""
+Versões vetorizadas (NumPy) de pontuacao.regras: uma linha por par
+(perfil, curso), com os mesmos valores da versão escalar.
+"""
+
+import numpy as np
+
+from .indice_carreiras import IndiceCarreiras
+from .mapas import CARREIRAS_CURSOS
+from .registros import Curso, Perfil
+
+INDICE_CARREIRAS = IndiceCarreiras(CARREIRAS_CURSOS)
+
+
+def colunas_cursos(cursos):
+    """Colunas que dependem apenas do curso (pré-calculadas pelo catálogo); aceita Curso ou dict."""
+    registros = [Curso.de(c) for c in cursos]
+    ids = [c.id_curso for c in registros]
+    return {
+        'id_curso': np.array(ids),
+        'mascara_carreiras': INDICE_CARREIRAS.mascaras_cursos(ids),
+        'nivel_curso_num': np.array([c.nivel_curso_num for c in registros], dtype=np.int64),
+        'carga_horaria': np.array([c.carga_horaria for c in registros], dtype=np.float64),
+        'avaliacao_media': np.array([c.avaliacao_media for c in registros], dtype=np.float64),
+        'taxa_conclusao_media': np.array([c.taxa_conclusao_media for c in registros], dtype=np.float64),
+        'popularidade_score': np.array([c.popularidade_score for c in registros], dtype=np.float64)
+    }
+
+
+def criar_features_perfis(perfis, colunas):
+    """
+    Features de todos os pares (perfil, curso), com a linha u * n_cursos + c
+    para o perfil u e o curso c. Cada coluna de perfil é repetida por curso e
+    cada coluna de curso é repetida por perfil. `perfis` aceita Perfil ou dict.
+    """
+    n_cursos = len(colunas['id_curso'])
+    n_perfis = len(perfis)
+    perfis = [Perfil.de(p) for p in perfis]
+
+    def por_perfil(valores):
+        return np.repeat(np.array(valores), n_cursos)
+
+    def por_curso(coluna):
+        return coluna if n_perfis == 1 else np.tile(coluna, n_perfis)
+
+    nivel_exp = por_perfil([p.nivel_experiencia_num for p in perfis])
+    tempo_semanal = por_perfil([p.tempo_disponivel_semanal for p in perfis])
+    bits_carreira = por_perfil([INDICE_CARREIRAS.bits.get(p.carreira_desejada, 0) for p in perfis])
+
+    nivel_curso = por_curso(colunas['nivel_curso_num'])
+    carga = por_curso(colunas['carga_horaria'])
+
+    return {
+        'nivel_experiencia_num': nivel_exp,
+        'tempo_disponivel_semanal': tempo_semanal,
+        'idade': por_perfil([p.idade for p in perfis]),
+        'anos_experiencia': por_perfil([p.anos_experiencia for p in perfis]),
+        'escolaridade_num': por_perfil([p.escolaridade_num for p in perfis]),
+        'nivel_curso_num': nivel_curso,
+        'carga_horaria': carga,
+        'avaliacao_media': por_curso(colunas['avaliacao_media']),
+        'taxa_conclusao_media': por_curso(colunas['taxa_conclusao_media']),
+        'popularidade_score': por_curso(colunas['popularidade_score']),
+        'match_nivel': (nivel_exp >= nivel_curso - 1).astype(np.int64),
+        'match_tempo': (tempo_semanal >= carga / 4).astype(np.int64),
+        'match_carreira': ((por_curso(colunas['mascara_carreiras']) & bits_carreira) != 0).astype(np.int64),
+        'progresso': np.zeros(n_cursos * n_perfis)
+    }
+
+
+def matriz_features(features, colunas):
+    """Monta a matriz (cursos x colunas) na ordem esperada pelo modelo."""
+    return np.column_stack([features[k] for k in colunas]).astype(np.float64, copy=False)
+
+
+def aplicar_regras_negocio_lote(scores_base, features):
+    """
+    Equivalente vetorizado de aplicar_regras_negocio, sem o corte final em [0, 10].
+    Os fatores são aplicados na mesma ordem da versão escalar para manter o
+    mesmo arredondamento de ponto flutuante.
+    """
+    nivel_usuario = features['nivel_experiencia_num']
+    diff_nivel = features['nivel_curso_num'] - nivel_usuario
+
+    score = np.asarray(scores_base, dtype=np.float64) * np.select(
+        [diff_nivel >= 2,
+         (diff_nivel == 1) & (nivel_usuario == 1),
+         diff_nivel <= -2,
+         (diff_nivel == -1) & (nivel_usuario == 3)],
+        [0.3, 0.7, 0.4, 0.7], default=1.0)
+    score = score * np.where(features['match_carreira'] == 1, 1.4, 0.6)
+    score = score * np.where(features['match_tempo'] == 1, 1.1, 1.0)
+    score = score * np.where(features['avaliacao_media'] >= 4.7, 1.1, 1.0)
+    return score
+
+
+def flags_motivo_lote(features, probs):
+    """Flags de gerar_motivo para todos os cursos, uma coluna por motivo."""
+    return np.column_stack([
+        features['match_carreira'] == 1,
+        features['match_nivel'] == 1,
+        features['match_tempo'] == 1,
+        features['avaliacao_media'] >= 4.5,
+        probs >= 0.7
+    ])
+
+
+def texto_motivo(flags, avaliacao):
+    """Monta o texto de gerar_motivo a partir de uma linha de flags_motivo_lote."""
+    m = []
+    if flags[0]: m.append("Alinhado com sua carreira")
+    if flags[1]: m.append("Nível adequado")
+    if flags[2]: m.append("Carga horária compatível")
+    if flags[3]: m.append(f"Bem avaliado ({avaliacao:.1f}/5)")
+    if flags[4]: m.append("Alta chance de conclusão")
+    return ". ".join(m) + "." if m else "Recomendado para você"
@@ -0,0 +1,198 @@
+"""
+SkillBridge - Recomendação em Lote (offline)
+============================================
+Gera o top-N de todos os usuários de usuarios.csv contra o catálogo, sem
+passar pela API HTTP. Os usuários são divididos entre processos (um por
+core) e cada processo pontua blocos de (usuários x cursos) com
+app.ranquear_lote, então a memória fica limitada pelo tamanho do bloco.
+
+Uso:
+    $ python recomendar_lote.py --catalogo catalogo_cursos.json --saida recomendacoes.csv
+    $ python recomendar_lote.py --saida recomendacoes.parquet --top-n 5 --processos 4
+
+A saída pode ser .csv, .ndjson ou .parquet (este último precisa do pyarrow).
+--usuarios aceita também a base colunar (python base_colunar.py): só as
+colunas do perfil são lidas.
+
+    $ python recomendar_lote.py --usuarios base_colunar/usuarios
+"""
+
+import argparse
+import csv
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+
+import app
+import codec_json
+from base_colunar import TabelaColunar
+
+COLUNAS_SAIDA = ['id_usuario', 'rank', 'id_curso', 'nome', 'score_relevancia',
+                 'probabilidade_conclusao', 'motivo']
+CAMPOS_NUMERICOS = ('idade', 'anos_experiencia', 'tempo_disponivel_semanal')
+CAMPOS_TEXTO = ('carreira_desejada', 'nivel_experiencia', 'escolaridade')
+
+# Catálogo de cada processo, preenchido por _inicializar
+_cursos = None
+_colunas = None
+
+
+def _inicializar(caminho_catalogo):
+    global _cursos, _colunas
+    catalogo = app.Catalogo(caminho_catalogo, app.normalizar_curso_java, app.colunas_cursos)
+    catalogo.carregar()
+    _cursos, _colunas, _ = catalogo.selecionar()
+
+
+def ler_usuarios(caminho):
+    """
+    Lê os usuários já no formato de perfil usado por criar_features, do CSV
+    ou de um diretório da base colunar.
+    """
+    if os.path.isdir(caminho):
+        return ler_usuarios_colunar(caminho)
+    usuarios = []
+    with open(caminho, newline='', encoding='utf-8') as f:
+        for linha in csv.DictReader(f):
+            perfil = {
+                'id_usuario': int(linha['id_usuario']),
+                'carreira_desejada': linha['carreira_desejada'],
+                'nivel_experiencia': linha['nivel_experiencia'],
+                'escolaridade': linha['escolaridade']
+            }
+            for campo in CAMPOS_NUMERICOS:
+                perfil[campo] = float(linha[campo])
+            usuarios.append(perfil)
+    return usuarios
+
+
+def ler_usuarios_colunar(diretorio):
+    """ler_usuarios a partir da base colunar, lendo só as colunas do perfil."""
+    tabela = TabelaColunar(diretorio)
+    colunas = tabela.ler(('id_usuario',) + CAMPOS_TEXTO + CAMPOS_NUMERICOS)
+    valores = {nome: colunas[nome].tolist() for nome in ('id_usuario',) + CAMPOS_TEXTO}
+    valores.update({nome: colunas[nome].astype(float).tolist() for nome in CAMPOS_NUMERICOS})
+    return [dict(zip(valores, linha)) for linha in zip(*valores.values())]
+
+
+def _processar(args):
+    usuarios, quantidade = args
+    linhas = []
+    for i, top in app.ranquear_lote(usuarios, _cursos, quantidade, _colunas):
+        for rec in top:
+            linhas.append((usuarios[i]['id_usuario'], rec['rank'], rec['curso']['id_curso'],
+                           rec['curso']['nome'], rec['score_relevancia'],
+                           rec['probabilidade_conclusao'], rec['motivo']))
+    # Estatísticas acumuladas da memória de previsões deste processo
+    return linhas, os.getpid(), app.registro.ativa.memo.estatisticas()
+
+
+def resumo_memo(por_processo):
+    """Soma as estatísticas de memo_previsoes de cada processo."""
+    linhas = sum(e['linhas'] for e in por_processo.values())
+    unicos = sum(e['vetores_unicos'] for e in por_processo.values())
+    previstas = sum(e['previstas'] for e in por_processo.values())
+    if not linhas:
+        return "memória de previsões sem uso"
+    return (f"{linhas} linhas, {unicos} vetores distintos no lote ({1 - unicos / linhas:.1%} deduplicadas), "
+            f"{previstas} previstas pelos modelos ({1 - previstas / linhas:.1%} poupadas)")
+
+
+class _Escritor:
+    """Escreve as linhas de forma incremental no formato indicado pela extensão."""
+
+    def __init__(self, caminho):
+        self.formato = os.path.splitext(caminho)[1].lower().lstrip('.')
+        if self.formato == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("Saída .parquet precisa do pyarrow (pip install pyarrow)")
+            self._pa = pa
+            self._schema = pa.schema([('id_usuario', pa.int64()), ('rank', pa.int32()),
+                                      ('id_curso', pa.int64()), ('nome', pa.string()),
+                                      ('score_relevancia', pa.float64()),
+                                      ('probabilidade_conclusao', pa.float64()),
+                                      ('motivo', pa.string())])
+            self._arquivo = pq.ParquetWriter(caminho, self._schema)
+        elif self.formato in ('csv', 'ndjson'):
+            if self.formato == 'csv':
+                self._arquivo = open(caminho, 'w', newline='', encoding='utf-8')
+                self._csv = csv.writer(self._arquivo)
+                self._csv.writerow(COLUNAS_SAIDA)
+            else:
+                self._arquivo = open(caminho, 'wb')
+        else:
+            raise SystemExit(f"Formato de saída não suportado: .{self.formato}")
+
+    def escrever(self, linhas):
+        if self.formato == 'parquet':
+            colunas = list(zip(*linhas)) if linhas else [[] for _ in COLUNAS_SAIDA]
+            self._arquivo.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(c, type=campo.type) for c, campo in zip(colunas, self._schema)],
+                schema=self._schema))
+        elif self.formato == 'csv':
+            self._csv.writerows(linhas)
+        else:
+            self._arquivo.write(b''.join(codec_json.dumps(dict(zip(COLUNAS_SAIDA, linha))) + b'\n'
+                                         for linha in linhas))
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Top-N de recomendações para todos os usuários')
+    parser.add_argument('--usuarios', default='usuarios.csv', help='CSV ou diretório da base colunar')
+    parser.add_argument('--catalogo', default=os.environ.get('SKILLBRIDGE_CATALOGO', 'catalogo_cursos.json'))
+    parser.add_argument('--saida', default='recomendacoes.csv')
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--usuarios-por-tarefa', type=int, default=250)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    _inicializar(args.catalogo)
+    if not _cursos:
+        raise SystemExit(f"Nenhum curso com ID >= 10000 em {args.catalogo}")
+
+    usuarios = ler_usuarios(args.usuarios)
+    tarefas = [(usuarios[i:i + args.usuarios_por_tarefa], args.top_n)
+               for i in range(0, len(usuarios), args.usuarios_por_tarefa)]
+
+    print(f"📦 {len(usuarios)} usuários x {len(_cursos)} cursos, {args.processos} processos")
+
+    escritor = _Escritor(args.saida)
+    total = 0
+    memo_por_processo = {}
+    try:
+        if args.processos > 1:
+            # Os modelos compilados são memory-mapped, então os processos compartilham a mesma cópia
+            with multiprocessing.Pool(args.processos, initializer=_inicializar,
+                                      initargs=(args.catalogo,)) as pool:
+                for linhas, pid, memo in pool.imap(_processar, tarefas):
+                    memo_por_processo[pid] = memo
+                    escritor.escrever(linhas)
+                    total += len(linhas)
+        else:
+            for tarefa in tarefas:
+                linhas, pid, memo = _processar(tarefa)
+                memo_por_processo[pid] = memo
+                escritor.escrever(linhas)
+                total += len(linhas)
+    finally:
+        escritor.fechar()
+
+    duracao = time.perf_counter() - inicio
+    print(f"✓ {total} recomendações em {duracao:.2f}s "
+          f"({len(usuarios) / duracao:.0f} usuários/s) -> {args.saida}")
+    print(f"♻️  {resumo_memo(memo_por_processo)}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+SkillBridge - Uso de Recursos do Processo
+=========================================
+Leitura de memória do processo atual, usada no log de inicialização, no
+/health e pelos hooks do gunicorn. O teste de carga (teste_carga.py) usa as
+mesmas funções com o pid do servidor e dos seus workers.
+
+RSS conta páginas compartilhadas em cada worker; PSS divide as páginas
+compartilhadas entre os processos que as usam, então é o número que mostra
+o ganho de carregar os modelos antes do fork.
+"""
+
+import os
+import resource
+
+
+def memoria_processo(pid='self'):
+    """
+    Retorna {'rss_mb', 'pss_mb', 'pico_rss_mb'} do processo (o atual por
+    padrão; pss só no Linux, e para outro pid o pico também).
+    """
+    pico = None
+    if pid == 'self':
+        pico = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    memoria = {'rss_mb': None, 'pss_mb': None, 'pico_rss_mb': pico}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for linha in f:
+                campo, _, valor = linha.partition(':')
+                if campo in ('Rss', 'Pss'):
+                    memoria[f'{campo.lower()}_mb'] = round(int(valor.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    if pico is None:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for linha in f:
+                    campo, _, valor = linha.partition(':')
+                    if campo == 'VmHWM':
+                        memoria['pico_rss_mb'] = round(int(valor.split()[0]) / 1024, 1)
+                    elif campo == 'VmRSS' and memoria['rss_mb'] is None:
+                        memoria['rss_mb'] = round(int(valor.split()[0]) / 1024, 1)
+        except OSError:
+            pass
+    if memoria['rss_mb'] is None:
+        memoria['rss_mb'] = memoria['pico_rss_mb']
+    return memoria
+
+
+def _stat(pid):
+    """Campos de /proc/<pid>/stat depois do nome do processo (o 3º campo em diante)."""
+    with open(f'/proc/{pid}/stat') as f:
+        return f.read().rpartition(')')[2].split()
+
+
+def tempo_cpu(pid='self'):
+    """Segundos de CPU (usuário + sistema) do processo, ou None se não der para ler (fora do Linux)."""
+    try:
+        campos = _stat(pid)
+    except (OSError, IndexError):
+        return None
+    return (int(campos[11]) + int(campos[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def arvore_processos(pid):
+    """pid e todos os seus descendentes (ex.: master do gunicorn e workers)."""
+    filhos = {}
+    try:
+        nomes = os.listdir('/proc')
+    except OSError:
+        return [pid]
+    for nome in nomes:
+        if nome.isdigit():
+            try:
+                filhos.setdefault(int(_stat(nome)[1]), []).append(int(nome))
+            except (OSError, IndexError, ValueError):
+                continue
+    arvore, pendentes = [], [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        arvore.append(atual)
+        pendentes.extend(filhos.get(atual, []))
+    return arvore
+
+
+def resumo_memoria():
+    m = memoria_processo()
+    return f"pid {os.getpid()}, RSS {m['rss_mb']} MB, PSS {m['pss_mb']} MB"
@@ -0,0 +1,565 @@
+"""
+SkillBridge - Registro de Modelos
+=================================
+Versões dos modelos servidas pela API, trocadas sem reiniciar o processo.
+
+Uma versão (um diretório gerado por treinar_modelos.py, modelos/<versao>/, ou
+a raiz do projeto) é carregada em uma thread em segundo plano, aquecida com
+um lote sintético e só então entra em serviço. A troca é de uma referência
+só: requisições em andamento terminam com a versão que já tinham, como no
+snapshot do catálogo.
+
+Uma versão candidata pode receber uma fração do tráfego (teste A/B). A
+escolha é pelo hash do usuario_id, então o mesmo usuário cai sempre na
+mesma versão; requisições sem usuario_id são sorteadas.
+
+    registro.carregar('modelos/20260101-120000', candidata=True, fracao=0.1)
+    modelo = registro.escolher(usuario_id)
+
+Com vários processos (workers do gunicorn), cada um tem o seu registro. O
+estado desejado (ativa, candidata e fração) fica então em um arquivo
+compartilhado, EstadoRegistro: publicar() grava a mudança de forma atômica
+com uma geração nova e cada processo, em verificar() (chamado antes das
+requisições, no máximo uma leitura do arquivo por intervalo), carrega em
+segundo plano o que falta e troca a sua tupla quando tudo está aquecido.
+
+    registro = RegistroModelos(ativa, estado=EstadoRegistro('modelos/registro.json'))
+    registro.publicar(lambda e: dict(e, candidata=None, fracao=0.0))
+
+Versões carregadas em serviço precisam dos modelos compilados
+(<versao>/compilados); o fallback para os .pkl só vale com permitir_pickle.
+"""
+
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows) as gravações concorrentes de publicar() não são serializadas
+    fcntl = None
+
+from memo_previsoes import MemoPrevisoes
+from pontuacao import CARREIRAS_CURSOS, NIVEL_CURSO_MAP, NIVEL_EXP_MAP
+from pontuacao import carregar_modelos, colunas_cursos, criar_features_perfis, entrada_modelo, matriz_features
+from pontuacao.motor_arvores import FlorestaCompilada, extremos_por_arvore, limiares_por_feature
+
+logger = logging.getLogger(__name__)
+
+# Latências guardadas por versão para os percentis de estatisticas()
+AMOSTRAS_LATENCIA = 2000
+
+
+def teto_score_base(modelo):
+    """
+    Maior score que a floresta consegue prever: média dos maiores valores de
+    folha de cada árvore (com folga para erro de ponto flutuante), limitada a 10.
+    """
+    if isinstance(modelo, FlorestaCompilada):
+        maximos = modelo.maximos_por_arvore()
+    else:
+        try:
+            maximos = [float(e.tree_.value.max()) for e in modelo.estimators_]
+        except AttributeError:
+            return 10.0
+    return min(10.0, sum(maximos) / len(maximos) + 1e-9)
+
+
+class VersaoModelo:
+    """
+    Modelos de uma versão e o que a API pré-calcula a partir deles. Cada
+    versão tem a sua memória de previsões, então duas versões servindo ao
+    mesmo tempo (A/B) nunca trocam scores.
+    """
+
+    __slots__ = ('nome', 'diretorio', 'origem', 'regressao', 'classificacao', 'features', 'teto_score_base',
+                 'n_arvores', 'resto_minimo', 'resto_maximo', 'limiares_regressao',
+                 'limiares_classificacao', 'colunas_memo', 'posicoes_memo', 'memo')
+
+    def __init__(self, nome, modelos, max_itens_memo=100000, diretorio=None):
+        self.nome = nome
+        # Caminho real de onde a versão foi carregada (identifica a versão no EstadoRegistro)
+        self.diretorio = diretorio
+        self.origem = modelos.origem
+        self.regressao = modelos.regressao
+        self.classificacao = modelos.classificacao
+        self.features = modelos.features
+        # Poda de pontuar_candidatos
+        self.teto_score_base = teto_score_base(self.regressao)
+
+        # Ranking aproximado: menor/maior soma possível das árvores t..fim
+        # (com folga para erro de ponto flutuante)
+        minimos, maximos = extremos_por_arvore(self.regressao)
+        self.n_arvores = len(maximos)
+        self.resto_minimo = np.append(np.cumsum(minimos[::-1])[::-1], 0.0) - 1e-9
+        self.resto_maximo = np.append(np.cumsum(maximos[::-1])[::-1], 0.0) + 1e-9
+
+        # Reavaliação incremental: a previsão de uma linha só muda se algum
+        # valor cruzar um threshold da floresta
+        self.limiares_regressao = limiares_por_feature(self.regressao)
+        self.limiares_classificacao = limiares_por_feature(self.classificacao)
+
+        # O vetor que identifica a linha na memória cobre as colunas dos dois modelos
+        self.colunas_memo = self.features['classificacao'] + [c for c in self.features['regressao']
+                                                              if c not in self.features['classificacao']]
+        self.posicoes_memo = {tipo: [self.colunas_memo.index(c) for c in self.features[tipo]]
+                              for tipo in ('regressao', 'classificacao')}
+        self.memo = MemoPrevisoes(max_itens_memo)
+
+    def __repr__(self):
+        return f'VersaoModelo({self.nome!r}, {type(self.regressao).__name__}, origem={self.origem!r})'
+
+
+def nome_versao(diretorio, padrao):
+    """Versão gravada por treinar_modelos.py em metricas_modelos.json, ou `padrao`."""
+    try:
+        with open(os.path.join(diretorio, 'metricas_modelos.json'), 'r') as f:
+            return str(json.load(f)['treinamento']['versao'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return padrao
+
+
+def carregar_versao(diretorio='.', nome=None, compilados=None, max_itens_memo=100000, permitir_pickle=True):
+    """
+    VersaoModelo com os modelos de `diretorio`. Sem `nome`, usa a versão de
+    metricas_modelos.json ou o nome do diretório. Os modelos compilados vêm de
+    <diretorio>/compilados (layout de treinar_modelos.py); na raiz do projeto,
+    de SKILLBRIDGE_MODELOS_COMPILADOS / modelos_compilados, como antes.
+    """
+    if compilados is None:
+        proprio = os.path.join(diretorio, 'compilados')
+        # Fora da raiz, nunca cair nos compilados da raiz (seriam de outra versão)
+        if os.path.isdir(proprio) or os.path.abspath(diretorio) != os.path.abspath('.'):
+            compilados = proprio
+    if nome is None:
+        nome = nome_versao(diretorio, os.path.basename(os.path.abspath(diretorio)))
+    return VersaoModelo(nome, carregar_modelos(diretorio, compilados, permitir_pickle), max_itens_memo,
+                        os.path.realpath(diretorio))
+
+
+def lote_aquecimento():
+    """
+    Lote sintético para aquecer uma versão: um perfil por carreira e nível
+    contra os cursos de todas as carreiras, com níveis, cargas e avaliações
+    variados para percorrer os dois lados dos thresholds mais comuns.
+    """
+    niveis = list(NIVEL_CURSO_MAP)
+    ids = sorted({i for cursos in CARREIRAS_CURSOS.values() for i in cursos})
+    cursos = [{'id_curso': id_curso, 'nivel': niveis[j % 3], 'carga_horaria': 8.0 * (1 + j % 10),
+               'avaliacao_media': 3.5 + 0.3 * (j % 5), 'taxa_conclusao_media': 50.0 + 5 * (j % 9),
+               'popularidade_score': 10.0 * (j % 10)}
+              for j, id_curso in enumerate(ids)]
+    perfis = [{'carreira_desejada': carreira, 'nivel_experiencia': nivel, 'tempo_disponivel_semanal': 2.0 * (k + 1),
+               'idade': 20 + k, 'anos_experiencia': NIVEL_EXP_MAP[nivel] * 2}
+              for k, carreira in enumerate(CARREIRAS_CURSOS) for nivel in NIVEL_EXP_MAP]
+    return criar_features_perfis(perfis, colunas_cursos(cursos))
+
+
+def aquecer(versao, features=None):
+    """
+    Passa o lote sintético pelos dois modelos (carrega as páginas dos arrays
+    memory-mapped e os caminhos de código) e confere que as saídas são
+    finitas e estão na faixa esperada. Levanta ValueError se não estiverem.
+    """
+    if features is None:
+        features = lote_aquecimento()
+    colunas_reg = versao.features['regressao']
+    colunas_class = versao.features['classificacao']
+    scores = np.asarray(versao.regressao.predict(
+        entrada_modelo(versao.regressao, matriz_features(features, colunas_reg), colunas_reg)))
+    probs = np.asarray(versao.classificacao.predict_proba(
+        entrada_modelo(versao.classificacao, matriz_features(features, colunas_class), colunas_class)))[:, 1]
+    if not (np.isfinite(scores).all() and np.isfinite(probs).all()):
+        raise ValueError(f'Versão {versao.nome}: previsões não finitas no aquecimento')
+    if probs.min() < 0 or probs.max() > 1:
+        raise ValueError(f'Versão {versao.nome}: probabilidades fora de [0, 1] no aquecimento')
+    return len(scores)
+
+
+class EstadoRegistro:
+    """
+    Arquivo JSON com o estado desejado do registro, lido por todos os
+    processos da API:
+
+        {"geracao": 3, "ativa": {"diretorio": "/app/modelos/v2", "versao": "v2"},
+         "candidata": null, "fracao": 0.0}
+
+    "versao" null aceita o nome que a carga encontrar (metricas_modelos.json).
+    A gravação é atômica (arquivo temporário + rename), então um leitor vê o
+    estado anterior ou o novo inteiro; `ler` só reabre o arquivo quando o
+    mtime/tamanho mudam.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._assinatura = None
+        self._estado = None
+
+    def ler(self):
+        """Estado atual do arquivo, ou None se ele ainda não existir (ou estiver ilegível)."""
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        assinatura = (info.st_mtime_ns, info.st_size, info.st_ino)
+        if assinatura != self._assinatura:
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    estado = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Estado do registro ilegível em {self.caminho}: {e}")
+                return self._estado
+            self._estado, self._assinatura = estado, assinatura
+        return self._estado
+
+    def atualizar(self, mudar, inicial):
+        """
+        Aplica `mudar` (estado -> estado novo) ao estado do arquivo (ou a
+        `inicial`, se ele não existir) e grava o resultado com a geração
+        seguinte. Entre processos, as atualizações são serializadas por um
+        lock no arquivo <caminho>.lock. Retorna o estado gravado; exceções de
+        `mudar` passam adiante sem gravar nada.
+        """
+        pasta = os.path.dirname(os.path.abspath(self.caminho))
+        os.makedirs(pasta, exist_ok=True)
+        with open(self.caminho + '.lock', 'a') as trava:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+            atual = self.ler() or inicial
+            estado = dict(mudar(dict(atual)), geracao=int(atual.get('geracao', 0)) + 1)
+            descritor, temporario = tempfile.mkstemp(dir=pasta, prefix='.registro-', suffix='.json')
+            try:
+                with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+                    json.dump(estado, f, ensure_ascii=False, indent=2)
+                os.replace(temporario, self.caminho)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+        return estado
+
+
+def _descrever(versao):
+    return {'diretorio': versao.diretorio, 'versao': versao.nome}
+
+
+def _corresponde(versao, desejada):
+    return (versao is not None and versao.diretorio == os.path.realpath(desejada['diretorio'])
+            and desejada.get('versao') in (None, versao.nome))
+
+
+class EstatisticasVersao:
+    """Latência e distribuição dos scores servidos por uma versão."""
+
+    __slots__ = ('requisicoes', 'recomendacoes', 'segundos', 'soma_scores', 'faixas', 'latencias')
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.recomendacoes = 0
+        self.segundos = 0.0
+        self.soma_scores = 0.0
+        # Contagem de scores por faixa [0, 1), [1, 2), ..., [9, 10]
+        self.faixas = [0] * 10
+        self.latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+
+    def registrar(self, segundos, scores):
+        self.requisicoes += 1
+        self.segundos += segundos
+        self.latencias.append(segundos)
+        for s in scores:
+            self.recomendacoes += 1
+            self.soma_scores += s
+            self.faixas[min(9, max(0, int(s)))] += 1
+
+    def resumo(self):
+        latencias = sorted(self.latencias)
+
+        def percentil(p):
+            return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000, 3) if latencias else 0.0
+
+        return {
+            'requisicoes': self.requisicoes,
+            'recomendacoes': self.recomendacoes,
+            'latencia_media_ms': round(self.segundos / self.requisicoes * 1000, 3) if self.requisicoes else 0.0,
+            'latencia_p50_ms': percentil(0.5),
+            'latencia_p95_ms': percentil(0.95),
+            'latencia_p99_ms': percentil(0.99),
+            'score_medio': round(self.soma_scores / self.recomendacoes, 4) if self.recomendacoes else 0.0,
+            'scores_por_faixa': list(self.faixas)
+        }
+
+
+def _em_servico(servico):
+    ativa, candidata, _ = servico
+    return [ativa] if candidata is None else [ativa, candidata]
+
+
+class RegistroModelos:
+    """
+    Versão ativa, versão candidata opcional e a fração do tráfego que vai
+    para a candidata. Os três mudam juntos, em uma tupla trocada de uma vez,
+    então escolher() nunca vê um estado pela metade.
+
+    `ao_trocar` é chamado depois de cada mudança (a API descarta o cache e as
+    sessões, que guardam scores de uma versão). `permitir_pickle` libera o
+    fallback para os .pkl nas versões carregadas com carregar().
+
+    Com `estado` (um EstadoRegistro), publicar() muda o estado de todos os
+    processos e verificar() aplica neste processo a última geração gravada,
+    relendo o arquivo no máximo a cada `intervalo` segundos.
+    """
+
+    def __init__(self, ativa, max_itens_memo=100000, ao_trocar=None, permitir_pickle=False, estado=None,
+                 intervalo=1.0):
+        self.max_itens_memo = max_itens_memo
+        self.ao_trocar = ao_trocar
+        self.permitir_pickle = permitir_pickle
+        self.estado = estado
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._servico = (ativa, None, 0.0)
+        self._thread = None
+        self.carga = {'situacao': 'ociosa'}
+        self._estatisticas = {ativa.nome: EstatisticasVersao()}
+        # Última geração do EstadoRegistro já aplicada (ou que falhou) e hora da última verificação
+        self.geracao = 0
+        self._verificado = 0.0
+
+    @property
+    def ativa(self):
+        return self._servico[0]
+
+    @property
+    def candidata(self):
+        return self._servico[1]
+
+    @property
+    def fracao(self):
+        return self._servico[2]
+
+    def escolher(self, usuario_id=None):
+        """Versão que atende a requisição (a candidata para `fracao` dos usuários)."""
+        ativa, candidata, fracao = self._servico
+        if candidata is None or fracao <= 0:
+            return ativa
+        if usuario_id is None:
+            sorteio = random.random()
+        else:
+            sorteio = zlib.crc32(str(usuario_id).encode('utf-8')) / 2 ** 32
+        return candidata if sorteio < fracao else ativa
+
+    def versoes(self):
+        """Versões em serviço (ativa e, se houver, candidata)."""
+        return _em_servico(self._servico)
+
+    def carregar(self, diretorio, nome=None, candidata=False, fracao=0.0, esperar=False):
+        """
+        Carrega, aquece e coloca em serviço a versão de `diretorio`, em uma
+        thread em segundo plano (com `esperar`, na thread atual). Como
+        candidata, recebe `fracao` do tráfego; senão substitui a ativa.
+        Retorna False se já houver uma carga em andamento.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self.carga = {'situacao': 'carregando', 'diretorio': diretorio, 'candidata': candidata}
+            if esperar:
+                self._thread = None
+            else:
+                self._thread = threading.Thread(target=self._carregar, args=(diretorio, nome, candidata, fracao),
+                                                name='carga-modelos', daemon=True)
+                self._thread.start()
+                return True
+        self._carregar(diretorio, nome, candidata, fracao)
+        return True
+
+    def _carregar(self, diretorio, nome, candidata, fracao):
+        inicio = time.perf_counter()
+        try:
+            versao = carregar_versao(diretorio, nome, max_itens_memo=self.max_itens_memo,
+                                     permitir_pickle=self.permitir_pickle)
+            if candidata and versao.nome == self.ativa.nome:
+                raise ValueError(f'A versão {versao.nome} já é a ativa')
+            carregada = time.perf_counter()
+            linhas = aquecer(versao)
+            aquecida = time.perf_counter()
+        except Exception as e:
+            logger.error(f"Erro ao carregar modelos de {diretorio}: {e}")
+            self.carga = {'situacao': 'erro', 'diretorio': diretorio, 'candidata': candidata, 'erro': str(e)}
+            return
+
+        with self._lock:
+            ativa, atual, fracao_atual = self._servico
+            if candidata:
+                self._servico = (ativa, versao, min(1.0, max(0.0, float(fracao))))
+            else:
+                # A candidata continua, a não ser que seja a própria versão que virou ativa
+                mantida = atual if atual is not None and atual.nome != versao.nome else None
+                self._servico = (versao, mantida, fracao_atual if mantida is not None else 0.0)
+            self._estatisticas.setdefault(versao.nome, EstatisticasVersao())
+            self.carga = {
+                'situacao': 'pronta', 'diretorio': diretorio, 'candidata': candidata, 'versao': versao.nome,
+                'carga_ms': round((carregada - inicio) * 1000, 1),
+                'aquecimento_ms': round((aquecida - carregada) * 1000, 1),
+                'linhas_aquecimento': linhas
+            }
+        logger.info(f"✓ Modelos {versao.nome} em serviço ({'candidata' if candidata else 'ativa'}, "
+                    f"{type(versao.regressao).__name__}, {self.carga['carga_ms'] + self.carga['aquecimento_ms']} ms)")
+        self._avisar()
+
+    def promover(self):
+        """A candidata vira a ativa. Retorna a nova ativa ou None se não houver candidata."""
+        with self._lock:
+            _, candidata, _ = self._servico
+            if candidata is None:
+                return None
+            self._servico = (candidata, None, 0.0)
+        self._avisar()
+        return candidata
+
+    def descartar_candidata(self):
+        with self._lock:
+            _, candidata, _ = self._servico
+            if candidata is None:
+                return None
+            self._servico = (self._servico[0], None, 0.0)
+        self._avisar()
+        return candidata
+
+    def definir_fracao(self, fracao):
+        """Fração do tráfego da candidata (limitada a [0, 1]). Retorna False se não houver candidata."""
+        with self._lock:
+            ativa, candidata, _ = self._servico
+            if candidata is None:
+                return False
+            self._servico = (ativa, candidata, min(1.0, max(0.0, float(fracao))))
+        self._avisar()
+        return True
+
+    def estado_atual(self):
+        """O serviço deste processo no formato do EstadoRegistro (estado inicial do arquivo)."""
+        ativa, candidata, fracao = self._servico
+        return {'geracao': self.geracao, 'ativa': _descrever(ativa),
+                'candidata': _descrever(candidata) if candidata is not None else None, 'fracao': fracao}
+
+    def publicar(self, mudar):
+        """
+        Grava no EstadoRegistro o estado devolvido por `mudar` (estado ->
+        estado novo) e começa a aplicá-lo neste processo; os demais aplicam
+        no próximo verificar(). Retorna o estado gravado.
+        """
+        estado = self.estado.atualizar(mudar, self.estado_atual())
+        self.verificar(forcar=True)
+        return estado
+
+    def verificar(self, forcar=False, esperar=False):
+        """
+        Começa a aplicar a geração mais nova do EstadoRegistro, se ainda não
+        foi aplicada (em segundo plano; com `esperar`, na thread atual). Sem
+        `forcar`, olha o arquivo no máximo uma vez por `intervalo`.
+        """
+        if self.estado is None:
+            return
+        agora = time.monotonic()
+        if not forcar and agora - self._verificado < self.intervalo:
+            return
+        self._verificado = agora
+        estado = self.estado.ler()
+        if estado is None or estado.get('geracao', 0) <= self.geracao:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                # A thread em andamento relê o arquivo ao terminar
+                return
+            if not esperar:
+                self._thread = threading.Thread(target=self._sincronizar, name='sincroniza-modelos', daemon=True)
+                self._thread.start()
+                return
+        self._sincronizar()
+
+    def _sincronizar(self):
+        while True:
+            estado = self.estado.ler()
+            if estado is None or estado.get('geracao', 0) <= self.geracao:
+                return
+            self._aplicar(estado)
+
+    def _aplicar(self, estado):
+        """Carrega o que falta do `estado` e troca o serviço de uma vez. Uma geração que falha não é repetida."""
+        geracao = estado['geracao']
+        ativa, candidata, _ = self._servico
+        carregadas = [ativa] + ([candidata] if candidata is not None else [])
+        self.carga = {'situacao': 'carregando', 'geracao': geracao}
+        tempos = {}
+
+        def obter(desejada):
+            for versao in carregadas:
+                if _corresponde(versao, desejada):
+                    return versao
+            inicio = time.perf_counter()
+            versao = carregar_versao(desejada['diretorio'], desejada.get('versao'),
+                                     max_itens_memo=self.max_itens_memo, permitir_pickle=self.permitir_pickle)
+            aquecer(versao)
+            carregadas.append(versao)
+            tempos[versao.nome] = round((time.perf_counter() - inicio) * 1000, 1)
+            return versao
+
+        try:
+            nova_ativa = obter(estado['ativa'])
+            nova_candidata = obter(estado['candidata']) if estado.get('candidata') else None
+            if nova_candidata is not None and nova_candidata.nome == nova_ativa.nome:
+                raise ValueError(f'A versão {nova_candidata.nome} já é a ativa')
+            fracao = min(1.0, max(0.0, float(estado.get('fracao', 0.0)))) if nova_candidata is not None else 0.0
+        except Exception as e:
+            logger.error(f"Erro ao aplicar o estado {geracao} do registro: {e}")
+            self.carga = {'situacao': 'erro', 'geracao': geracao, 'erro': str(e)}
+            self.geracao = geracao
+            return
+
+        with self._lock:
+            self._servico = (nova_ativa, nova_candidata, fracao)
+            for versao in (nova_ativa, nova_candidata):
+                if versao is not None:
+                    self._estatisticas.setdefault(versao.nome, EstatisticasVersao())
+            self.geracao = geracao
+            self.carga = {'situacao': 'pronta', 'geracao': geracao, 'carregadas_ms': tempos}
+        logger.info(f"✓ Registro na geração {geracao}: ativa {nova_ativa.nome}"
+                    + (f", candidata {nova_candidata.nome} ({fracao:.0%})" if nova_candidata is not None else ""))
+        self._avisar()
+
+    def _avisar(self):
+        if self.ao_trocar is not None:
+            self.ao_trocar()
+
+    def registrar(self, nome, segundos, scores):
+        """Conta uma requisição atendida pela versão `nome` (latência em segundos e scores servidos)."""
+        with self._lock:
+            estatisticas = self._estatisticas.get(nome)
+            if estatisticas is None:
+                estatisticas = self._estatisticas[nome] = EstatisticasVersao()
+            estatisticas.registrar(segundos, scores)
+
+    def estatisticas(self):
+        ativa, candidata, fracao = self._servico
+        with self._lock:
+            por_versao = {nome: e.resumo() for nome, e in self._estatisticas.items()}
+        return {
+            'ativa': ativa.nome,
+            'candidata': candidata.nome if candidata is not None else None,
+            'fracao_candidata': fracao,
+            'geracao': self.geracao,
+            'pid': os.getpid(),
+            'carga': dict(self.carga),
+            'versoes': {v.nome: {'motor': type(v.regressao).__name__, 'origem': v.origem,
+                                 'memo_previsoes': v.memo.estatisticas()}
+                        for v in _em_servico((ativa, candidata, fracao))},
+            'por_versao': por_versao
+        }
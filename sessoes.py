@@ -0,0 +1,123 @@
+"""
+SkillBridge - Sessões de Reavaliação Incremental
+================================================
+Guarda, por usuario_id, a última matriz de features e as previsões de cada
+curso, para que a próxima chamada do mesmo usuário (ex.: mudou só o tempo
+disponível ou a carreira) preveja de novo apenas as linhas que mudaram de
+verdade (ver app.ranquear_incremental).
+
+- Memória limitada: soma dos bytes dos arrays de todas as sessões até
+  `max_bytes`; passando disso, saem as sessões usadas há mais tempo (LRU).
+- Sessões paradas há mais de `ttl` segundos são descartadas.
+- O estado é do processo: com vários workers, a próxima chamada pode cair em
+  outro worker e começar uma sessão nova (mesmo resultado, só mais lenta).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class Sessao:
+    """Features e previsões da última chamada; probs é NaN nas linhas nunca classificadas."""
+    __slots__ = ('posicoes', 'features', 'scores_base', 'probs', 'bytes', 'expira')
+
+    def __init__(self, ids, features, scores_base, probs):
+        # id_curso -> linha, para reaproveitar cursos quando a lista muda pouco
+        self.posicoes = {c: i for i, c in enumerate(ids)}
+        self.features = features
+        self.scores_base = scores_base
+        self.probs = probs
+        self.bytes = sum(v.nbytes for v in features.values()) + scores_base.nbytes + probs.nbytes
+        self.expira = 0.0
+
+
+class SessoesIncrementais:
+
+    def __init__(self, max_bytes=64 * 2 ** 20, ttl=900.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sessoes = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.reaproveitadas = 0
+        self.novas = 0
+        self.expiradas = 0
+        self.despejadas = 0
+        self.linhas_previstas = 0
+        self.linhas_reaproveitadas = 0
+
+    @property
+    def ativo(self):
+        return self.max_bytes > 0 and self.ttl > 0
+
+    def retirar(self, usuario_id):
+        """
+        Remove e retorna a sessão do usuário (ou None). Quem retira devolve com
+        guardar(), então duas requisições simultâneas do mesmo usuário nunca
+        alteram a mesma sessão.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar(agora)
+            sessao = self._sessoes.pop(usuario_id, None)
+            if sessao is not None:
+                self.bytes -= sessao.bytes
+                self.reaproveitadas += 1
+            else:
+                self.novas += 1
+        return sessao
+
+    def guardar(self, usuario_id, sessao, linhas_previstas, linhas_reaproveitadas):
+        if not self.ativo or sessao.bytes > self.max_bytes:
+            return
+        agora = time.monotonic()
+        with self._lock:
+            self._expirar(agora)
+            self.linhas_previstas += linhas_previstas
+            self.linhas_reaproveitadas += linhas_reaproveitadas
+            antiga = self._sessoes.pop(usuario_id, None)
+            if antiga is not None:
+                self.bytes -= antiga.bytes
+            sessao.expira = agora + self.ttl
+            self._sessoes[usuario_id] = sessao
+            self.bytes += sessao.bytes
+            while self.bytes > self.max_bytes:
+                _, removida = self._sessoes.popitem(last=False)
+                self.bytes -= removida.bytes
+                self.despejadas += 1
+
+    def _expirar(self, agora):
+        # A ordem do OrderedDict é a de último uso, que é também a de expiração
+        while self._sessoes:
+            usuario_id, sessao = next(iter(self._sessoes.items()))
+            if sessao.expira >= agora:
+                break
+            del self._sessoes[usuario_id]
+            self.bytes -= sessao.bytes
+            self.expiradas += 1
+
+    def invalidar(self):
+        """Descarta todas as sessões (modelos trocados)."""
+        with self._lock:
+            self._sessoes.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            self._expirar(time.monotonic())
+            total = self.linhas_previstas + self.linhas_reaproveitadas
+            return {
+                'ativo': self.ativo,
+                'sessoes': len(self._sessoes),
+                'memoria_mb': round(self.bytes / 2 ** 20, 2),
+                'max_memoria_mb': round(self.max_bytes / 2 ** 20, 2),
+                'ttl_segundos': self.ttl,
+                'reaproveitadas': self.reaproveitadas,
+                'novas': self.novas,
+                'expiradas': self.expiradas,
+                'despejadas': self.despejadas,
+                'linhas_previstas': self.linhas_previstas,
+                'linhas_reaproveitadas': self.linhas_reaproveitadas,
+                'taxa_reaproveitamento': round(self.linhas_reaproveitadas / total, 4) if total else 0.0
+            }
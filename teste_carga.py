@@ -0,0 +1,493 @@
+"""
+SkillBridge - Teste de Carga do /recomendar
+===========================================
+Gera carga HTTP contra a API como o backend Java: cada cliente simulado
+mantém uma conexão keep-alive e envia um pedido atrás do outro (o próximo
+só sai quando a resposta chega), com --concorrencia clientes em paralelo.
+Com --taxa o envio passa a ser por tempo (requisições/s no total) e a
+latência conta a partir do horário previsto de envio, então a espera na
+fila do cliente quando o servidor atrasa entra na medição.
+
+Os bodies são montados antes da medição:
+
+    java      -> {"usuario_id", "perfil": {...}, "cursos": [camelCase], "top_n"}
+    frontend  -> {"usuario": {...}, "cursos": [snake_case], "quantidade"}
+    misto     -> metade de cada
+
+Os perfis são os de usuarios.csv e os cursos são sorteados de um catálogo
+sintético (--cursos por requisição; 0 omite os cursos e usa o catálogo do
+servidor). Com --payloads os bodies vêm de um JSONL (um body por linha) e
+são reenviados em ciclo; --gravar salva os bodies gerados nesse formato.
+
+Para cada nível de concorrência: vazão, latência p50/p90/p95/p99/máx das
+respostas 200, erros por tipo (HTTP 4xx/5xx, 503 da fila cheia do ASGI,
+conexão) e, com o servidor na mesma máquina (--pid ou --iniciar), CPU e
+RSS/PSS do master e de cada worker, lidos de /proc.
+
+Com --iniciar o próprio teste sobe o servidor para cada combinação de
+--workers x --threads (WEB_CONCURRENCY / GUNICORN_THREADS do
+gunicorn.conf.py), o que dá a tabela para dimensionar o deploy.
+
+Uso:
+    $ python teste_carga.py --url http://localhost:7860 --concorrencia 1 4 16 --duracao 20
+    $ python teste_carga.py --iniciar "gunicorn -c gunicorn.conf.py app:app" \\
+          --workers 1 2 4 --threads 1 2 --concorrencia 4 16 --saida carga.json
+    $ python teste_carga.py --gravar bodies.jsonl --requisicoes 1000
+    $ python teste_carga.py --payloads bodies.jsonl --concorrencia 8
+
+Cliente e servidor na mesma máquina disputam a CPU: para números de
+produção, rode o teste de outra máquina (só com --url).
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import platform
+import random
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from recursos import arvore_processos, memoria_processo, tempo_cpu
+
+NIVEIS_CURSO = ('BASICO', 'INTERMEDIARIO', 'AVANCADO')
+CABECALHOS = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+PERCENTIS = (50, 90, 95, 99)
+
+
+# ====== BODIES ======
+
+def ler_perfis(caminho):
+    with open(caminho, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def gerar_catalogo(rng, n):
+    """Cursos sintéticos (formato interno) com IDs >= 10000, incluindo os das carreiras."""
+    ids = rng.sample(range(10000, 10000 + max(n, 200)), max(n, 200))
+    return [{
+        'id_curso': id_curso,
+        'nome': f'Curso {id_curso}',
+        'nivel': rng.choice(NIVEIS_CURSO),
+        'carga_horaria': float(rng.choice([8, 12, 20, 30, 40, 60, 80])),
+        'avaliacao_media': round(rng.uniform(3.5, 5.0), 1),
+        'taxa_conclusao_media': round(rng.uniform(50, 95), 1),
+        'popularidade_score': float(rng.randint(10, 100))
+    } for id_curso in ids]
+
+
+def curso_java(c):
+    """Curso no formato enviado pelo backend Java (camelCase, ver app.normalizar_curso_java)."""
+    return {'id': c['id_curso'], 'nome': c['nome'], 'descricao': '', 'nivel': c['nivel'],
+            'cargaHoraria': c['carga_horaria'], 'avaliacaoMedia': c['avaliacao_media'],
+            'taxaConclusaoMedia': c['taxa_conclusao_media'], 'popularidadeScore': c['popularidade_score']}
+
+
+def body_java(linha, cursos, top_n):
+    body = {
+        'usuario_id': int(linha['id_usuario']),
+        'perfil': {
+            'nivel_experiencia': linha['nivel_experiencia'],
+            'tempo_disponivel_semanal': float(linha['tempo_disponivel_semanal']),
+            'idade': int(float(linha['idade'])),
+            'anos_experiencia_total': int(float(linha['anos_experiencia'])),
+            'objetivo_carreira': linha['carreira_desejada']
+        },
+        'top_n': top_n
+    }
+    if cursos:
+        body['cursos'] = [curso_java(c) for c in cursos]
+    return body
+
+
+def body_frontend(linha, cursos, top_n):
+    body = {
+        'usuario': {
+            'carreira_desejada': linha['carreira_desejada'],
+            'nivel_experiencia': linha['nivel_experiencia'],
+            'escolaridade': linha['escolaridade'],
+            'tempo_disponivel_semanal': float(linha['tempo_disponivel_semanal']),
+            'idade': float(linha['idade']),
+            'anos_experiencia': float(linha['anos_experiencia'])
+        },
+        'quantidade': top_n
+    }
+    if cursos:
+        body['cursos'] = cursos
+    return body
+
+
+def gerar_bodies(rng, perfis, n, formato, n_cursos, top_n):
+    """`n` bodies de /recomendar, cada um com um perfil e `n_cursos` cursos sorteados."""
+    catalogo = gerar_catalogo(rng, n_cursos)
+    bodies = []
+    for i in range(n):
+        linha = rng.choice(perfis)
+        cursos = rng.sample(catalogo, n_cursos) if n_cursos else []
+        java = formato == 'java' or (formato == 'misto' and i % 2 == 0)
+        bodies.append((body_java if java else body_frontend)(linha, cursos, top_n))
+    return bodies
+
+
+def ler_payloads(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+# ====== CLIENTES ======
+
+class Medicao:
+    """Resultados de um cliente (cada thread tem a sua, sem lock)."""
+
+    __slots__ = ('latencias', 'status', 'erros')
+
+    def __init__(self):
+        self.latencias = []
+        self.status = Counter()
+        self.erros = Counter()
+
+
+def cliente(alvo, caminho, bodies, inicio, passo, prazo, intervalo, timeout, medicao):
+    """
+    Um chamador: percorre `bodies` a partir de `inicio` de `passo` em `passo`
+    até `prazo` (perf_counter). Com `intervalo` (s) envia em horários fixos.
+    """
+    conexao = None
+    i = inicio
+    proximo = time.perf_counter()
+    while True:
+        agora = time.perf_counter()
+        if agora >= prazo:
+            break
+        if intervalo:
+            if proximo > agora:
+                time.sleep(proximo - agora)
+            enviado = proximo
+            proximo += intervalo
+        else:
+            enviado = agora
+        body = bodies[i % len(bodies)]
+        i += passo
+        try:
+            if conexao is None:
+                conexao = http.client.HTTPConnection(alvo.hostname, alvo.port or 80, timeout=timeout)
+            conexao.request('POST', caminho, body, CABECALHOS)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except (OSError, http.client.HTTPException) as e:
+            medicao.erros['timeout' if isinstance(e, TimeoutError) else 'conexao'] += 1
+            if conexao is not None:
+                conexao.close()
+                conexao = None
+            # Sem laço apertado enquanto o servidor estiver fora
+            time.sleep(0.01)
+            continue
+        latencia = time.perf_counter() - enviado
+        medicao.status[resposta.status] += 1
+        if resposta.status == 200 and b'"recomendacoes"' in dados:
+            medicao.latencias.append(latencia)
+        elif resposta.status == 200:
+            medicao.erros['resposta_invalida'] += 1
+        else:
+            medicao.erros[f'http_{resposta.status}'] += 1
+        if resposta.will_close:
+            conexao.close()
+            conexao = None
+    if conexao is not None:
+        conexao.close()
+
+
+def disparar(url, bodies, concorrencia, duracao, taxa, timeout):
+    """Roda `concorrencia` clientes por `duracao` segundos e junta as medições."""
+    alvo = urlsplit(url)
+    caminho = (alvo.path.rstrip('/') or '') + '/recomendar'
+    intervalo = concorrencia / taxa if taxa else None
+    prazo = time.perf_counter() + duracao
+    medicoes = [Medicao() for _ in range(concorrencia)]
+    threads = [threading.Thread(target=cliente, args=(alvo, caminho, bodies, c, concorrencia, prazo,
+                                                      intervalo, timeout, medicoes[c]), daemon=True)
+               for c in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = Medicao()
+    for m in medicoes:
+        total.latencias.extend(m.latencias)
+        total.status.update(m.status)
+        total.erros.update(m.erros)
+    return total, time.perf_counter() - inicio
+
+
+def percentil(ordenados, p):
+    """Percentil pelo posto mais próximo (valores já ordenados)."""
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))]
+
+
+def resumir(medicao, duracao):
+    ms = sorted(v * 1000 for v in medicao.latencias)
+    ok = len(ms)
+    erros = sum(medicao.erros.values())
+    total = ok + erros
+    latencia = {f'p{p}': round(percentil(ms, p), 3) if ms else None for p in PERCENTIS}
+    latencia['max'] = round(ms[-1], 3) if ms else None
+    latencia['media'] = round(sum(ms) / ok, 3) if ok else None
+    return {
+        'requisicoes': total,
+        'ok': ok,
+        'duracao_s': round(duracao, 2),
+        'vazao_rps': round(ok / duracao, 1) if duracao else 0.0,
+        'latencia_ms': latencia,
+        'erros': dict(medicao.erros),
+        'taxa_erros': round(erros / total, 4) if total else 0.0,
+        'status': {str(s): n for s, n in sorted(medicao.status.items())}
+    }
+
+
+# ====== SERVIDOR (CPU e memória) ======
+
+class AmostradorServidor:
+    """Lê CPU e memória do processo do servidor e dos seus filhos (workers) de tempos em tempos."""
+
+    def __init__(self, pid, intervalo=1.0):
+        self.pid = pid
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread = None
+        self._cpu_inicio = {}
+        self._cpu_fim = {}
+        self._memoria = {}
+        self._pss_total = 0.0
+        self._inicio = None
+
+    def _amostrar(self):
+        pss_total = 0.0
+        for pid in arvore_processos(self.pid):
+            cpu = tempo_cpu(pid)
+            if cpu is None:
+                continue
+            self._cpu_inicio.setdefault(pid, cpu)
+            self._cpu_fim[pid] = cpu
+            memoria = memoria_processo(pid)
+            maximo = self._memoria.setdefault(pid, {'rss_mb': 0.0, 'pss_mb': 0.0})
+            for campo in maximo:
+                if memoria[campo] is not None:
+                    maximo[campo] = max(maximo[campo], memoria[campo])
+            pss_total += memoria['pss_mb'] or 0.0
+        self._pss_total = max(self._pss_total, pss_total)
+
+    def _rodar(self):
+        while not self._parar.wait(self.intervalo):
+            self._amostrar()
+
+    def iniciar(self):
+        self._amostrar()
+        self._inicio = time.perf_counter()
+        self._thread = threading.Thread(target=self._rodar, daemon=True)
+        self._thread.start()
+
+    def encerrar(self):
+        self._parar.set()
+        self._thread.join()
+        self._amostrar()
+        duracao = time.perf_counter() - self._inicio
+        processos = {}
+        for pid, inicio in self._cpu_inicio.items():
+            processos[str(pid)] = dict(self._memoria[pid],
+                                       cpu_pct=round((self._cpu_fim[pid] - inicio) / duracao * 100, 1))
+        return {
+            'pid': self.pid,
+            'processos': processos,
+            'cpu_pct_total': round(sum(p['cpu_pct'] for p in processos.values()), 1),
+            'rss_mb_max': max((p['rss_mb'] for p in processos.values()), default=None),
+            'pss_mb_total': round(self._pss_total, 1)
+        }
+
+
+def saudavel(url, timeout=2.0):
+    alvo = urlsplit(url)
+    try:
+        conexao = http.client.HTTPConnection(alvo.hostname, alvo.port or 80, timeout=timeout)
+        conexao.request('GET', (alvo.path.rstrip('/') or '') + '/health')
+        ok = conexao.getresponse().status == 200
+        conexao.close()
+        return ok
+    except (OSError, http.client.HTTPException):
+        return False
+
+
+def iniciar_servidor(comando, url, workers, threads, log, espera=180.0):
+    """Sobe o servidor com WEB_CONCURRENCY/GUNICORN_THREADS e espera o /health e os workers."""
+    ambiente = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+                    PORT=str(urlsplit(url).port or 80))
+    processo = subprocess.Popen(shlex.split(comando), env=ambiente, stdout=log, stderr=subprocess.STDOUT)
+    limite = time.monotonic() + espera
+    pronto = None
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f'Servidor terminou com código {processo.returncode} ({comando})')
+        if pronto is None and saudavel(url):
+            pronto = time.monotonic()
+        # gunicorn: master + `workers` filhos; um servidor de processo único
+        # (sem filhos) vale depois de alguns segundos respondendo o /health
+        if pronto is not None and (len(arvore_processos(processo.pid)) > workers or time.monotonic() - pronto > 5):
+            return processo
+        time.sleep(0.2)
+    parar_servidor(processo)
+    raise RuntimeError(f'Servidor não respondeu /health em {espera:.0f} s')
+
+
+def parar_servidor(processo):
+    processo.send_signal(signal.SIGTERM)
+    try:
+        processo.wait(30)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+        processo.wait()
+
+
+# ====== EXECUÇÃO ======
+
+def medir_niveis(args, bodies, pid, rotulo):
+    resultados = []
+    for concorrencia in args.concorrencia:
+        if args.aquecimento:
+            disparar(args.url, bodies, concorrencia, args.aquecimento, args.taxa, args.timeout)
+        amostrador = AmostradorServidor(pid) if pid else None
+        if amostrador is not None:
+            amostrador.iniciar()
+        medicao, duracao = disparar(args.url, bodies, concorrencia, args.duracao, args.taxa, args.timeout)
+        r = dict(rotulo, concorrencia=concorrencia, **resumir(medicao, duracao))
+        if amostrador is not None:
+            r['servidor'] = amostrador.encerrar()
+        resultados.append(r)
+
+        lat = r['latencia_ms']
+        servidor = r.get('servidor')
+        extra = (f"  CPU {servidor['cpu_pct_total']:6.1f}%  PSS {servidor['pss_mb_total']:7.1f} MB"
+                 if servidor else '')
+        prefixo = ''.join(f'{k[0]}{v} ' for k, v in rotulo.items())
+        print(f"  {prefixo}c{concorrencia:<4} {r['vazao_rps']:8.1f} req/s  p50 {lat['p50'] or 0:8.2f}  "
+              f"p95 {lat['p95'] or 0:8.2f}  p99 {lat['p99'] or 0:8.2f} ms  erros {r['taxa_erros']:.2%}{extra}",
+              file=sys.stderr)
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga do /recomendar')
+    parser.add_argument('--url', default='http://localhost:7860')
+    parser.add_argument('--concorrencia', type=int, nargs='+', default=[1, 4, 16],
+                        help='clientes simultâneos (um nível por valor)')
+    parser.add_argument('--duracao', type=float, default=15.0, help='segundos medidos por nível')
+    parser.add_argument('--aquecimento', type=float, default=3.0, help='segundos descartados antes de cada nível')
+    parser.add_argument('--taxa', type=float, help='requisições/s no total (sem: cada cliente envia sem pausa)')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--formato', choices=('java', 'frontend', 'misto'), default='java')
+    parser.add_argument('--cursos', type=int, default=100, help='cursos por requisição (0 = catálogo do servidor)')
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--requisicoes', type=int, default=500, help='bodies distintos gerados (usados em ciclo)')
+    parser.add_argument('--usuarios', default='usuarios.csv')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--payloads', help='JSONL com um body de /recomendar por linha (em vez dos gerados)')
+    parser.add_argument('--gravar', help='grava os bodies gerados em JSONL e sai')
+    parser.add_argument('--pid', type=int, help='pid do servidor local (master do gunicorn) para CPU/memória')
+    parser.add_argument('--iniciar', metavar='COMANDO', help='sobe o servidor com este comando a cada combinação')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1], help='WEB_CONCURRENCY (com --iniciar)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1], help='GUNICORN_THREADS (com --iniciar)')
+    parser.add_argument('--log-servidor', help='arquivo para a saída do servidor (com --iniciar)')
+    parser.add_argument('--max-erros', type=float, help='sai com código 1 se algum nível passar desta taxa de erros')
+    parser.add_argument('--saida', help='arquivo JSON (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    if args.payloads:
+        corpos = ler_payloads(args.payloads)
+    else:
+        rng = random.Random(args.semente)
+        corpos = gerar_bodies(rng, ler_perfis(args.usuarios), args.requisicoes, args.formato,
+                              args.cursos, args.top_n)
+    if args.gravar:
+        with open(args.gravar, 'w', encoding='utf-8') as f:
+            for body in corpos:
+                f.write(json.dumps(body, ensure_ascii=False) + '\n')
+        print(f"✓ {len(corpos)} bodies em {args.gravar}", file=sys.stderr)
+        return 0
+    if not corpos:
+        print("❌ Nenhum body para enviar", file=sys.stderr)
+        return 1
+    bodies = [json.dumps(b, ensure_ascii=False).encode('utf-8') for b in corpos]
+
+    print(f"🔥 Teste de carga: {args.url}, {len(bodies)} bodies "
+          f"({'payloads ' + args.payloads if args.payloads else args.formato}), "
+          f"concorrência {args.concorrencia}, {args.duracao:.0f} s por nível", file=sys.stderr)
+    inicio = time.perf_counter()
+    resultados = []
+    if args.iniciar:
+        log = open(args.log_servidor, 'ab') if args.log_servidor else subprocess.DEVNULL
+        try:
+            for workers in args.workers:
+                for threads in args.threads:
+                    processo = iniciar_servidor(args.iniciar, args.url, workers, threads, log)
+                    try:
+                        resultados += medir_niveis(args, bodies, processo.pid,
+                                                   {'workers': workers, 'threads': threads})
+                    finally:
+                        parar_servidor(processo)
+        finally:
+            if args.log_servidor:
+                log.close()
+    else:
+        if not saudavel(args.url):
+            print(f"❌ {args.url}/health não respondeu", file=sys.stderr)
+            return 1
+        resultados = medir_niveis(args, bodies, args.pid, {})
+
+    relatorio = {
+        'meta': {
+            'data': datetime.now().isoformat(),
+            'duracao_s': round(time.perf_counter() - inicio, 2),
+            'url': args.url,
+            'servidor': args.iniciar,
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'formato': 'payloads' if args.payloads else args.formato,
+            'bodies': len(bodies),
+            'cursos': None if args.payloads else args.cursos,
+            'top_n': args.top_n,
+            'duracao_nivel_s': args.duracao,
+            'aquecimento_s': args.aquecimento,
+            'taxa': args.taxa,
+            'semente': args.semente
+        },
+        'resultados': resultados
+    }
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"✓ Resultado em {args.saida}", file=sys.stderr)
+    else:
+        print(texto)
+
+    if args.max_erros is not None:
+        acima = [r for r in resultados if r['taxa_erros'] > args.max_erros]
+        for r in acima:
+            print(f"❌ Concorrência {r['concorrencia']}: {r['taxa_erros']:.2%} de erros", file=sys.stderr)
+        if acima:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
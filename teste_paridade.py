@@ -0,0 +1,433 @@
+"""
+Teste de Paridade - SkillBridge
+Garante que o ranking vetorizado (ranquear_cursos) é idêntico ao caminho
+antigo, que pontuava um curso por vez com DataFrames de uma linha.
+
+Além do ranking direto, cobre os caminhos que chegam a ele por outras
+entradas: body no formato Java (decodificar_cursos), catálogo do servidor
+(com e sem cursos_ids), sessões incrementais, /recomendar/lote, o job
+recomendar_lote.py, a memória de previsões e o ranking aproximado com
+folga infinita.
+
+A referência não usa nada de app.py nem do pacote pontuacao: os mapas e as
+funções por curso abaixo são a cópia congelada do app.py original, e os
+modelos são os .pkl do scikit-learn (a API pode estar servindo o motor
+compilado de pontuacao/motor_arvores.py). Assim o teste pega uma regressão tanto na
+refatoração das regras quanto na compilação das florestas.
+"""
+
+import csv
+import json
+import os
+import pickle
+import random
+import tempfile
+import pandas as pd
+
+import app
+
+# ====== REFERÊNCIA: app.py original (não alterar) ======
+
+with open('modelo_classificacao.pkl', 'rb') as f:
+    modelo_classificacao = pickle.load(f)
+with open('modelo_regressao.pkl', 'rb') as f:
+    modelo_regressao = pickle.load(f)
+with open('features.json', 'r') as f:
+    features_config = json.load(f)
+
+NIVEL_EXP_MAP = {'Junior': 1, 'Intermediário': 2, 'Senior': 3}
+ESCOLARIDADE_MAP = {'Ensino Fundamental': 1, 'Ensino Médio': 2, 'Técnico': 3,
+                    'Superior Incompleto': 4, 'Superior Completo': 5,
+                    'Pós-graduação': 6, 'Mestrado': 7, 'Doutorado': 8}
+NIVEL_CURSO_MAP = {'BASICO': 1, 'INTERMEDIARIO': 2, 'AVANCADO': 3}
+
+CARREIRAS_CURSOS = {
+    'Desenvolvedor Full Stack': [10034, 10035, 10036, 10037, 10038, 10039, 10040, 10041, 10042, 10043],
+    'Desenvolvedor Frontend': [10034, 10035, 10036, 10044, 10045, 10046, 10047, 10048, 10049, 10050, 10051, 10052, 10053],
+    'Desenvolvedor Backend': [10037, 10038, 10054, 10055, 10056, 10057, 10058, 10059, 10060, 10061, 10062, 10063],
+    'Desenvolvedor Mobile': [10064, 10065, 10066, 10067, 10068, 10069, 10070, 10071, 10072, 10073],
+    'Cientista de Dados': [10074, 10075, 10076, 10077, 10078, 10079, 10080, 10081, 10082, 10083],
+    'Engenheiro de Dados': [10084, 10085, 10086, 10087, 10088, 10089, 10090, 10091, 10092, 10093],
+    'Analista de Dados': [10094, 10095, 10096, 10097, 10098, 10099, 10100, 10101, 10102, 10103],
+    'DevOps Engineer': [10104, 10105, 10106, 10107, 10108, 10109, 10110, 10111, 10112, 10113],
+    'Designer UX/UI': [10114, 10115, 10116, 10117, 10118, 10119, 10120, 10121, 10122, 10123],
+    'Product Manager': [10124, 10125, 10126, 10127, 10128, 10129, 10130, 10131, 10132, 10133],
+    'Arquiteto de Software': [10134, 10135, 10136, 10137, 10138, 10139, 10140, 10141, 10142, 10143],
+    'Engenheiro de Machine Learning': [10144, 10145, 10146, 10147, 10148, 10149, 10150, 10151, 10152, 10153],
+    'Especialista em Cloud': [10154, 10155, 10156, 10157, 10158, 10159, 10160, 10161, 10162, 10163],
+    'Analista de Segurança': [10164, 10165, 10166, 10167, 10168, 10169, 10170, 10171, 10172, 10173],
+    'QA/Tester': [10174, 10175, 10176, 10177, 10178, 10179, 10180, 10181, 10182, 10183]
+}
+
+def criar_features(perfil, curso):
+    nivel_exp = NIVEL_EXP_MAP.get(perfil.get('nivel_experiencia', 'Junior'), 1)
+    nivel_curso = NIVEL_CURSO_MAP.get(curso.get('nivel', 'BASICO'), 1)
+    escolaridade = ESCOLARIDADE_MAP.get(perfil.get('escolaridade', 'Superior Completo'), 5)
+    
+    match_nivel = 1 if nivel_exp >= nivel_curso - 1 else 0
+    tempo_semanal = perfil.get('tempo_disponivel_semanal', 5.0)
+    carga_semanal = curso.get('carga_horaria', 10.0) / 4
+    match_tempo = 1 if tempo_semanal >= carga_semanal else 0
+    
+    carreira = perfil.get('carreira_desejada', '')
+    cursos_carreira = CARREIRAS_CURSOS.get(carreira, [])
+    match_carreira = 1 if curso.get('id_curso') in cursos_carreira else 0
+    
+    return {
+        'nivel_experiencia_num': nivel_exp, 'tempo_disponivel_semanal': tempo_semanal,
+        'idade': perfil.get('idade', 25), 'anos_experiencia': perfil.get('anos_experiencia', 0),
+        'escolaridade_num': escolaridade, 'nivel_curso_num': nivel_curso,
+        'carga_horaria': curso.get('carga_horaria', 10.0),
+        'avaliacao_media': curso.get('avaliacao_media', 4.0),
+        'taxa_conclusao_media': curso.get('taxa_conclusao_media', 80.0),
+        'popularidade_score': curso.get('popularidade_score', 50.0),
+        'match_nivel': match_nivel, 'match_tempo': match_tempo,
+        'match_carreira': match_carreira, 'progresso': 0.0
+    }
+
+def aplicar_regras_negocio(score_base, features, perfil, curso):
+    score = score_base
+    nivel_usuario = NIVEL_EXP_MAP.get(perfil.get('nivel_experiencia', 'Junior'), 1)
+    nivel_curso = NIVEL_CURSO_MAP.get(curso.get('nivel', 'BASICO'), 1)
+    
+    diff_nivel = nivel_curso - nivel_usuario
+    
+    if diff_nivel >= 2:
+        score *= 0.3
+    elif diff_nivel == 1 and nivel_usuario == 1:
+        score *= 0.7
+    elif diff_nivel <= -2:
+        score *= 0.4
+    elif diff_nivel == -1 and nivel_usuario == 3:
+        score *= 0.7
+    
+    if features['match_carreira'] == 1:
+        score *= 1.4
+    else:
+        score *= 0.6
+    
+    if features['match_tempo'] == 1:
+        score *= 1.1
+    
+    if features['avaliacao_media'] >= 4.7:
+        score *= 1.1
+    
+    return max(0, min(10, score))
+
+def normalizar_perfil_java(perfil_java):
+    return {
+        'carreira_desejada': perfil_java.get('objetivo_carreira', ''),
+        'nivel_experiencia': perfil_java.get('nivel_experiencia', 'Junior'),
+        'idade': perfil_java.get('idade', 25),
+        'anos_experiencia': perfil_java.get('anos_experiencia_total', 0),
+        'escolaridade': 'Superior Completo',
+        'tempo_disponivel_semanal': float(perfil_java.get('tempo_disponivel_semanal', 5.0))
+    }
+
+def normalizar_curso_java(c):
+    return {
+        'id_curso': c.get('id') or c.get('id_curso'),
+        'nome': c.get('nome'),
+        'descricao': c.get('descricao'),
+        'nivel': c.get('nivel'),
+        'carga_horaria': float(c.get('cargaHoraria') or c.get('carga_horaria') or 10),
+        'avaliacao_media': float(c.get('avaliacaoMedia') or c.get('avaliacao_media') or 4.0),
+        'taxa_conclusao_media': float(c.get('taxaConclusaoMedia') or c.get('taxa_conclusao_media') or 80),
+        'popularidade_score': float(c.get('popularidadeScore') or c.get('popularidade_score') or 50)
+    }
+
+def filtrar_validos(cursos):
+    return [c for c in cursos if c.get('id_curso', 0) >= 10000]
+
+def gerar_motivo(features, prob):
+    m = []
+    if features['match_carreira'] == 1: m.append("Alinhado com sua carreira")
+    if features['match_nivel'] == 1: m.append("Nível adequado")
+    if features['match_tempo'] == 1: m.append("Carga horária compatível")
+    if features['avaliacao_media'] >= 4.5: m.append(f"Bem avaliado ({features['avaliacao_media']:.1f}/5)")
+    if prob >= 0.7: m.append("Alta chance de conclusão")
+    return ". ".join(m) + "." if m else "Recomendado para você"
+
+print("="*80)
+print("🧪 TESTE DE PARIDADE - RANKING VETORIZADO x POR CURSO")
+print("="*80)
+print(f"Referência: {type(modelo_regressao).__name__} (.pkl) | API: {type(app.modelo_regressao).__name__}")
+
+NIVEIS = list(NIVEL_CURSO_MAP) + [None]
+CARREIRAS = list(CARREIRAS_CURSOS) + ['Carreira Inexistente']
+
+def gerar_catalogo(rng, n):
+    cursos = []
+    for _ in range(n):
+        cursos.append({
+            'id_curso': rng.randint(10000, 10200),
+            'nome': f'Curso {rng.randint(1, 9999)}',
+            'nivel': rng.choice(NIVEIS),
+            'carga_horaria': rng.choice([8, 20, 40.0, 60, 80.5]),
+            'avaliacao_media': rng.choice([3.9, 4.5, 4.7, 4.8, 5]),
+            'taxa_conclusao_media': round(rng.uniform(50, 95), 1),
+            'popularidade_score': rng.randint(10, 100)
+        })
+    return cursos
+
+def gerar_perfil(rng):
+    return {
+        'carreira_desejada': rng.choice(CARREIRAS),
+        'nivel_experiencia': rng.choice(list(NIVEL_EXP_MAP) + ['JUNIOR']),
+        'idade': rng.randint(18, 60),
+        'anos_experiencia': rng.randint(0, 20),
+        'escolaridade': rng.choice(list(ESCOLARIDADE_MAP)),
+        'tempo_disponivel_semanal': rng.choice([2, 5, 10.0, 15, 20])
+    }
+
+def gerar_perfil_java(rng):
+    perfil = gerar_perfil(rng)
+    perfil_java = {
+        'objetivo_carreira': perfil['carreira_desejada'],
+        'nivel_experiencia': perfil['nivel_experiencia'],
+        'idade': perfil['idade'],
+        'anos_experiencia_total': perfil['anos_experiencia'],
+        'tempo_disponivel_semanal': perfil['tempo_disponivel_semanal']
+    }
+    # Campos ausentes caem nos padrões de normalizar_perfil_java
+    for campo in ('idade', 'anos_experiencia_total', 'tempo_disponivel_semanal'):
+        if rng.random() < 0.2:
+            del perfil_java[campo]
+    return perfil_java
+
+# Chaves do curso no formato Java (camelCase) e a equivalente snake_case
+CHAVES_JAVA = [('cargaHoraria', 'carga_horaria'), ('avaliacaoMedia', 'avaliacao_media'),
+               ('taxaConclusaoMedia', 'taxa_conclusao_media'), ('popularidadeScore', 'popularidade_score')]
+
+def gerar_cursos_java(rng, n, ids=None):
+    """Cursos como o Java manda: camelCase, às vezes snake_case, zeros e campos ausentes."""
+    cursos = []
+    for curso in gerar_catalogo(rng, n):
+        java = {'nome': curso['nome'], 'nivel': curso['nivel'], 'descricao': 'Descrição'}
+        java['id' if rng.random() < 0.7 else 'id_curso'] = ids.pop() if ids else rng.randint(9990, 10200)
+        for camel, snake in CHAVES_JAVA:
+            sorteio = rng.random()
+            if sorteio < 0.6:
+                java[camel] = curso[snake]
+            elif sorteio < 0.75:
+                java[snake] = curso[snake]
+            elif sorteio < 0.85:
+                java[camel] = 0
+                java[snake] = curso[snake]
+            elif sorteio < 0.9:
+                java[camel] = None
+        cursos.append(java)
+    return cursos
+
+def ranking_por_curso(usuario, cursos, quantidade):
+    """Implementação original de /recomendar, um curso por vez."""
+    recomendacoes = []
+    for curso in cursos:
+        features = criar_features(usuario, curso)
+        X_reg = pd.DataFrame([{k: features[k] for k in features_config['regressao']}])
+        X_class = pd.DataFrame([{k: features[k] for k in features_config['classificacao']}])
+
+        score_base = float(modelo_regressao.predict(X_reg)[0])
+        score_base = max(0, min(10, score_base))
+        score_final = aplicar_regras_negocio(score_base, features, usuario, curso)
+        prob = float(modelo_classificacao.predict_proba(X_class)[0][1])
+
+        recomendacoes.append({
+            'id_curso': curso.get('id_curso'),
+            'score_relevancia': round(score_final, 2),
+            'probabilidade_conclusao': round(prob, 2),
+            'motivo': gerar_motivo(features, prob)
+        })
+
+    recomendacoes.sort(key=lambda x: x['score_relevancia'], reverse=True)
+    return recomendacoes[:quantidade]
+
+def resumir(top):
+    return [{
+        'id_curso': r['curso']['id_curso'],
+        'score_relevancia': r['score_relevancia'],
+        'probabilidade_conclusao': r['probabilidade_conclusao'],
+        'motivo': r['motivo']
+    } for r in top]
+
+rng = random.Random(42)
+falhas = 0
+casos = 0
+
+for n_cursos in (1, 6, 40, 150):
+    for _ in range(5):
+        usuario = gerar_perfil(rng)
+        cursos = gerar_catalogo(rng, n_cursos)
+        quantidade = rng.choice([3, 10, 200])
+
+        esperado = ranking_por_curso(usuario, cursos, quantidade)
+        obtido = resumir(app.ranquear_cursos(usuario, cursos, quantidade))
+
+        casos += 1
+        if esperado != obtido:
+            falhas += 1
+            print(f"❌ Divergência com {n_cursos} cursos: {usuario}")
+
+# Catálogos grandes com top pequeno exercitam a poda de gerar_candidatos
+for _ in range(5):
+    usuario = gerar_perfil(rng)
+    usuario['carreira_desejada'] = 'Cientista de Dados'
+    cursos = gerar_catalogo(rng, 300)
+    esperado = ranking_por_curso(usuario, cursos, 3)
+    obtido = resumir(app.ranquear_cursos(usuario, cursos, 3))
+
+    casos += 1
+    if esperado != obtido:
+        falhas += 1
+        print(f"❌ Divergência com poda de candidatos: {usuario}")
+
+def conferir(descricao, esperado, obtido):
+    global casos, falhas
+    casos += 1
+    if esperado != obtido:
+        falhas += 1
+        print(f"❌ Divergência: {descricao}")
+
+cliente = app.app.test_client()
+
+# Formato Java em /recomendar: perfil e cursos em camelCase, decodificados em colunas
+for n_cursos in (6, 40, 150):
+    for _ in range(3):
+        perfil_java = gerar_perfil_java(rng)
+        cursos = gerar_cursos_java(rng, n_cursos)
+        quantidade = rng.choice([3, 10, 200])
+        validos = filtrar_validos([normalizar_curso_java(c) for c in cursos])
+        if not validos:
+            continue
+        esperado = ranking_por_curso(normalizar_perfil_java(perfil_java), validos, quantidade)
+        resposta = cliente.post('/recomendar', json={'usuario_id': 1, 'perfil': perfil_java,
+                                                     'cursos': cursos, 'top_n': quantidade})
+        conferir(f"formato Java com {n_cursos} cursos", esperado, resumir(resposta.get_json()['recomendacoes']))
+
+# Catálogo do servidor: cursos enviados em Java, atualizados por upsert e escolhidos por cursos_ids
+catalogo_original = app.catalogo
+app.catalogo = app.Catalogo(os.path.join(tempfile.gettempdir(), 'paridade_sem_catalogo.json'),
+                            app.normalizar_curso_java, app.colunas_cursos)
+ids = rng.sample(range(9990, 10200), 120)
+carga = gerar_cursos_java(rng, 120, list(ids))
+atualizacao = gerar_cursos_java(rng, 20, rng.sample(ids, 20))
+app.catalogo.upsert(carga)
+app.catalogo.upsert(atualizacao)
+por_id = {}
+for curso in carga + atualizacao:
+    curso = normalizar_curso_java(curso)
+    por_id[curso['id_curso']] = curso
+for _ in range(6):
+    usuario = gerar_perfil(rng)
+    quantidade = rng.choice([3, 10, 200])
+    cursos_ids = rng.choice([None, rng.sample(ids, 30) + [1, 99999]])
+    if cursos_ids is None:
+        validos = filtrar_validos(list(por_id.values()))
+    else:
+        validos = filtrar_validos([por_id[i] for i in cursos_ids if i in por_id])
+    esperado = ranking_por_curso(usuario, validos, quantidade)
+    resposta = cliente.post('/recomendar', json={'usuario': usuario, 'quantidade': quantidade,
+                                                 'cursos_ids': cursos_ids})
+    conferir(f"catálogo (cursos_ids={cursos_ids is not None})", esperado,
+             resumir(resposta.get_json()['recomendacoes']))
+app.catalogo = catalogo_original
+
+# Sessão incremental: o mesmo usuário com perfil e cursos mudando entre chamadas
+cursos = gerar_catalogo(rng, 80)
+for i, curso in enumerate(cursos):
+    curso['id_curso'] = 10000 + i
+usuario = gerar_perfil(rng)
+for passo in range(4):
+    if passo == 1:
+        for curso in rng.sample(cursos, 10):
+            curso['carga_horaria'] = rng.choice([8, 20, 40.0, 60, 80.5])
+            curso['avaliacao_media'] = rng.choice([3.9, 4.5, 4.7, 4.8, 5])
+    elif passo == 2:
+        usuario = dict(usuario, tempo_disponivel_semanal=rng.choice([2, 5, 10.0, 15, 20]),
+                       idade=usuario['idade'] + 1)
+    elif passo == 3:
+        cursos = cursos[5:] + [dict(c, id_curso=10100 + i) for i, c in enumerate(gerar_catalogo(rng, 10))]
+    quantidade = rng.choice([3, 10])
+    esperado = ranking_por_curso(usuario, cursos, quantidade)
+    obtido = app.ranquear_incremental(90000, usuario, cursos, quantidade, app.colunas_cursos(cursos))
+    conferir(f"sessão incremental, passo {passo}", esperado, resumir(obtido))
+
+# /recomendar/lote: perfis Java e Frontend misturados, cursos nos dois formatos
+for formato in ('frontend', 'java'):
+    perfis_java = [gerar_perfil_java(rng) for _ in range(4)]
+    usuarios = [gerar_perfil(rng) for _ in range(4)]
+    itens = ([{'usuario_id': i, 'perfil': p} for i, p in enumerate(perfis_java)] +
+             [{'usuario_id': 10 + i, 'usuario': u} for i, u in enumerate(usuarios)])
+    if formato == 'java':
+        cursos = gerar_cursos_java(rng, 60)
+        validos = filtrar_validos([normalizar_curso_java(c) for c in cursos])
+    else:
+        cursos = gerar_catalogo(rng, 60)
+        validos = filtrar_validos(cursos)
+    quantidade = rng.choice([3, 10])
+    resposta = cliente.post('/recomendar/lote', json={'usuarios': itens, 'cursos': cursos,
+                                                      'formato': formato, 'top_n': quantidade})
+    linhas = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    referencias = [normalizar_perfil_java(p) for p in perfis_java] + usuarios
+    for item, perfil, linha in zip(itens, referencias, linhas):
+        conferir(f"/recomendar/lote ({formato}), usuario_id {item['usuario_id']}",
+                 (item['usuario_id'], ranking_por_curso(perfil, validos, quantidade)),
+                 (linha.get('usuario_id'), resumir(linha.get('recomendacoes', []))))
+
+# recomendar_lote.py: catálogo e usuários lidos de arquivo, saída NDJSON
+import recomendar_lote
+
+with tempfile.TemporaryDirectory() as pasta:
+    ids = rng.sample(range(9990, 10200), 80)
+    catalogo_job = gerar_cursos_java(rng, 80, list(ids))
+    with open(os.path.join(pasta, 'catalogo.json'), 'w', encoding='utf-8') as f:
+        json.dump(catalogo_job, f)
+    usuarios = [dict(gerar_perfil(rng), id_usuario=i) for i in range(6)]
+    campos = ['id_usuario', 'carreira_desejada', 'nivel_experiencia', 'escolaridade',
+              'idade', 'anos_experiencia', 'tempo_disponivel_semanal']
+    with open(os.path.join(pasta, 'usuarios.csv'), 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=campos)
+        escritor.writeheader()
+        escritor.writerows(usuarios)
+    recomendar_lote.main(['--usuarios', os.path.join(pasta, 'usuarios.csv'),
+                          '--catalogo', os.path.join(pasta, 'catalogo.json'),
+                          '--saida', os.path.join(pasta, 'saida.ndjson'), '--top-n', '5', '--processos', '1'])
+    with open(os.path.join(pasta, 'saida.ndjson'), encoding='utf-8') as f:
+        saida = [json.loads(linha) for linha in f]
+
+validos = filtrar_validos([normalizar_curso_java(c) for c in catalogo_job])
+for usuario in usuarios:
+    esperado = [dict(r, rank=i + 1) for i, r in enumerate(ranking_por_curso(usuario, validos, 5))]
+    obtido = [{'id_curso': r['id_curso'], 'score_relevancia': r['score_relevancia'],
+               'probabilidade_conclusao': r['probabilidade_conclusao'], 'motivo': r['motivo'], 'rank': r['rank']}
+              for r in saida if r['id_usuario'] == usuario['id_usuario']]
+    conferir(f"recomendar_lote.py, id_usuario {usuario['id_usuario']}", esperado, obtido)
+
+# Memória de previsões: a segunda rodada sai da memória e tem de dar o mesmo ranking
+app.registro.ativa.memo.invalidar()
+cursos = gerar_catalogo(rng, 150)
+usuarios = [gerar_perfil(rng) for _ in range(3)]
+for rodada in range(2):
+    hits = app.registro.ativa.memo.estatisticas()['hits']
+    for usuario in usuarios:
+        conferir(f"memória de previsões, rodada {rodada}", ranking_por_curso(usuario, cursos, 10),
+                 resumir(app.ranquear_cursos(usuario, cursos, 10)))
+    if rodada == 1 and app.registro.ativa.memo.max_itens > 0:
+        conferir("memória de previsões usada na segunda rodada", True, app.registro.ativa.memo.estatisticas()['hits'] > hits)
+
+# Ranking aproximado com folga infinita: só limites garantidos, igual ao exato
+for _ in range(3):
+    usuario = gerar_perfil(rng)
+    cursos = gerar_catalogo(rng, 1500)
+    app.registro.ativa.memo.invalidar()
+    conferir("ranking aproximado com folga infinita", ranking_por_curso(usuario, cursos, 10),
+             resumir(app.ranquear_cursos(usuario, cursos, 10, folga=float('inf'))))
+
+print(f"\n✓ {casos - falhas}/{casos} cenários idênticos")
+
+print("\n" + "="*80)
+print("✅ PARIDADE CONFIRMADA" if falhas == 0 else "❌ PARIDADE QUEBRADA")
+print("="*80)
+
+if falhas:
+    raise SystemExit(1)
@@ -0,0 +1,125 @@
+"""
+Teste do Registro de Modelos com vários workers - SkillBridge
+Sobe o gunicorn com 2 workers e confere que as trocas feitas por
+/admin/modelos (que chegam a um worker só) valem para todos eles
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+TOKEN = 'teste-registro'
+WORKERS = 2
+
+print("="*80)
+print("🧪 TESTE DO REGISTRO DE MODELOS COM VÁRIOS WORKERS - SKILLBRIDGE")
+print("="*80)
+
+# Uma versão nova em SKILLBRIDGE_MODELOS_RAIZ: os mesmos modelos compilados,
+# com outro nome em metricas_modelos.json (como treinar_modelos.py grava)
+raiz = tempfile.mkdtemp(prefix='skillbridge-registro-')
+versao = os.path.join(raiz, 'v2')
+os.makedirs(versao)
+shutil.copytree('modelos_compilados', os.path.join(versao, 'compilados'))
+shutil.copy('features.json', versao)
+with open(os.path.join(versao, 'metricas_modelos.json'), 'w') as f:
+    json.dump({'treinamento': {'versao': 'v2-teste'}}, f)
+
+with socket.socket() as s:
+    s.bind(('127.0.0.1', 0))
+    porta = s.getsockname()[1]
+base = f'http://127.0.0.1:{porta}'
+
+ambiente = dict(os.environ, PORT=str(porta), WEB_CONCURRENCY=str(WORKERS), GUNICORN_THREADS='1',
+                SKILLBRIDGE_ADMIN_TOKEN=TOKEN, SKILLBRIDGE_MODELOS_RAIZ=raiz,
+                SKILLBRIDGE_REGISTRO_INTERVALO='0.1')
+servidor = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                            env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def chamar(metodo, caminho, corpo=None):
+    """(status, json) de uma requisição em uma conexão nova (o kernel escolhe o worker)."""
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+    pedido = urllib.request.Request(base + caminho, data=dados, method=metodo,
+                                    headers={'Content-Type': 'application/json', 'X-Admin-Token': TOKEN})
+    try:
+        with urllib.request.urlopen(pedido, timeout=30) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def aguardar_workers(condicao, descricao, limite=60):
+    """Consulta /admin/modelos até `condicao` valer nos WORKERS processos."""
+    vistos = {}
+    fim = time.time() + limite
+    while time.time() < fim:
+        try:
+            _, estatisticas = chamar('GET', '/admin/modelos')
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+            continue
+        vistos[estatisticas['pid']] = estatisticas
+        if len(vistos) >= WORKERS and all(condicao(e) for e in vistos.values()):
+            print(f"✓ {descricao} nos {len(vistos)} workers")
+            return vistos
+        time.sleep(0.05)
+    raise AssertionError(f"{descricao}: workers em {[(p, e['ativa'], e['geracao']) for p, e in vistos.items()]}")
+
+
+usuario = {'carreira_desejada': 'Cientista de Dados', 'nivel_experiencia': 'JUNIOR', 'anos_experiencia': 1,
+           'tempo_disponivel_semanal': 10, 'idade': 25}
+cursos = [{'id_curso': 10074, 'nome': 'Python para Data Science', 'nivel': 'BASICO', 'carga_horaria': 40,
+           'avaliacao_media': 4.5, 'taxa_conclusao_media': 85, 'popularidade_score': 90},
+          {'id_curso': 10076, 'nome': 'Deep Learning Avançado', 'nivel': 'AVANCADO', 'carga_horaria': 80,
+           'avaliacao_media': 4.8, 'taxa_conclusao_media': 70, 'popularidade_score': 75}]
+
+try:
+    inicial = aguardar_workers(lambda e: e['geracao'] == 0, "Versão inicial")
+    nome_inicial = next(iter(inicial.values()))['ativa']
+
+    # Troca da ativa: a chamada chega a um worker, os dois passam a servir a v2
+    status, resposta = chamar('POST', '/admin/modelos/carregar', {'diretorio': versao})
+    assert status == 202, resposta
+    aguardar_workers(lambda e: e['ativa'] == 'v2-teste' and e['carga']['situacao'] == 'pronta',
+                     "Ativa v2-teste")
+    for _ in range(10):
+        status, resposta = chamar('POST', '/recomendar', {'usuario': usuario, 'cursos': cursos})
+        assert status == 200, resposta
+        assert {r['versao_modelo'] for r in resposta['recomendacoes']} == {'v2-teste'}, resposta
+    print("✓ Recomendações servidas pela v2-teste")
+
+    # A candidata não pode ser a própria ativa
+    status, resposta = chamar('POST', '/admin/modelos/carregar',
+                              {'diretorio': versao, 'candidata': True, 'fracao': 1.0})
+    assert status == 400, "candidata igual à ativa deveria ser recusada"
+
+    # A versão inicial de volta (em outro diretório) como candidata com todo o tráfego, depois promovida
+    shutil.copytree('modelos_compilados', os.path.join(raiz, 'v1', 'compilados'))
+    shutil.copy('features.json', os.path.join(raiz, 'v1'))
+    status, resposta = chamar('POST', '/admin/modelos/carregar',
+                              {'diretorio': os.path.join(raiz, 'v1'), 'versao': nome_inicial,
+                               'candidata': True, 'fracao': 1.0})
+    assert status == 202, resposta
+    aguardar_workers(lambda e: e['candidata'] == nome_inicial and e['fracao_candidata'] == 1.0,
+                     f"Candidata {nome_inicial} com 100% do tráfego")
+    status, resposta = chamar('POST', '/admin/modelos/promover')
+    assert status == 200, resposta
+    aguardar_workers(lambda e: e['ativa'] == nome_inicial and e['candidata'] is None,
+                     f"Ativa {nome_inicial} promovida")
+    status, resposta = chamar('DELETE', '/admin/modelos/candidata')
+    assert status == 404, resposta
+    print("✓ Sem candidata, DELETE responde 404")
+finally:
+    servidor.terminate()
+    servidor.wait(timeout=30)
+    shutil.rmtree(raiz, ignore_errors=True)
+
+print("\n✅ Trocas de versão propagadas para todos os workers")
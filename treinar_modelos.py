@@ -0,0 +1,245 @@
+"""
+SkillBridge - Treinamento dos Modelos
+=====================================
+Refaz, sem o notebook, os artefatos que a API usa: modelo_regressao.pkl,
+modelo_classificacao.pkl, features.json e metricas_modelos.json (e os
+modelos compilados de pontuacao/motor_arvores.py).
+
+- O CSV é lido em blocos (--linhas-por-bloco) só com as colunas usadas
+  pelos modelos e com tipos compactos: inteiros pequenos em int8/int16 e
+  decimais em float32 (o scikit-learn treina as árvores em float32 de
+  qualquer forma). As colunas de texto não entram nos modelos e não são
+  lidas. O alvo da regressão fica em float64, como o sklearn o usa.
+- --dataset aceita também a base colunar (python base_colunar.py): as
+  mesmas colunas são copiadas dos arrays mapeados, sem parse de texto.
+- As duas florestas são treinadas com n_jobs em todos os cores.
+- Cada execução grava uma versão nova em modelos/<versao>/; --publicar
+  copia a versão para os caminhos lidos pela API.
+
+O tempo de cada etapa e o pico de memória (RSS) do processo saem no
+terminal e em metricas_modelos.json.
+
+Uso:
+    $ python treinar_modelos.py
+    $ python treinar_modelos.py --dataset dataset_grande.csv --n-jobs 8 --publicar
+    $ python treinar_modelos.py --dataset base_colunar/interacoes
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import (accuracy_score, f1_score, mean_squared_error, precision_score, r2_score,
+                             recall_score, roc_auc_score)
+from sklearn.model_selection import train_test_split
+
+from base_colunar import TabelaColunar
+from pontuacao.motor_arvores import exportar_floresta
+from recursos import memoria_processo
+
+FEATURES_REGRESSAO = [
+    'nivel_experiencia_num', 'tempo_disponivel_semanal', 'idade', 'anos_experiencia',
+    'escolaridade_num', 'nivel_curso_num', 'carga_horaria', 'avaliacao_media',
+    'taxa_conclusao_media', 'popularidade_score', 'match_nivel', 'match_tempo', 'match_carreira'
+]
+FEATURES_CLASSIFICACAO = FEATURES_REGRESSAO + ['progresso']
+
+# Tipos das colunas lidas do CSV (os match_* valem 0.3/0.5 ou 1.0 no dataset)
+TIPOS = {
+    'nivel_experiencia_num': np.int8, 'escolaridade_num': np.int8, 'nivel_curso_num': np.int8,
+    'idade': np.int16, 'anos_experiencia': np.int16, 'tempo_disponivel_semanal': np.float32,
+    'carga_horaria': np.float32, 'avaliacao_media': np.float32, 'taxa_conclusao_media': np.float32,
+    'popularidade_score': np.float32, 'match_nivel': np.float32, 'match_tempo': np.float32,
+    'match_carreira': np.float32, 'progresso': np.float32,
+    'score_relevancia': np.float64, 'concluiu': np.int8
+}
+
+# Hiperparâmetros dos modelos publicados
+PARAMETROS = {'n_estimators': 100, 'max_depth': 20, 'min_samples_split': 10, 'min_samples_leaf': 5,
+              'random_state': 42}
+
+
+def ler_dataset(caminho, linhas_por_bloco):
+    """
+    Lê o CSV em blocos e retorna (X, y_reg, y_class): X em float32 com as
+    colunas de FEATURES_CLASSIFICACAO (as de regressão são as primeiras).
+    Um diretório é lido como base colunar.
+    """
+    if os.path.isdir(caminho):
+        return ler_dataset_colunar(caminho)
+    blocos_X, blocos_reg, blocos_class = [], [], []
+    for bloco in pd.read_csv(caminho, usecols=list(TIPOS), dtype=TIPOS, chunksize=linhas_por_bloco):
+        blocos_X.append(bloco[FEATURES_CLASSIFICACAO].to_numpy(dtype=np.float32))
+        blocos_reg.append(bloco['score_relevancia'].to_numpy())
+        blocos_class.append(bloco['concluiu'].to_numpy())
+    if not blocos_X:
+        raise SystemExit(f"Nenhuma linha em {caminho}")
+    X = np.concatenate(blocos_X)
+    del blocos_X
+    return X, np.concatenate(blocos_reg), np.concatenate(blocos_class)
+
+
+def ler_dataset_colunar(diretorio):
+    """ler_dataset da base colunar: uma coluna por vez direto para X, sem cópia intermediária."""
+    tabela = TabelaColunar(diretorio)
+    if not len(tabela):
+        raise SystemExit(f"Nenhuma linha em {diretorio}")
+    X = np.empty((len(tabela), len(FEATURES_CLASSIFICACAO)), dtype=np.float32)
+    for j, nome in enumerate(FEATURES_CLASSIFICACAO):
+        X[:, j] = tabela.coluna(nome).astype(TIPOS[nome], copy=False)
+    return (X, tabela.coluna('score_relevancia').astype(TIPOS['score_relevancia']),
+            tabela.coluna('concluiu').astype(TIPOS['concluiu']))
+
+
+def treinar_regressao(X, y, teste, n_jobs):
+    treino_idx, teste_idx = train_test_split(np.arange(len(y)), test_size=teste,
+                                             random_state=PARAMETROS['random_state'])
+    X = X[:, :len(FEATURES_REGRESSAO)]
+    modelo = RandomForestRegressor(n_jobs=n_jobs, **PARAMETROS)
+    inicio = time.perf_counter()
+    modelo.fit(pd.DataFrame(X[treino_idx], columns=FEATURES_REGRESSAO), y[treino_idx])
+    duracao = time.perf_counter() - inicio
+
+    pred_treino = modelo.predict(pd.DataFrame(X[treino_idx], columns=FEATURES_REGRESSAO))
+    pred_teste = modelo.predict(pd.DataFrame(X[teste_idx], columns=FEATURES_REGRESSAO))
+    metricas = {
+        'rmse_train': round(float(np.sqrt(mean_squared_error(y[treino_idx], pred_treino))), 4),
+        'rmse_test': round(float(np.sqrt(mean_squared_error(y[teste_idx], pred_teste))), 4),
+        'r2_train': round(float(r2_score(y[treino_idx], pred_treino)), 4),
+        'r2_test': round(float(r2_score(y[teste_idx], pred_teste)), 4)
+    }
+    return modelo, metricas, duracao, (len(treino_idx), len(teste_idx))
+
+
+def treinar_classificacao(X, y, teste, n_jobs):
+    treino_idx, teste_idx = train_test_split(np.arange(len(y)), test_size=teste,
+                                             random_state=PARAMETROS['random_state'], stratify=y)
+    modelo = RandomForestClassifier(n_jobs=n_jobs, **PARAMETROS)
+    inicio = time.perf_counter()
+    modelo.fit(pd.DataFrame(X[treino_idx], columns=FEATURES_CLASSIFICACAO), y[treino_idx])
+    duracao = time.perf_counter() - inicio
+
+    X_teste = pd.DataFrame(X[teste_idx], columns=FEATURES_CLASSIFICACAO)
+    pred_treino = modelo.predict(pd.DataFrame(X[treino_idx], columns=FEATURES_CLASSIFICACAO))
+    pred_teste = modelo.predict(X_teste)
+    y_teste = y[teste_idx]
+    metricas = {
+        'acuracia_train': round(float(accuracy_score(y[treino_idx], pred_treino)), 4),
+        'acuracia_test': round(float(accuracy_score(y_teste, pred_teste)), 4),
+        'precision_test': round(float(precision_score(y_teste, pred_teste, zero_division=0)), 4),
+        'recall_test': round(float(recall_score(y_teste, pred_teste, zero_division=0)), 4),
+        'f1_score_test': round(float(f1_score(y_teste, pred_teste, zero_division=0)), 4),
+        'roc_auc_test': (round(float(roc_auc_score(y_teste, modelo.predict_proba(X_teste)[:, 1])), 4)
+                         if len(np.unique(y_teste)) == 2 else None)
+    }
+    return modelo, metricas, duracao
+
+
+def publicar(diretorio):
+    """Copia os artefatos da versão para os caminhos usados pela API."""
+    for arquivo in ('modelo_regressao.pkl', 'modelo_classificacao.pkl', 'features.json', 'metricas_modelos.json'):
+        shutil.copy2(os.path.join(diretorio, arquivo), arquivo)
+    destino = os.environ.get('SKILLBRIDGE_MODELOS_COMPILADOS', 'modelos_compilados')
+    shutil.rmtree(destino, ignore_errors=True)
+    shutil.copytree(os.path.join(diretorio, 'compilados'), destino)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Treina os modelos a partir do dataset')
+    parser.add_argument('--dataset', default='dataset_treino.csv', help='CSV ou diretório da base colunar')
+    parser.add_argument('--saida', default='modelos', help='diretório das versões')
+    parser.add_argument('--versao', default=datetime.now().strftime('%Y%m%d-%H%M%S'))
+    parser.add_argument('--n-jobs', type=int, default=-1, help='threads de treino (padrão: todos os cores)')
+    parser.add_argument('--linhas-por-bloco', type=int, default=100000)
+    parser.add_argument('--teste', type=float, default=0.2, help='fração de teste')
+    parser.add_argument('--publicar', action='store_true',
+                        help='copia a versão para modelo_*.pkl, features.json e modelos_compilados/')
+    args = parser.parse_args(argv)
+
+    diretorio = os.path.join(args.saida, args.versao)
+    if os.path.exists(diretorio):
+        raise SystemExit(f"A versão {diretorio} já existe")
+
+    print("=" * 70)
+    print(f"🏋️  Treinando modelos {args.versao} ({args.dataset}, n_jobs={args.n_jobs})")
+    print("=" * 70)
+    tempos = {}
+
+    inicio = time.perf_counter()
+    X, y_reg, y_class = ler_dataset(args.dataset, args.linhas_por_bloco)
+    tempos['leitura_s'] = round(time.perf_counter() - inicio, 2)
+    print(f"✓ {len(X)} linhas lidas em {tempos['leitura_s']}s "
+          f"({(X.nbytes + y_reg.nbytes + y_class.nbytes) / 2 ** 20:.1f} MB em memória)")
+
+    modelo_regressao, metricas_reg, duracao, (n_treino, n_teste) = treinar_regressao(X, y_reg, args.teste,
+                                                                                       args.n_jobs)
+    tempos['treino_regressao_s'] = round(duracao, 2)
+    print(f"✓ Regressão em {duracao:.2f}s: RMSE teste {metricas_reg['rmse_test']}, R² teste {metricas_reg['r2_test']}")
+
+    modelo_classificacao, metricas_class, duracao = treinar_classificacao(X, y_class, args.teste, args.n_jobs)
+    tempos['treino_classificacao_s'] = round(duracao, 2)
+    print(f"✓ Classificação em {duracao:.2f}s: acurácia teste {metricas_class['acuracia_test']}, "
+          f"ROC-AUC {metricas_class['roc_auc_test']}")
+
+    inicio = time.perf_counter()
+    os.makedirs(diretorio)
+    for nome, modelo, colunas in (('regressao', modelo_regressao, FEATURES_REGRESSAO),
+                                  ('classificacao', modelo_classificacao, FEATURES_CLASSIFICACAO)):
+        with open(os.path.join(diretorio, f'modelo_{nome}.pkl'), 'wb') as f:
+            pickle.dump(modelo, f)
+        exportar_floresta(modelo, os.path.join(diretorio, 'compilados', nome), colunas)
+    with open(os.path.join(diretorio, 'features.json'), 'w') as f:
+        json.dump({'regressao': FEATURES_REGRESSAO, 'classificacao': FEATURES_CLASSIFICACAO}, f, indent=2)
+    tempos['gravacao_s'] = round(time.perf_counter() - inicio, 2)
+
+    metricas = {
+        'modelo_regressao': {
+            'tipo': 'Random Forest Regressor',
+            'objetivo': 'Prever score de relevância do curso (0-10)',
+            'metricas': metricas_reg,
+            'n_features': len(FEATURES_REGRESSAO),
+            'n_estimators': PARAMETROS['n_estimators'],
+            'random_state': PARAMETROS['random_state']
+        },
+        'modelo_classificacao': {
+            'tipo': 'Random Forest Classifier',
+            'objetivo': 'Prever se o usuário vai concluir o curso',
+            'metricas': metricas_class,
+            'n_features': len(FEATURES_CLASSIFICACAO),
+            'n_estimators': PARAMETROS['n_estimators'],
+            'random_state': PARAMETROS['random_state']
+        },
+        'dataset': {
+            'total_registros': len(X),
+            'split_ratio': round(1 - args.teste, 4),
+            'treino': n_treino,
+            'teste': n_teste
+        },
+        'treinamento': dict(tempos, versao=args.versao, data=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                            n_jobs=args.n_jobs, cpus=os.cpu_count(),
+                            pico_memoria_mb=memoria_processo()['pico_rss_mb'])
+    }
+    with open(os.path.join(diretorio, 'metricas_modelos.json'), 'w') as f:
+        json.dump(metricas, f, indent=2)
+
+    if args.publicar:
+        publicar(diretorio)
+
+    print("=" * 70)
+    print(f"⏱️  Leitura {tempos['leitura_s']}s, treino {tempos['treino_regressao_s']}s + "
+          f"{tempos['treino_classificacao_s']}s, gravação {tempos['gravacao_s']}s")
+    print(f"📈 Pico de memória: {metricas['treinamento']['pico_memoria_mb']} MB (RSS)")
+    print(f"✅ Modelos em {diretorio}/" + (" (publicados)" if args.publicar else ""))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())